@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+"""
+Cost of turning a campground's campsites payload into RGApiCampsite models.
+
+Builds a synthetic `camps/campgrounds/{id}/campsites` payload, with the
+equipment, attributes and detail maps a large campground carries, and times
+full pydantic validation of every site against `parse_trusted`, which
+validates the first site and decodes the rest without validation.
+
+    python benchmarks/bench_campsites.py --sites 600
+"""
+
+import argparse
+import json
+import random
+import time
+from typing import Any
+
+from pydantic import parse_obj_as
+
+from recreation.rgapi.camp import RGApiCampsite
+from recreation.rgapi.decode import parse_trusted
+
+EQUIPMENT = ["Tent", "Trailer", "RV", "Pickup Camper", "Caravan/Camper Van"]
+
+
+def detail(rng: random.Random, i: int) -> dict[str, Any]:
+    return {
+        "attribute_category": "site_details",
+        "attribute_code": f"attr_{i}",
+        "attribute_id": i,
+        "attribute_name": f"Attribute {i}",
+        "attribute_value": rng.choice(["Yes", "No", "N/A", str(rng.randrange(60))]),
+    }
+
+
+def campsite(rng: random.Random, site: int) -> dict[str, Any]:
+    return {
+        "campsite_id": str(site),
+        "campsite_latitude": 41.57 + rng.random() / 100,
+        "campsite_longitude": -121.65 - rng.random() / 100,
+        "campsite_name": f"A{site:03d}",
+        "campsite_reserve_type": "Site-Specific",
+        "campsite_status": "Open",
+        "campsite_type": "STANDARD NONELECTRIC",
+        "facility_id": "234436",
+        "loop": rng.choice("ABCDE"),
+        "parent_site_id": None,
+        "is_accessible": rng.random() < 0.1,
+        "is_deactivated": False,
+        "permitted_equipment": [
+            {
+                "campsite_equipment_type_id": i,
+                "equipment_name": name,
+                "max_length": rng.choice([0, 20, 28, 35, 45]),
+                "is_deactivated": False,
+            }
+            for i, name in enumerate(EQUIPMENT)
+        ],
+        "notices": [],
+        "attributes": [detail(rng, i) for i in range(15)],
+        "site_details_map": {f"attr_{i}": detail(rng, i) for i in range(12)},
+        "equipment_details_map": {f"equip_{i}": detail(rng, i) for i in range(3)},
+    }
+
+
+def timed(label: str, repeat: int, func) -> float:
+    best = min(_run(func) for _ in range(repeat))
+    print(f"{label:<24} {best * 1000:8.2f} ms")
+    return best
+
+
+def _run(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", type=int, default=600)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    payload = json.dumps(
+        {"campsites": [campsite(rng, site) for site in range(args.sites)]}
+    )
+    records = json.loads(payload)["campsites"]
+
+    print(f"{args.sites} sites, {len(payload) / 1e6:.1f} MB, best of {args.repeat}")
+    timed("json decode", args.repeat, lambda: json.loads(payload))
+    timed(
+        "pydantic validation",
+        args.repeat,
+        lambda: parse_obj_as(list[RGApiCampsite], records),
+    )
+    timed("trusted decode", args.repeat, lambda: parse_trusted(RGApiCampsite, records))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+
+"""
+Attribute access cost of the Campground/Campsite wrappers in a render loop.
+
+Builds a synthetic campground and an availability list over its sites, then
+times the loop the availability tables run (`camp.campsites[a.id].name`,
+`camp.url`, ...) against the models, against a wrapper proxying every read
+through __getattr__ the way the models used to, and against the raw pydantic
+objects as a floor.
+
+    python benchmarks/bench_models.py --sites 600 --rows 20000
+"""
+
+import argparse
+import datetime as dt
+import random
+import time
+from typing import Any
+
+from recreation.availability_list import CampgroundAvailability
+from recreation.models import Campground, Campsite
+from recreation.rgapi.camp import (
+    CampsiteAvailabilityStatus,
+    RGApiCampground,
+    RGApiCampsite,
+)
+
+
+class ProxyCampsite:
+    def __init__(self, api_campsite: RGApiCampsite) -> None:
+        self.api_campsite = api_campsite
+
+    def __getattr__(self, attr: str) -> Any:
+        if attr not in self.api_campsite.__fields__:
+            raise AttributeError
+        return self.api_campsite.__getattribute__(attr)
+
+
+def campground(n_sites: int) -> RGApiCampground:
+    return RGApiCampground(
+        campsites=[str(s) for s in range(n_sites)],
+        facility_email="",
+        facility_id="234436",
+        facility_latitude=41.57,
+        facility_longitude=-121.65,
+        facility_map_url="",
+        facility_name="BENCH CAMPGROUND",
+        facility_phone="",
+        facility_type="STANDARD",
+        parent_asset_id="1073",
+    )
+
+
+def campsite(site: int) -> RGApiCampsite:
+    return RGApiCampsite(
+        campsite_id=str(site),
+        campsite_latitude=41.57,
+        campsite_longitude=-121.65,
+        campsite_name=f"A{site:03d}",
+        campsite_reserve_type="Site-Specific",
+        campsite_status="Open",
+        campsite_type="STANDARD NONELECTRIC",
+        facility_id="234436",
+        loop="A",
+        parent_site_id=None,
+        is_accessible=False,
+        is_deactivated=False,
+        permitted_equipment=[],
+        notices=[],
+        attributes=[],
+        site_details_map={},
+        equipment_details_map={},
+    )
+
+
+def render(sites: dict[str, Any], url: str, rows: list[CampgroundAvailability]):
+    out = []
+    for a in rows:
+        site = sites[a.id]
+        out.append(
+            (
+                f"[link={url}]{site.name}[/link]",
+                site.campsite_type,
+                site.loop,
+                a.date.isoformat(),
+                str(a.length),
+            )
+        )
+    return out
+
+
+def timed(label: str, repeat: int, func) -> float:
+    best = min(_run(func) for _ in range(repeat))
+    print(f"{label:<24} {best * 1000:8.2f} ms")
+    return best
+
+
+def _run(func) -> float:
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sites", type=int, default=600)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    api_sites = [campsite(site) for site in range(args.sites)]
+    camp = Campground(campground(args.sites))
+    camp.campsites = {site.id: Campsite(site) for site in api_sites}
+    proxies = {site.id: ProxyCampsite(site) for site in api_sites}
+    raw = {site.id: site for site in api_sites}
+
+    start = dt.date(2022, 7, 1)
+    rows = [
+        CampgroundAvailability(
+            str(rng.randrange(args.sites)),
+            start + dt.timedelta(days=rng.randrange(60)),
+            CampsiteAvailabilityStatus.available,
+            rng.randrange(1, 7),
+        )
+        for _ in range(args.rows)
+    ]
+
+    print(f"{args.rows} rows over {args.sites} sites, best of {args.repeat}")
+    timed("models", args.repeat, lambda: render(camp.campsites, camp.url, rows))
+    timed("__getattr__ proxy", args.repeat, lambda: render(proxies, camp.url, rows))
+    timed("raw pydantic", args.repeat, lambda: render(raw, camp.url, rows))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+
+"""
+Throughput of the sharded campground scanner.
+
+Runs recreation.scanner.scan_campgrounds, with its worker processes, request
+threads and shared rate limiter, against a stubbed HTTP transport that
+answers every request from synthetic payloads after a fixed latency. Nothing
+goes over the network, so the numbers show how the scanner overlaps request
+latency with parsing as processes are added.
+
+    python benchmarks/bench_scan.py --campgrounds 48 --sites 80 --months 3
+"""
+
+import argparse
+import datetime as dt
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+
+import requests
+from bench_campsites import campsite
+
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.scanner import scan_campgrounds
+
+STATUSES = [
+    CampsiteAvailabilityStatus.available.value,
+    CampsiteAvailabilityStatus.reserved.value,
+    CampsiteAvailabilityStatus.not_available.value,
+]
+
+CAMPGROUND = re.compile(r"/camps/campgrounds/(\d+)$")
+CAMPSITES = re.compile(r"/camps/campgrounds/\d+/campsites$")
+AVAILABILITY = re.compile(r"/camps/availability/campground/\d+/month$")
+
+
+def month_payload(n_sites: int, month: dt.date, rng: random.Random) -> dict:
+    days = [month + dt.timedelta(days=d) for d in range(28)]
+    return {
+        "campsites": {
+            str(site): {
+                "availabilities": {
+                    f"{day.isoformat()}T00:00:00Z": rng.choice(STATUSES) for day in days
+                },
+                "campsite_id": str(site),
+                "campsite_reserve_type": "Site-Specific",
+                "campsite_type": "STANDARD NONELECTRIC",
+                "loop": "A",
+                "max_num_people": 6,
+                "min_num_people": 1,
+                "site": f"A{site:03d}",
+                "type_of_use": "Overnight",
+            }
+            for site in range(n_sites)
+        }
+    }
+
+
+def campground_payload(campground_id: str) -> dict:
+    return {
+        "campground": {
+            "facility_email": None,
+            "facility_id": campground_id,
+            "facility_latitude": 41.57,
+            "facility_longitude": -121.65,
+            "facility_map_url": None,
+            "facility_name": f"Campground {campground_id}",
+            "facility_phone": "",
+            "facility_type": "STANDARD",
+            "parent_asset_id": "1",
+        }
+    }
+
+
+class Stub:
+    latency = 0.0
+    campsites = b""
+    months: dict[str, bytes] = {}
+
+
+def stub_send(adapter, request, **kwargs):
+    # Replaces HTTPAdapter.send, so the client's session, request strategy and
+    # rate limiter all still run. Installed before the worker processes fork
+    # so they inherit it.
+    time.sleep(Stub.latency)
+    path, _, query = request.path_url.partition("?")
+    match = CAMPGROUND.search(path)
+    if match:
+        content = json.dumps(campground_payload(match.group(1))).encode()
+    elif CAMPSITES.search(path):
+        content = Stub.campsites
+    elif AVAILABILITY.search(path):
+        # start_date=YYYY-MM-01T00:00:00.000Z
+        content = Stub.months[query.split("start_date=")[1][:10]]
+    else:
+        raise ValueError(f"unexpected request {request.url}")
+
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "application/json"
+    response._content = content
+    response.url = request.url
+    response.request = request
+    return response
+
+
+def run(
+    campground_ids: list[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    processes: int,
+    workers: int,
+    rate: float,
+) -> float:
+    start = time.perf_counter()
+    for result in scan_campgrounds(
+        campground_ids,
+        start_date,
+        end_date,
+        processes=processes,
+        rate=rate,
+        workers=workers,
+    ):
+        if result.error:
+            raise RuntimeError(result.error)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--campgrounds", type=int, default=48)
+    parser.add_argument("--sites", type=int, default=80)
+    parser.add_argument("--months", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1000.0)
+    parser.add_argument("--max-processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    # the stub only reaches the workers if they fork from this process
+    multiprocessing.set_start_method("fork")
+
+    rng = random.Random(0)
+    start_date = dt.date.today().replace(day=1) + dt.timedelta(days=62)
+    start_date = start_date.replace(day=1)
+    months = [start_date]
+    while len(months) < args.months:
+        months.append((months[-1] + dt.timedelta(days=31)).replace(day=1))
+    end_date = months[-1] + dt.timedelta(days=27)
+
+    Stub.latency = args.latency
+    Stub.campsites = json.dumps(
+        {"campsites": [campsite(rng, site) for site in range(args.sites)]}
+    ).encode()
+    Stub.months = {
+        month.isoformat(): json.dumps(month_payload(args.sites, month, rng)).encode()
+        for month in months
+    }
+    requests.adapters.HTTPAdapter.send = stub_send
+
+    campground_ids = [str(100000 + i) for i in range(args.campgrounds)]
+    requests_per_campground = 2 + args.months
+    print(
+        f"{args.campgrounds} campgrounds x {requests_per_campground} requests, "
+        f"{args.latency * 1000:.0f} ms latency, {args.workers} threads per process"
+    )
+    print(f"{'procs':>5} {'seconds':>8} {'cg/sec':>8} {'speedup':>8}")
+    baseline = None
+    processes = 1
+    while processes <= args.max_processes:
+        elapsed = run(
+            campground_ids,
+            start_date,
+            end_date,
+            processes,
+            args.workers,
+            args.rate,
+        )
+        baseline = baseline or elapsed
+        print(
+            f"{processes:>5} {elapsed:>8.3f} {args.campgrounds / elapsed:>8.1f} "
+            f"{baseline / elapsed:>8.2f}"
+        )
+        processes *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+
+"""
+Load test of the local query server against a stubbed upstream.
+
+Starts the HTTP server from recreation.server in process, backed by a stub
+client that sleeps for a fixed upstream latency and draws every upstream
+request from a shedding rate limiter, then hammers it from many threads
+with overlapping campground availability queries. Reports throughput,
+latency percentiles, response codes and how many upstream requests the
+month cache and request coalescing saved.
+
+    python benchmarks/load_server.py --clients 32 --requests 2000 --rate 20
+"""
+
+import argparse
+import datetime as dt
+import json
+import random
+import statistics
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from recreation.rgapi.camp import (
+    CampsiteAvailabilityStatus,
+    RGApiCampground,
+    RGApiCampgroundAvailability,
+    RGApiCampsite,
+)
+from recreation.rgapi.extra import RGApiRatingAggregate
+from recreation.server import QueryService, SheddingRateLimiter, make_server
+
+STATUSES = [
+    CampsiteAvailabilityStatus.available.value,
+    CampsiteAvailabilityStatus.reserved.value,
+]
+
+
+class StubClient:
+    def __init__(self, latency: float, limiter: SheddingRateLimiter, sites: int):
+        self.latency = latency
+        self.limiter = limiter
+        self.sites = sites
+        self.upstream = 0
+        self._lock = threading.Lock()
+
+    def _request(self) -> None:
+        self.limiter.acquire()
+        with self._lock:
+            self.upstream += 1
+        time.sleep(self.latency)
+
+    def get_campground(self, campground_id):
+        self._request()
+        return RGApiCampground(
+            campsites=[str(s) for s in range(self.sites)],
+            facility_email="",
+            facility_id=str(campground_id),
+            facility_latitude=37.7,
+            facility_longitude=-119.6,
+            facility_map_url="",
+            facility_name=f"STUB CAMPGROUND {campground_id}",
+            facility_phone="",
+            facility_type="STANDARD",
+            parent_asset_id="1",
+        )
+
+    def get_campground_sites(self, campground_id):
+        self._request()
+        return [
+            RGApiCampsite(
+                campsite_id=str(site),
+                campsite_latitude=37.7,
+                campsite_longitude=-119.6,
+                campsite_name=f"A{site:03d}",
+                campsite_reserve_type="Site-Specific",
+                campsite_status="Open",
+                campsite_type="STANDARD NONELECTRIC",
+                facility_id=str(campground_id),
+                loop="A",
+                parent_site_id=None,
+                is_accessible=False,
+                is_deactivated=False,
+                permitted_equipment=[],
+                notices=[],
+                attributes=[],
+                site_details_map={},
+                equipment_details_map={},
+            )
+            for site in range(self.sites)
+        ]
+
+    def get_alerts(self, location_id, location_type):
+        self._request()
+        return []
+
+    def get_ratings(self, location_id, location_type):
+        self._request()
+        return RGApiRatingAggregate(
+            aggregate_cell_coverage_ratings=[],
+            average_rating=0,
+            location_id=str(location_id),
+            location_type=location_type.value,
+            number_of_ratings=0,
+            star_counts={},
+        )
+
+    def get_campground_availability(self, campground_id, month):
+        self._request()
+        rng = random.Random(f"{campground_id}{month}")
+        days = [month + dt.timedelta(days=d) for d in range(28)]
+        return RGApiCampgroundAvailability(
+            campsites={
+                str(site): {
+                    "availabilities": {
+                        f"{day.isoformat()}T00:00:00Z": rng.choice(STATUSES)
+                        for day in days
+                    },
+                    "campsite_id": str(site),
+                    "campsite_reserve_type": "Site-Specific",
+                    "campsite_type": "STANDARD NONELECTRIC",
+                    "loop": "A",
+                    "max_num_people": 6,
+                    "min_num_people": 1,
+                    "site": f"A{site:03d}",
+                    "type_of_use": "Overnight",
+                }
+                for site in range(self.sites)
+            }
+        )
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100)[int(pct) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--campgrounds", type=int, default=20)
+    parser.add_argument("--sites", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.15)
+    parser.add_argument("--rate", type=float, default=20.0)
+    parser.add_argument("--burst", type=int, default=20)
+    parser.add_argument("--max-wait", type=float, default=1.0)
+    args = parser.parse_args()
+
+    limiter = SheddingRateLimiter(
+        rate=args.rate, burst=args.burst, max_wait=args.max_wait
+    )
+    stub = StubClient(args.latency, limiter, args.sites)
+    service = QueryService(client=stub)
+    server = make_server(service, port=0)
+    host, port = server.server_address[:2]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rng = random.Random(0)
+    today = dt.date.today()
+    urls = []
+    for _ in range(args.requests):
+        start = today + dt.timedelta(days=rng.randrange(1, 75))
+        end = start + dt.timedelta(days=rng.randrange(1, 14))
+        camp_id = 100000 + rng.randrange(args.campgrounds)
+        urls.append(
+            f"http://{host}:{port}/campground/{camp_id}/availability"
+            f"?start_date={start}&end_date={end}&status=available&length=2"
+        )
+
+    def fetch(url: str) -> tuple[int, float]:
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url) as resp:
+                json.load(resp)
+                code = resp.status
+        except urllib.error.HTTPError as exc:
+            code = exc.code
+        return code, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        results = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+
+    codes = Counter(code for code, _ in results)
+    ok = sorted(latency for code, latency in results if code == 200)
+    stats = service.stats()
+    naive = args.requests * 5  # 4 metadata requests plus at least one month
+    print(f"requests      {args.requests} in {elapsed:.2f}s")
+    print(f"throughput    {args.requests / elapsed:.1f} req/s")
+    print(f"responses     {dict(sorted(codes.items()))}")
+    print(
+        f"latency 200   p50 {percentile(ok, 50) * 1000:.1f}ms  "
+        f"p95 {percentile(ok, 95) * 1000:.1f}ms  "
+        f"p99 {percentile(ok, 99) * 1000:.1f}ms"
+    )
+    print(f"upstream      {stub.upstream} requests (>= {naive} without sharing)")
+    print(
+        f"cache         {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['coalesced']} coalesced, {stats['shed']} shed"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,21 +2,56 @@ import datetime as dt
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from operator import attrgetter
-from typing import Generic, Iterable, Optional, Sequence, TypeVar, Union, cast
-
-from apiclient.exceptions import ClientError
-from dateutil import rrule
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Collection,
+    Generic,
+    Optional,
+    Sequence,
+    TypeVar,
+    Union,
+    cast,
+)
 
-from .core import IntOrStr
+from .core import POOL_NUM_WORKERS, IntOrStr
+from .permit_family import PermitApiFamily, PermitFamilyMap, default_permit_families
+from .profiling import AGGREGATE, FILTER, FLATTEN, timed_stage
 from .rgapi.camp import CampsiteAvailabilityStatus, RGApiCampgroundAvailability
-from .rgapi.client import RecreationGovClient
 from .rgapi.permit import (
     RGApiPermitAvailability,
     RgApiPermitDivision,
     RGApiPermitInyoAvailability,
 )
+from .tracing import current_span, span, traced_task
+
+if TYPE_CHECKING:
+    from .rgapi.client import RecreationGovClient
+
+PathLike = Union[str, Path]
+
+
+def _months_between(
+    start_date: dt.date, end_date: Optional[dt.date] = None
+) -> list[dt.date]:
+    from dateutil import rrule
 
-POOL_NUM_WORKERS = 16
+    start_date = max(start_date, dt.date.today())
+    if not end_date:
+        end_date = start_date
+
+    start_month = start_date.replace(day=1)
+    end_month = end_date.replace(day=1)
+    n_months = (
+        (end_month.year - start_month.year) * 12
+        + (end_month.month - start_month.month)
+        + 1
+    )
+    return [
+        m.date()
+        for m in rrule.rrule(freq=rrule.MONTHLY, dtstart=start_month, count=n_months)
+    ]
 
 
 # Define a type variable bound to BaseAvailability
@@ -60,6 +95,7 @@ class AvailabilityList(Generic[T]):
         self.ids = sorted(list(set(avail.id for avail in self.availability)))
         self.dates = sorted(list(set(avail.date for avail in self.availability)))
 
+    @timed_stage(FILTER)
     def filter_id(
         self, ids: Union[IntOrStr, Sequence[IntOrStr]]
     ) -> "AvailabilityList[T]":
@@ -69,6 +105,7 @@ class AvailabilityList(Generic[T]):
         availability = [avail for avail in self.availability if avail.id in id_strs]
         return self.__class__(availability)
 
+    @timed_stage(FILTER)
     def filter_dates(
         self,
         start_date: Optional[dt.date] = None,
@@ -92,6 +129,7 @@ class AvailabilityList(Generic[T]):
             availability = [avail for avail in availability if avail.date <= end_date]
         return self.__class__(availability)
 
+    @timed_stage(FILTER)
     def filter_days_of_week(
         self, days_of_week: Optional[list[int]] = None
     ) -> "AvailabilityList[T]":
@@ -102,15 +140,24 @@ class AvailabilityList(Generic[T]):
         ]
         return self.__class__(availability)
 
+    def save(self, path: PathLike, meta: Optional[dict[str, Any]] = None) -> None:
+        from .snapshot import save_snapshot
+
+        save_snapshot(path, self, meta)
+
 
 class CampgroundAvailabilityList(AvailabilityList[CampgroundAvailability]):
     @staticmethod
+    @timed_stage(FLATTEN)
     def _from_campground_month(
         api_availability: RGApiCampgroundAvailability,
+        site_ids: Optional[Collection[str]] = None,
     ) -> list[CampgroundAvailability]:
         availability: list[CampgroundAvailability] = []
 
         for _camp_id, camp_avail in api_availability.campsites.items():
+            if site_ids is not None and camp_avail.id not in site_ids:
+                continue
             for date, date_avail in camp_avail.availabilities.items():
                 avail = CampgroundAvailability(
                     id=camp_avail.id, date=date.date(), status=date_avail, length=1
@@ -140,6 +187,7 @@ class CampgroundAvailabilityList(AvailabilityList[CampgroundAvailability]):
         return agg_avail
 
     @staticmethod
+    @timed_stage(AGGREGATE)
     def _aggregate_campground_availability(
         day_availability: list[CampgroundAvailability],
     ) -> list[CampgroundAvailability]:
@@ -160,12 +208,17 @@ class CampgroundAvailabilityList(AvailabilityList[CampgroundAvailability]):
 
     @staticmethod
     def from_campground(
-        availability_months: list[RGApiCampgroundAvailability], aggregate: bool = True
+        availability_months: list[RGApiCampgroundAvailability],
+        aggregate: bool = True,
+        site_ids: Optional[Collection[str]] = None,
     ) -> "CampgroundAvailabilityList":
+        # site_ids restricts the result to those campsites before flattening
         availability: list[CampgroundAvailability] = []
 
         for api_month in availability_months:
-            month = CampgroundAvailabilityList._from_campground_month(api_month)
+            month = CampgroundAvailabilityList._from_campground_month(
+                api_month, site_ids
+            )
             availability += month
 
         availability.sort(key=attrgetter("id", "date"))
@@ -185,43 +238,56 @@ class CampgroundAvailabilityList(AvailabilityList[CampgroundAvailability]):
         start_date: dt.date,
         end_date: Optional[dt.date] = None,
         aggregate: bool = True,
+        client: Optional["RecreationGovClient"] = None,
+        site_ids: Optional[Collection[str]] = None,
     ) -> "CampgroundAvailabilityList":
-        start_date = max(start_date, dt.date.today())
-        if not end_date:
-            end_date = start_date
-
-        start_month = start_date.replace(day=1)
-        end_month = end_date.replace(day=1)
-        n_months = (
-            (end_month.year - start_month.year) * 12
-            + (end_month.month - start_month.month)
-            + 1
-        )
-        months: Iterable[dt.date] = [
-            m.date()
-            for m in rrule.rrule(
-                freq=rrule.MONTHLY, dtstart=start_month, count=n_months
-            )
-        ]
+        from .rgapi.client import RecreationGovClient
+
+        months = _months_between(start_date, end_date)
 
-        client = RecreationGovClient()
+        client = client or RecreationGovClient()
 
         def get_campground_partial(month: dt.date):
+            current_span().set_attribute("month", month.isoformat())
             return client.get_campground_availability(campground_id, month)
 
-        with ThreadPoolExecutor(max_workers=POOL_NUM_WORKERS) as executor:
-            availability_months = list(executor.map(get_campground_partial, months))
+        with span("CampgroundAvailabilityList.fetch_availability") as fetch:
+            if fetch.is_recording():
+                fetch.set_attributes(
+                    {
+                        "campground_id": campground_id,
+                        "months": [m.isoformat() for m in months],
+                        "month_count": len(months),
+                    }
+                )
+            with ThreadPoolExecutor(max_workers=POOL_NUM_WORKERS) as executor:
+                availability_months = list(
+                    executor.map(
+                        traced_task("fetch month", get_campground_partial), months
+                    )
+                )
+
+            return CampgroundAvailabilityList.from_campground(
+                availability_months, aggregate, site_ids
+            )
 
-        return CampgroundAvailabilityList.from_campground(
-            availability_months, aggregate
-        )
+    @staticmethod
+    def load(path: PathLike) -> "CampgroundAvailabilityList":
+        from .snapshot import KIND_CAMPGROUND, load_snapshot
 
+        with load_snapshot(path) as snapshot:
+            if snapshot.kind != KIND_CAMPGROUND:
+                raise ValueError(f"{path} is a {snapshot.kind} snapshot")
+            return cast(CampgroundAvailabilityList, snapshot.to_list())
+
+    @timed_stage(FILTER)
     def filter_status(
         self, status: CampsiteAvailabilityStatus
     ) -> "CampgroundAvailabilityList":
         availability = [avail for avail in self.availability if avail.status == status]
         return self.__class__(availability)
 
+    @timed_stage(FILTER)
     def filter_length(self, length: int) -> "CampgroundAvailabilityList":
         availability = [avail for avail in self.availability if avail.length >= length]
         return self.__class__(availability)
@@ -229,6 +295,7 @@ class CampgroundAvailabilityList(AvailabilityList[CampgroundAvailability]):
 
 class PermitAvailabilityList(AvailabilityList[PermitAvailability]):
     @staticmethod
+    @timed_stage(FLATTEN)
     def _from_permit_month(
         api_availability: RGApiPermitAvailability,
     ) -> list[PermitAvailability]:
@@ -262,6 +329,7 @@ class PermitAvailabilityList(AvailabilityList[PermitAvailability]):
         return PermitAvailabilityList(availability)
 
     @staticmethod
+    @timed_stage(FLATTEN)
     def _from_permit_inyo_month(
         api_availability: RGApiPermitInyoAvailability,
     ) -> list[PermitAvailability]:
@@ -296,45 +364,97 @@ class PermitAvailabilityList(AvailabilityList[PermitAvailability]):
 
     @staticmethod
     def fetch_availability(
-        permit_id: str, start_date: dt.date, end_date: Optional[dt.date] = None
+        permit_id: str,
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+        families: Optional[PermitFamilyMap] = None,
+        client: Optional["RecreationGovClient"] = None,
     ) -> "PermitAvailabilityList":
-        start_date = max(start_date, dt.date.today())
-        if not end_date:
-            end_date = start_date
-
-        start_month = start_date.replace(day=1)
-        end_month = end_date.replace(day=1)
-        n_months = (
-            (end_month.year - start_month.year) * 12
-            + (end_month.month - start_month.month)
-            + 1
-        )
-        months: Iterable[dt.date] = [
-            m.date()
-            for m in rrule.rrule(
-                freq=rrule.MONTHLY, dtstart=start_month, count=n_months
-            )
-        ]
+        from apiclient.exceptions import ClientError
 
-        client = RecreationGovClient()
+        from .rgapi.client import RecreationGovClient
 
-        def fetch_permit_partial(month: dt.date):
-            return client.get_permit_availability(permit_id, month)
+        months = _months_between(start_date, end_date)
 
-        def fetch_permit_inyo_partial(month: dt.date):
-            return client.get_permit_inyo_availability(permit_id, month)
+        if families is None:
+            families = default_permit_families()
 
-        try:
-            with ThreadPoolExecutor(max_workers=POOL_NUM_WORKERS) as executor:
-                availability_months = list(executor.map(fetch_permit_partial, months))
-            return PermitAvailabilityList.from_permit(availability_months)
-        except ClientError:
+        client = client or RecreationGovClient()
+
+        def fetch_months(family: PermitApiFamily, months: list[dt.date]) -> list:
+            if family == PermitApiFamily.standard:
+                get_month = client.get_permit_availability
+            else:
+                get_month = client.get_permit_inyo_availability
+
+            def get_permit_partial(month: dt.date):
+                current_span().set_attribute("month", month.isoformat())
+                return get_month(permit_id, month)
+
+            if len(months) == 1:
+                return [get_permit_partial(months[0])]
             with ThreadPoolExecutor(max_workers=POOL_NUM_WORKERS) as executor:
-                availability_months = list(
-                    executor.map(fetch_permit_inyo_partial, months)
+                return list(
+                    executor.map(traced_task("fetch month", get_permit_partial), months)
                 )
+
+        def from_months(
+            family: PermitApiFamily, availability_months: list
+        ) -> "PermitAvailabilityList":
+            families.set(permit_id, family)
+            current_span().set_attribute("permit_family", family.value)
+            if family == PermitApiFamily.standard:
+                return PermitAvailabilityList.from_permit(availability_months)
             return PermitAvailabilityList.from_permit_inyo(availability_months)
 
+        with span("PermitAvailabilityList.fetch_availability") as fetch:
+            if fetch.is_recording():
+                fetch.set_attributes(
+                    {
+                        "permit_id": permit_id,
+                        "months": [m.isoformat() for m in months],
+                        "month_count": len(months),
+                    }
+                )
+
+            # each family is tried once, and if none works the first error
+            # is the one reported
+            first_error: Optional[ClientError] = None
+            family = families.get(permit_id)
+            if family is not None:
+                try:
+                    return from_months(family, fetch_months(family, months))
+                except ClientError as exc:
+                    # the permit moved between families, re-probe below
+                    first_error = exc
+                    fetch.add_event("family changed", {"family": family.value})
+                probes = [family.other]
+            else:
+                probes = [PermitApiFamily.standard, PermitApiFamily.standard.other]
+
+            # probe a single month to learn the family before fanning out
+            for family in probes:
+                try:
+                    first_month = fetch_months(family, months[:1])
+                except ClientError as exc:
+                    first_error = first_error or exc
+                    continue
+                rest_months = (
+                    fetch_months(family, months[1:]) if len(months) > 1 else []
+                )
+                return from_months(family, first_month + rest_months)
+            raise cast(ClientError, first_error)
+
+    @staticmethod
+    def load(path: PathLike) -> "PermitAvailabilityList":
+        from .snapshot import KIND_PERMIT, load_snapshot
+
+        with load_snapshot(path) as snapshot:
+            if snapshot.kind != KIND_PERMIT:
+                raise ValueError(f"{path} is a {snapshot.kind} snapshot")
+            return cast(PermitAvailabilityList, snapshot.to_list())
+
+    @timed_stage(FILTER)
     def filter_division(
         self, division: Union[RgApiPermitDivision, Sequence[RgApiPermitDivision]]
     ) -> "PermitAvailabilityList":
@@ -345,12 +465,14 @@ class PermitAvailabilityList(AvailabilityList[PermitAvailability]):
         # Explicitly cast the result to PermitAvailabilityList
         return cast(PermitAvailabilityList, filtered_list)
 
+    @timed_stage(FILTER)
     def filter_remain(self, remaining: int) -> "PermitAvailabilityList":
         availability = [
             avail for avail in self.availability if avail.remaining >= remaining
         ]
         return self.__class__(availability)
 
+    @timed_stage(FILTER)
     def filter_walkup(self, is_walkup: bool) -> "PermitAvailabilityList":
         availability = [
             avail for avail in self.availability if avail.is_walkup == is_walkup
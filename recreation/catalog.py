@@ -0,0 +1,202 @@
+import csv
+import json
+import math
+from dataclasses import asdict, dataclass
+from os import PathLike
+from pathlib import Path
+from typing import Any, Generic, Iterable, Iterator, Optional, TypeVar, Union
+
+from .core import cache_dir
+
+CATALOG_FILE = "facilities.json"
+# grid cell size, in degrees of latitude and longitude
+CELL_DEGREES = 0.5
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+T = TypeVar("T")
+
+
+@dataclass
+class CatalogFacility:
+    facility_id: str
+    name: str
+    latitude: float
+    longitude: float
+    facility_type: str = ""
+    rec_area_id: str = ""
+
+    @staticmethod
+    def from_ridb(record: dict[str, Any]) -> Optional["CatalogFacility"]:
+        # a row of a RIDB facilities export, None if it has no usable location
+        try:
+            latitude = float(record.get("FacilityLatitude") or 0)
+            longitude = float(record.get("FacilityLongitude") or 0)
+        except ValueError:
+            return None
+        if latitude == 0 and longitude == 0:
+            return None
+        return CatalogFacility(
+            facility_id=str(record["FacilityID"]),
+            name=str(record.get("FacilityName") or "").strip(),
+            latitude=latitude,
+            longitude=longitude,
+            facility_type=str(record.get("FacilityTypeDescription") or ""),
+            rec_area_id=str(record.get("ParentRecAreaID") or ""),
+        )
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(dphi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def read_ridb_export(path: Union[str, PathLike]) -> list[CatalogFacility]:
+    # RIDB bulk exports come as CSV, or JSON with the rows under RECDATA
+    path = Path(path)
+    records: Iterable[dict[str, Any]]
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        if path.suffix.lower() == ".csv":
+            records = list(csv.DictReader(f))
+        else:
+            data = json.load(f)
+            records = data["RECDATA"] if isinstance(data, dict) else data
+
+    facilities = []
+    for record in records:
+        facility = CatalogFacility.from_ridb(record)
+        if facility is not None:
+            facilities.append(facility)
+    return facilities
+
+
+class SpatialGrid(Generic[T]):
+    # Items bucketed on a lat/lon grid, so a radius search only measures the
+    # items in the few cells the circle's bounding box touches.
+    def __init__(self, cell_degrees: float = CELL_DEGREES) -> None:
+        self.cell_degrees = cell_degrees
+        self._cells: dict[tuple[int, int], list[tuple[float, float, T]]] = {}
+        self._columns = math.ceil(360 / cell_degrees)
+
+    def _cell(self, latitude: float, longitude: float) -> tuple[int, int]:
+        return (
+            math.floor(latitude / self.cell_degrees),
+            math.floor(longitude / self.cell_degrees) % self._columns,
+        )
+
+    def add(self, latitude: float, longitude: float, item: T) -> None:
+        cell = self._cell(latitude, longitude)
+        self._cells.setdefault(cell, []).append((latitude, longitude, item))
+
+    def remove(self, latitude: float, longitude: float, item: T) -> None:
+        self._cells[self._cell(latitude, longitude)].remove((latitude, longitude, item))
+
+    def _search_cells(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> Iterator[tuple[int, int]]:
+        dlat = radius_km / KM_PER_DEGREE
+        rows = range(
+            math.floor((latitude - dlat) / self.cell_degrees),
+            math.floor((latitude + dlat) / self.cell_degrees) + 1,
+        )
+
+        # longitude degrees shrink towards the poles, so widen by the
+        # highest latitude the circle reaches
+        cos_lat = math.cos(math.radians(min(90.0, abs(latitude) + dlat)))
+        if cos_lat * 180 * KM_PER_DEGREE <= radius_km:
+            columns: Iterable[int] = range(self._columns)
+        else:
+            dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+            first = math.floor((longitude - dlon) / self.cell_degrees)
+            last = math.floor((longitude + dlon) / self.cell_degrees)
+            if last - first + 1 >= self._columns:
+                columns = range(self._columns)
+            else:
+                columns = [c % self._columns for c in range(first, last + 1)]
+
+        for row in rows:
+            for column in columns:
+                yield row, column
+
+    def near(
+        self, latitude: float, longitude: float, radius_km: float
+    ) -> Iterator[tuple[T, float]]:
+        # items within radius_km with their distance, in no particular order
+        for cell in self._search_cells(latitude, longitude, radius_km):
+            for item_lat, item_lon, item in self._cells.get(cell, []):
+                distance = haversine_km(latitude, longitude, item_lat, item_lon)
+                if distance <= radius_km:
+                    yield item, distance
+
+
+class FacilityCatalog:
+    def __init__(
+        self,
+        facilities: Iterable[CatalogFacility] = (),
+        cell_degrees: float = CELL_DEGREES,
+    ) -> None:
+        self.facilities: dict[str, CatalogFacility] = {}
+        self._grid: SpatialGrid[CatalogFacility] = SpatialGrid(cell_degrees)
+        for facility in facilities:
+            self.add(facility)
+
+    def __len__(self) -> int:
+        return len(self.facilities)
+
+    def __iter__(self) -> Iterator[CatalogFacility]:
+        return iter(self.facilities.values())
+
+    def add(self, facility: CatalogFacility) -> None:
+        old = self.facilities.get(facility.facility_id)
+        if old is not None:
+            self._grid.remove(old.latitude, old.longitude, old)
+        self.facilities[facility.facility_id] = facility
+        self._grid.add(facility.latitude, facility.longitude, facility)
+
+    def get(self, facility_id: str) -> Optional[CatalogFacility]:
+        return self.facilities.get(facility_id)
+
+    def of_type(self, facility_type: str) -> list[CatalogFacility]:
+        facility_type = facility_type.casefold()
+        return [f for f in self if f.facility_type.casefold() == facility_type]
+
+    def near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        facility_types: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[tuple[CatalogFacility, float]]:
+        # facilities within radius_km, nearest first, with their distance
+        types = {t.casefold() for t in facility_types} if facility_types else None
+        matches = [
+            (facility, distance)
+            for facility, distance in self._grid.near(latitude, longitude, radius_km)
+            if not types or facility.facility_type.casefold() in types
+        ]
+        matches.sort(key=lambda m: (m[1], m[0].facility_id))
+        return matches[:limit] if limit else matches
+
+    @staticmethod
+    def from_export(path: Union[str, PathLike]) -> "FacilityCatalog":
+        return FacilityCatalog(read_ridb_export(path))
+
+    @staticmethod
+    def load(path: Optional[Union[str, PathLike]] = None) -> "FacilityCatalog":
+        path = Path(path) if path else cache_dir() / CATALOG_FILE
+        with open(path) as f:
+            return FacilityCatalog(CatalogFacility(**row) for row in json.load(f))
+
+    def save(self, path: Optional[Union[str, PathLike]] = None) -> Path:
+        path = Path(path) if path else cache_dir() / CATALOG_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump([asdict(facility) for facility in self], f)
+        return path
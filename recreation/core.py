@@ -1,3 +1,40 @@
+import os
+from pathlib import Path
 from typing import Union
 
 IntOrStr = Union[int, str]
+
+POOL_NUM_WORKERS = 16
+
+PERMIT_IDS = {
+    "desolation": "233261",
+    "humboldt": "445856",
+    "yosemite": "445859",
+    "inyo": "233262",
+    "sierra": "445858",
+    "seki": "445857",
+    "whitney": "233260",
+}
+
+# watch poll intervals, in seconds
+DEFAULT_INTERVAL = 60.0
+MIN_INTERVAL = 15.0
+MAX_INTERVAL = 15 * 60.0
+
+# query server defaults, here so the CLI can show them without importing it
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# seconds a cached month / campground or permit stays fresh
+MONTH_TTL = 60.0
+METADATA_TTL = 6 * 60 * 60.0
+# longest a request may queue for upstream budget before it is shed
+MAX_WAIT = 2.0
+
+CACHE_DIR_ENV = "RECREATION_CACHE_DIR"
+
+
+def cache_dir() -> Path:
+    path = os.environ.get(CACHE_DIR_ENV)
+    if path:
+        return Path(path)
+    return Path.home() / ".cache" / "recreation"
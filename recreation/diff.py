@@ -0,0 +1,148 @@
+import datetime as dt
+import enum
+import json
+from dataclasses import dataclass
+from itertools import groupby
+from operator import attrgetter
+from typing import IO, Any, Iterable, Iterator, Optional, Sequence
+
+from .availability_list import CampgroundAvailability, CampgroundAvailabilityList
+from .rgapi.camp import CampsiteAvailabilityStatus
+
+OPEN_STATUSES = frozenset([CampsiteAvailabilityStatus.available])
+
+
+class DiffKind(str, enum.Enum):
+    opened = "opened"
+    closed = "closed"
+
+
+@dataclass
+class AvailabilityChange:
+    kind: DiffKind
+    id: str
+    date: dt.date
+    length: int
+    old_status: CampsiteAvailabilityStatus
+    new_status: CampsiteAvailabilityStatus
+
+    @property
+    def end_date(self) -> dt.date:
+        return self.date + dt.timedelta(days=self.length)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "kind": self.kind.value,
+            "id": self.id,
+            "date": self.date.isoformat(),
+            "end_date": self.end_date.isoformat(),
+            "length": self.length,
+            "old_status": self.old_status.value,
+            "new_status": self.new_status.value,
+        }
+
+
+SiteRuns = tuple[str, list[CampgroundAvailability]]
+
+
+def _site_runs(availability: Iterable[CampgroundAvailability]) -> Iterator[SiteRuns]:
+    for site_id, runs in groupby(availability, key=attrgetter("id")):
+        yield site_id, list(runs)
+
+
+def _diff_site(
+    site_id: str,
+    old_runs: list[CampgroundAvailability],
+    new_runs: list[CampgroundAvailability],
+    open_statuses: frozenset[CampsiteAvailabilityStatus],
+) -> Iterator[AvailabilityChange]:
+    pending: Optional[AvailabilityChange] = None
+    i = j = 0
+
+    while i < len(old_runs) and j < len(new_runs):
+        old, new = old_runs[i], new_runs[j]
+        start = max(old.date, new.date)
+        end = min(old.end_date, new.end_date)
+
+        was_open = old.status in open_statuses
+        is_open = new.status in open_statuses
+        if start < end and was_open != is_open:
+            kind = DiffKind.opened if is_open else DiffKind.closed
+            if (
+                pending is not None
+                and pending.end_date == start
+                and pending.kind == kind
+                and pending.old_status == old.status
+                and pending.new_status == new.status
+            ):
+                pending.length += (end - start).days
+            else:
+                if pending is not None:
+                    yield pending
+                pending = AvailabilityChange(
+                    kind=kind,
+                    id=site_id,
+                    date=start,
+                    length=(end - start).days,
+                    old_status=old.status,
+                    new_status=new.status,
+                )
+
+        if old.end_date <= new.end_date:
+            i += 1
+        else:
+            j += 1
+
+    if pending is not None:
+        yield pending
+
+
+def diff_availability(
+    old: CampgroundAvailabilityList,
+    new: CampgroundAvailabilityList,
+    open_statuses: Optional[Sequence[CampsiteAvailabilityStatus]] = None,
+) -> Iterator[AvailabilityChange]:
+    # Both lists are sorted by (id, date), as produced by from_campground and the
+    # filters, so sites and runs are merged in one pass. Only dates covered by
+    # both snapshots are compared.
+    statuses = frozenset(open_statuses) if open_statuses else OPEN_STATUSES
+
+    old_sites = _site_runs(old.availability)
+    new_sites = _site_runs(new.availability)
+    old_site = next(old_sites, None)
+    new_site = next(new_sites, None)
+
+    while old_site is not None and new_site is not None:
+        if old_site[0] < new_site[0]:
+            old_site = next(old_sites, None)
+        elif old_site[0] > new_site[0]:
+            new_site = next(new_sites, None)
+        else:
+            yield from _diff_site(old_site[0], old_site[1], new_site[1], statuses)
+            old_site = next(old_sites, None)
+            new_site = next(new_sites, None)
+
+
+def opened_availability(
+    old: CampgroundAvailabilityList,
+    new: CampgroundAvailabilityList,
+    open_statuses: Optional[Sequence[CampsiteAvailabilityStatus]] = None,
+) -> Iterator[AvailabilityChange]:
+    for change in diff_availability(old, new, open_statuses):
+        if change.kind == DiffKind.opened:
+            yield change
+
+
+def write_ndjson(
+    changes: Iterable[AvailabilityChange],
+    fp: IO[str],
+    extra: Optional[dict[str, Any]] = None,
+) -> int:
+    count = 0
+    for change in changes:
+        record = change.to_dict()
+        if extra:
+            record.update(extra)
+        fp.write(json.dumps(record) + "\n")
+        count += 1
+    return count
@@ -0,0 +1,198 @@
+import datetime as dt
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from os import PathLike
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, Sequence, Union, cast
+
+import apiclient.exceptions
+
+from .availability_list import PermitAvailabilityList
+from .catalog import CELL_DEGREES, FacilityCatalog, SpatialGrid
+from .core import PERMIT_IDS, POOL_NUM_WORKERS, cache_dir
+from .rgapi.client import RecreationGovClient
+from .rgapi.permit import RGApiPermit
+from .scanner import stream_permits
+
+ENTRY_POINTS_FILE = "entry_points.json"
+DIVISION = "division"
+ENTRANCE = "entrance"
+
+
+@dataclass
+class EntryPoint:
+    permit_id: str
+    permit_name: str
+    kind: str
+    id: str
+    name: str
+    latitude: float
+    longitude: float
+    code: str = ""
+    # the permit divisions whose availability covers this point
+    division_ids: list[str] = field(default_factory=list)
+
+
+def permit_entry_points(permit: RGApiPermit) -> list[EntryPoint]:
+    # divisions and entry entrances of a permit that have a location
+    points = []
+    for divis in permit.divisions.values():
+        if divis.latitude == 0 and divis.longitude == 0:
+            continue
+        points.append(
+            EntryPoint(
+                permit_id=permit.id,
+                permit_name=permit.name,
+                kind=DIVISION,
+                id=divis.id,
+                name=divis.name,
+                latitude=divis.latitude,
+                longitude=divis.longitude,
+                code=divis.code,
+                division_ids=[divis.id],
+            )
+        )
+    for entry in permit.entrance_list:
+        if not entry.is_entry or (entry.latitude == 0 and entry.longitude == 0):
+            continue
+        points.append(
+            EntryPoint(
+                permit_id=permit.id,
+                permit_name=permit.name,
+                kind=ENTRANCE,
+                id=entry.id,
+                name=entry.name,
+                latitude=entry.latitude,
+                longitude=entry.longitude,
+                division_ids=[d.id for d in permit.division_index.entrance(entry.id)],
+            )
+        )
+    return points
+
+
+def known_permit_ids(catalog: Optional[FacilityCatalog] = None) -> list[str]:
+    # PERMIT_IDS, plus every permit facility in the catalog
+    ids = list(PERMIT_IDS.values())
+    if catalog is not None:
+        ids += [f.facility_id for f in catalog.of_type("Permit")]
+    return list(dict.fromkeys(ids))
+
+
+class EntryPointIndex:
+    # Divisions and entrances across permits on a spatial grid, so a search
+    # near a point narrows the permits down before any availability is fetched.
+    def __init__(
+        self, points: Iterable[EntryPoint] = (), cell_degrees: float = CELL_DEGREES
+    ) -> None:
+        self.points: list[EntryPoint] = []
+        self._grid: SpatialGrid[int] = SpatialGrid(cell_degrees)
+        for point in points:
+            self.add(point)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def __iter__(self) -> Iterator[EntryPoint]:
+        return iter(self.points)
+
+    def add(self, point: EntryPoint) -> None:
+        self._grid.add(point.latitude, point.longitude, len(self.points))
+        self.points.append(point)
+
+    @property
+    def permit_ids(self) -> list[str]:
+        return list(dict.fromkeys(p.permit_id for p in self.points))
+
+    def near(
+        self,
+        latitude: float,
+        longitude: float,
+        radius_km: float,
+        kinds: Optional[Iterable[str]] = None,
+        limit: Optional[int] = None,
+    ) -> list[tuple[EntryPoint, float]]:
+        # entry points within radius_km, nearest first, with their distance
+        kind_set = set(kinds) if kinds else None
+        matches = [
+            (self.points[i], distance)
+            for i, distance in self._grid.near(latitude, longitude, radius_km)
+            if not kind_set or self.points[i].kind in kind_set
+        ]
+        matches.sort(key=lambda m: (m[1], m[0].permit_id, m[0].kind, m[0].id))
+        return matches[:limit] if limit else matches
+
+    @staticmethod
+    def fetch(
+        permit_ids: Sequence[str],
+        workers: int = POOL_NUM_WORKERS,
+        client: Optional[RecreationGovClient] = None,
+    ) -> tuple["EntryPointIndex", dict[str, str]]:
+        # Fetches the permits' content concurrently and indexes their entry
+        # points. Returns the index and an error message per permit that
+        # could not be fetched.
+        client = client or RecreationGovClient(pool_size=workers)
+        ids = list(dict.fromkeys(PERMIT_IDS.get(pid, pid) for pid in permit_ids))
+
+        index = EntryPointIndex()
+        errors: dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(client.get_permit, pid) for pid in ids]
+            for permit_id, future in zip(ids, futures):
+                try:
+                    permit = future.result()
+                except apiclient.exceptions.APIClientError as exc:
+                    errors[permit_id] = str(exc)
+                    continue
+                for point in permit_entry_points(permit):
+                    index.add(point)
+        return index, errors
+
+    @staticmethod
+    def load(path: Optional[Union[str, PathLike]] = None) -> "EntryPointIndex":
+        path = Path(path) if path else cache_dir() / ENTRY_POINTS_FILE
+        with open(path) as f:
+            return EntryPointIndex(EntryPoint(**row) for row in json.load(f))
+
+    def save(self, path: Optional[Union[str, PathLike]] = None) -> Path:
+        path = Path(path) if path else cache_dir() / ENTRY_POINTS_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump([asdict(point) for point in self], f)
+        return path
+
+
+@dataclass
+class EntryPointResult:
+    point: EntryPoint
+    distance: float
+    availability: PermitAvailabilityList = field(
+        default_factory=lambda: PermitAvailabilityList([])
+    )
+    error: Optional[str] = None
+
+
+def stream_entry_points(
+    matches: Sequence[tuple[EntryPoint, float]],
+    start_date: dt.date,
+    end_date: dt.date,
+    workers: int = POOL_NUM_WORKERS,
+    client: Optional[RecreationGovClient] = None,
+) -> Iterator[EntryPointResult]:
+    # Availability is fetched once per permit with a matching entry point,
+    # and each point gets its own divisions' share of it, a permit at a time
+    # as the permits complete.
+    by_permit: dict[str, list[tuple[EntryPoint, float]]] = {}
+    for point, distance in matches:
+        by_permit.setdefault(point.permit_id, []).append((point, distance))
+
+    for result in stream_permits(
+        list(by_permit), start_date, end_date, workers, client
+    ):
+        for point, distance in by_permit[result.permit_id]:
+            if result.error:
+                yield EntryPointResult(point, distance, error=result.error)
+                continue
+            avail = result.availability.filter_dates(start_date, end_date)
+            avail = avail.filter_id(point.division_ids)
+            yield EntryPointResult(point, distance, cast(PermitAvailabilityList, avail))
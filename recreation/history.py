@@ -0,0 +1,449 @@
+import datetime as dt
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from itertools import groupby
+from operator import attrgetter
+from pathlib import Path
+from typing import Iterable, Optional, Sequence, Union
+
+from .availability_list import (
+    AvailabilityList,
+    CampgroundAvailability,
+    CampgroundAvailabilityList,
+    PathLike,
+    PermitAvailability,
+    PermitAvailabilityList,
+)
+from .core import cache_dir
+from .rgapi.camp import CampsiteAvailabilityStatus
+
+HISTORY_FILE = "history.sqlite"
+
+KIND_CAMPGROUND = "campground"
+KIND_PERMIT = "permit"
+
+# Each row of `runs` is one run of identical days for a site, valid from the
+# poll that first saw it until the poll that replaced it (valid_to is NULL
+# while it is current). A poll only writes the runs that changed.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    source_id TEXT NOT NULL,
+    UNIQUE (kind, source_id)
+);
+CREATE TABLE IF NOT EXISTS polls (
+    id INTEGER PRIMARY KEY,
+    source INTEGER NOT NULL REFERENCES sources (id),
+    polled_at REAL NOT NULL,
+    last_polled_at REAL NOT NULL,
+    count INTEGER NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    changed INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS runs (
+    source INTEGER NOT NULL REFERENCES sources (id),
+    site_id TEXT NOT NULL,
+    start_date INTEGER NOT NULL,
+    end_date INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    valid_from INTEGER NOT NULL REFERENCES polls (id),
+    valid_to INTEGER REFERENCES polls (id)
+);
+CREATE INDEX IF NOT EXISTS runs_site_date ON runs (source, site_id, start_date);
+CREATE INDEX IF NOT EXISTS runs_current ON runs (source, valid_to, site_id);
+CREATE INDEX IF NOT EXISTS polls_source ON polls (source, last_polled_at);
+"""
+
+
+@dataclass(frozen=True)
+class Run:
+    site_id: str
+    start_date: int
+    end_date: int
+    value: str
+
+
+@dataclass
+class Poll:
+    id: int
+    polled_at: dt.datetime
+    last_polled_at: dt.datetime
+    count: int
+    start_date: dt.date
+    end_date: dt.date
+    changed: int
+
+
+@dataclass
+class RunVersion:
+    site_id: str
+    date: dt.date
+    end_date: dt.date
+    value: str
+    valid_from: dt.datetime
+    valid_to: Optional[dt.datetime]
+
+
+def _permit_value(avail: PermitAvailability) -> str:
+    return f"{avail.remaining}/{avail.total}/{int(avail.is_walkup)}"
+
+
+def _encode_runs(avail_list: AvailabilityList) -> tuple[str, list[Run]]:
+    if isinstance(avail_list, CampgroundAvailabilityList):
+        kind = KIND_CAMPGROUND
+        days = [
+            (a.id, a.date.toordinal(), a.length, a.status.value)
+            for a in avail_list.availability
+        ]
+    elif isinstance(avail_list, PermitAvailabilityList):
+        kind = KIND_PERMIT
+        days = [
+            (a.id, a.date.toordinal(), 1, _permit_value(a))
+            for a in avail_list.availability
+        ]
+    else:
+        raise TypeError(f"Can't record {avail_list.__class__.__name__}")
+
+    # merge adjacent days/runs with the same value, so unaggregated
+    # campground lists and per-day permit lists are stored run-length encoded
+    runs: list[Run] = []
+    for site_id, start, length, value in sorted(days):
+        last = runs[-1] if runs else None
+        if (
+            last is not None
+            and last.site_id == site_id
+            and last.end_date == start
+            and last.value == value
+        ):
+            runs[-1] = Run(site_id, last.start_date, start + length, value)
+        else:
+            runs.append(Run(site_id, start, start + length, value))
+    return kind, runs
+
+
+def _clip(runs: Iterable[Run], start: int, end: int) -> list[Run]:
+    return [
+        Run(r.site_id, max(r.start_date, start), min(r.end_date, end), r.value)
+        for r in runs
+        if r.start_date < end and start < r.end_date
+    ]
+
+
+def default_history_path() -> Path:
+    return cache_dir() / HISTORY_FILE
+
+
+class HistoryStore:
+    # Opens the database at path, the cache directory's by default. Unless
+    # create is set, a database that doesn't exist yet is FileNotFoundError.
+    def __init__(self, path: Optional[PathLike] = None, create: bool = True) -> None:
+        self.path = Path(path) if path is not None else default_history_path()
+        if not create and not self.path.exists():
+            raise FileNotFoundError(f"no history database at {self.path}")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "HistoryStore":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _source(self, kind: str, source_id: str, create: bool = False) -> Optional[int]:
+        row = self._conn.execute(
+            "SELECT id FROM sources WHERE kind = ? AND source_id = ?",
+            (kind, source_id),
+        ).fetchone()
+        if row is not None:
+            return row[0]
+        if not create:
+            return None
+        cur = self._conn.execute(
+            "INSERT INTO sources (kind, source_id) VALUES (?, ?)", (kind, source_id)
+        )
+        return cur.lastrowid
+
+    def record(
+        self,
+        source_id: str,
+        avail_list: AvailabilityList,
+        polled_at: Optional[dt.datetime] = None,
+    ) -> int:
+        kind, new_runs = _encode_runs(avail_list)
+        timestamp = polled_at.timestamp() if polled_at else time.time()
+
+        if new_runs:
+            window_start = min(r.start_date for r in new_runs)
+            window_end = max(r.end_date for r in new_runs)
+        else:
+            window_start = window_end = 0
+
+        with self._lock, self._conn:
+            source = self._source(kind, str(source_id), create=True)
+
+            current = self._conn.execute(
+                "SELECT rowid, site_id, start_date, end_date, value FROM runs"
+                " WHERE source = ? AND valid_to IS NULL"
+                " AND start_date < ? AND end_date > ?"
+                " ORDER BY site_id, start_date",
+                (source, window_end, window_start),
+            ).fetchall()
+            current_by_site = {
+                site_id: list(rows)
+                for site_id, rows in groupby(current, key=lambda row: row[1])
+            }
+            new_by_site = {
+                site_id: list(runs)
+                for site_id, runs in groupby(new_runs, key=attrgetter("site_id"))
+            }
+
+            closed: list[int] = []
+            inserted: list[Run] = []
+            for site_id in sorted(set(current_by_site) | set(new_by_site)):
+                old_rows = current_by_site.get(site_id, [])
+                old_runs = [Run(*row[1:]) for row in old_rows]
+                site_new = new_by_site.get(site_id, [])
+                if _clip(old_runs, window_start, window_end) == site_new:
+                    continue
+
+                for row, run in zip(old_rows, old_runs):
+                    closed.append(row[0])
+                    # the parts of replaced runs outside this poll's window
+                    # are still current
+                    if run.start_date < window_start:
+                        inserted.append(
+                            Run(site_id, run.start_date, window_start, run.value)
+                        )
+                    if run.end_date > window_end:
+                        inserted.append(
+                            Run(site_id, window_end, run.end_date, run.value)
+                        )
+                inserted += site_new
+
+            # polls that saw nothing new extend the previous poll's row instead
+            # of adding one, so storage grows with changes rather than polls
+            last = self._conn.execute(
+                "SELECT id, start_date, end_date FROM polls WHERE source = ?"
+                " ORDER BY id DESC LIMIT 1",
+                (source,),
+            ).fetchone()
+            if (
+                not closed
+                and not inserted
+                and last is not None
+                and (last[1], last[2]) == (window_start, window_end)
+            ):
+                self._conn.execute(
+                    "UPDATE polls SET last_polled_at = ?, count = count + 1"
+                    " WHERE id = ?",
+                    (timestamp, last[0]),
+                )
+                return last[0]
+
+            cur = self._conn.execute(
+                "INSERT INTO polls (source, polled_at, last_polled_at, count,"
+                " start_date, end_date, changed) VALUES (?, ?, ?, 1, ?, ?, ?)",
+                (source, timestamp, timestamp, window_start, window_end, len(inserted)),
+            )
+            poll_id = cur.lastrowid
+
+            self._conn.executemany(
+                "UPDATE runs SET valid_to = ? WHERE rowid = ?",
+                [(poll_id, rowid) for rowid in closed],
+            )
+            self._conn.executemany(
+                "INSERT INTO runs (source, site_id, start_date, end_date, value,"
+                " valid_from) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (source, r.site_id, r.start_date, r.end_date, r.value, poll_id)
+                    for r in inserted
+                ],
+            )
+        return poll_id
+
+    def polls(
+        self,
+        kind: str,
+        source_id: str,
+        since: Optional[dt.datetime] = None,
+    ) -> list[Poll]:
+        with self._lock:
+            source = self._source(kind, str(source_id))
+            if source is None:
+                return []
+            rows = self._conn.execute(
+                "SELECT id, polled_at, last_polled_at, count, start_date, end_date,"
+                " changed FROM polls WHERE source = ? AND last_polled_at >= ?"
+                " ORDER BY polled_at",
+                (source, since.timestamp() if since else 0),
+            ).fetchall()
+        return [
+            Poll(
+                id=poll_id,
+                polled_at=dt.datetime.fromtimestamp(polled_at, dt.timezone.utc),
+                last_polled_at=dt.datetime.fromtimestamp(last, dt.timezone.utc),
+                count=count,
+                start_date=dt.date.fromordinal(max(start, 1)),
+                end_date=dt.date.fromordinal(max(end, 1)),
+                changed=changed,
+            )
+            for poll_id, polled_at, last, count, start, end, changed in rows
+        ]
+
+    def sources(self, kind: Optional[str] = None) -> list[tuple[str, str]]:
+        query = "SELECT kind, source_id FROM sources"
+        params: tuple = ()
+        if kind:
+            query += " WHERE kind = ?"
+            params = (kind,)
+        with self._lock:
+            return [tuple(row) for row in self._conn.execute(query, params)]
+
+    def _query_runs(
+        self,
+        kind: str,
+        source_id: str,
+        start_date: Optional[dt.date],
+        end_date: Optional[dt.date],
+        site_ids: Optional[Sequence[str]],
+        extra_where: str,
+        extra_params: tuple,
+        columns: str,
+    ) -> list[tuple]:
+        source = self._source(kind, str(source_id))
+        if source is None:
+            return []
+
+        where = ["runs.source = ?"]
+        params: list = [source]
+        if start_date:
+            where.append("runs.end_date > ?")
+            params.append(start_date.toordinal())
+        if end_date:
+            where.append("runs.start_date <= ?")
+            params.append(end_date.toordinal())
+        if site_ids:
+            where.append(f"runs.site_id IN ({', '.join('?' * len(site_ids))})")
+            params += [str(s) for s in site_ids]
+        where.append(extra_where)
+        params += extra_params
+
+        return self._conn.execute(
+            f"SELECT {columns} FROM runs WHERE {' AND '.join(where)}"
+            " ORDER BY runs.site_id, runs.start_date",
+            params,
+        ).fetchall()
+
+    def snapshot(
+        self,
+        kind: str,
+        source_id: str,
+        at: Optional[dt.datetime] = None,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+        site_ids: Optional[Sequence[str]] = None,
+    ) -> Union[CampgroundAvailabilityList, PermitAvailabilityList]:
+        with self._lock:
+            if at is None:
+                where = "runs.valid_to IS NULL"
+                params: tuple = ()
+            else:
+                where = (
+                    "runs.valid_from IN (SELECT id FROM polls WHERE polled_at <= ?)"
+                    " AND (runs.valid_to IS NULL OR runs.valid_to IN"
+                    " (SELECT id FROM polls WHERE polled_at > ?))"
+                )
+                params = (at.timestamp(), at.timestamp())
+            rows = self._query_runs(
+                kind,
+                source_id,
+                start_date,
+                end_date,
+                site_ids,
+                where,
+                params,
+                "runs.site_id, runs.start_date, runs.end_date, runs.value",
+            )
+
+        if kind == KIND_CAMPGROUND:
+            statuses = {s.value: s for s in CampsiteAvailabilityStatus}
+            return CampgroundAvailabilityList(
+                [
+                    CampgroundAvailability(
+                        id=site_id,
+                        date=dt.date.fromordinal(start),
+                        status=statuses[value],
+                        length=end - start,
+                    )
+                    for site_id, start, end, value in rows
+                ]
+            )
+
+        availability: list[PermitAvailability] = []
+        for site_id, start, end, value in rows:
+            remaining, total, is_walkup = value.split("/")
+            for day in range(start, end):
+                availability.append(
+                    PermitAvailability(
+                        id=site_id,
+                        date=dt.date.fromordinal(day),
+                        remaining=int(remaining),
+                        total=int(total),
+                        is_walkup=is_walkup == "1",
+                    )
+                )
+        return PermitAvailabilityList(availability)
+
+    def history(
+        self,
+        kind: str,
+        source_id: str,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+        site_ids: Optional[Sequence[str]] = None,
+    ) -> list[RunVersion]:
+        # every version of every run overlapping the date range, oldest first
+        with self._lock:
+            rows = self._query_runs(
+                kind,
+                source_id,
+                start_date,
+                end_date,
+                site_ids,
+                "1",
+                (),
+                "runs.site_id, runs.start_date, runs.end_date, runs.value,"
+                " (SELECT polled_at FROM polls WHERE id = runs.valid_from),"
+                " (SELECT polled_at FROM polls WHERE id = runs.valid_to)",
+            )
+
+        def from_ts(ts: Optional[float]) -> Optional[dt.datetime]:
+            if ts is None:
+                return None
+            return dt.datetime.fromtimestamp(ts, dt.timezone.utc)
+
+        versions = [
+            RunVersion(
+                site_id=site_id,
+                date=dt.date.fromordinal(start),
+                end_date=dt.date.fromordinal(end),
+                value=value,
+                valid_from=dt.datetime.fromtimestamp(valid_from, dt.timezone.utc),
+                valid_to=from_ts(valid_to),
+            )
+            for site_id, start, end, value, valid_from, valid_to in rows
+        ]
+        versions.sort(key=attrgetter("site_id", "valid_from", "date"))
+        return versions
@@ -1,11 +1,14 @@
 import datetime as dt
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, cast
+
+from pydantic import BaseModel
 
 from .availability_list import (
     CampgroundAvailabilityList,
     PermitAvailabilityList,
 )
-from .core import IntOrStr
+from .core import PERMIT_IDS, IntOrStr
 from .rgapi.camp import (
     RGApiCampground,
     RGApiCampsite,
@@ -13,22 +16,20 @@ from .rgapi.camp import (
 from .rgapi.client import RecreationGovClient
 from .rgapi.extra import LocationType, RGApiAlert, RGApiRatingAggregate
 from .rgapi.permit import (
+    PermitDivisionIndex,
     RGApiPermit,
     RgApiPermitDivision,
     RgApiPermitEntrance,
 )
+from .tracing import span, traced_task
 
 POOL_NUM_WORKERS = 16
 
-PERMIT_IDS = {
-    "desolation": "233261",
-    "humboldt": "445856",
-    "yosemite": "445859",
-    "inyo": "233262",
-    "sierra": "445858",
-    "seki": "445857",
-    "whitney": "233260",
-}
+
+def _bind(obj: Any, model: BaseModel) -> None:
+    # Copies the model's fields onto the wrapper, so reading them is a plain
+    # instance attribute lookup rather than a __getattr__ call per access.
+    obj.__dict__.update(model.__dict__)
 
 
 class Campsite:
@@ -36,6 +37,7 @@ class Campsite:
 
     def __init__(self, api_campsite: RGApiCampsite) -> None:
         self.api_campsite = api_campsite
+        _bind(self, api_campsite)
 
     @staticmethod
     def fetch(campsite_id: IntOrStr, fetch_all: bool = False) -> "Campsite":
@@ -43,11 +45,6 @@ class Campsite:
         campsite = client.get_campsite(campsite_id)
         return Campsite(campsite)
 
-    def __getattr__(self, attr: str) -> Any:
-        if attr not in self.api_campsite.__fields__:
-            raise AttributeError
-        return self.api_campsite.__getattribute__(attr)
-
     @property
     def url(self) -> str:
         return f"https://www.recreation.gov/camping/campsites/{self.id}"
@@ -56,53 +53,140 @@ class Campsite:
 class Campground:
     api_campground: RGApiCampground
 
-    campsites: dict[str, Campsite] = {}
-    alerts: list[RGApiAlert] = []
-    ratings: RGApiRatingAggregate
-
-    def __init__(self, api_camgground: RGApiCampground):
+    def __init__(
+        self,
+        api_camgground: RGApiCampground,
+        client: Optional[RecreationGovClient] = None,
+    ):
         self.api_campground = api_camgground
+        self.client = client
+        # loaded on first access unless fetched or assigned before then
+        self._campsites: Optional[dict[str, Campsite]] = None
+        self._alerts: Optional[list[RGApiAlert]] = None
+        self._ratings: Optional[RGApiRatingAggregate] = None
+        _bind(self, api_camgground)
 
     @staticmethod
-    def fetch(campground_id: IntOrStr, fetch_all: bool = False) -> "Campground":
-        client = RecreationGovClient()
-        campground = client.get_campground(campground_id)
-        camp = Campground(campground)
-
-        if fetch_all:
-            camp.fetch_campsites()
-            camp.fetch_alerts()
-            camp.fetch_ratings()
-
+    def fetch(
+        campground_id: IntOrStr,
+        fetch_all: bool = False,
+        client: Optional[RecreationGovClient] = None,
+    ) -> "Campground":
+        if not fetch_all:
+            client = client or RecreationGovClient()
+            return Campground(client.get_campground(campground_id), client)
+
+        camp, _ = Campground._fetch_all(campground_id, client=client)
         return camp
 
-    def __getattr__(self, attr: str) -> Any:
-        if attr not in self.api_campground.__fields__:
-            raise AttributeError
-        return self.api_campground.__getattribute__(attr)
+    @staticmethod
+    def fetch_with_availability(
+        campground_id: IntOrStr,
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+        aggregate: bool = True,
+    ) -> tuple["Campground", CampgroundAvailabilityList]:
+        camp, availability = Campground._fetch_all(
+            campground_id, start_date, end_date, aggregate
+        )
+        return camp, cast(CampgroundAvailabilityList, availability)
+
+    @staticmethod
+    def _fetch_all(
+        campground_id: IntOrStr,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+        aggregate: bool = True,
+        client: Optional[RecreationGovClient] = None,
+    ) -> tuple["Campground", Optional[CampgroundAvailabilityList]]:
+        # The id is all every call needs, so the campground, its campsites,
+        # alerts, ratings and (given a start date) availability months are
+        # all fetched at once instead of one after another.
+        client = client or RecreationGovClient()
+        fetch = span("Campground.fetch", {"campground_id": str(campground_id)})
+        with fetch, ThreadPoolExecutor(max_workers=5) as executor:
+            campground = executor.submit(
+                traced_task("fetch campground", client.get_campground), campground_id
+            )
+            sites = executor.submit(
+                traced_task("fetch campsites", client.get_campground_sites),
+                campground_id,
+            )
+            alerts = executor.submit(
+                traced_task("fetch alerts", client.get_alerts),
+                campground_id,
+                LocationType.campground,
+            )
+            ratings = executor.submit(
+                traced_task("fetch ratings", client.get_ratings),
+                campground_id,
+                LocationType.campground,
+            )
+            availability = None
+            if start_date is not None:
+                availability = executor.submit(
+                    traced_task(
+                        "fetch availability",
+                        CampgroundAvailabilityList.fetch_availability,
+                    ),
+                    str(campground_id),
+                    start_date,
+                    end_date,
+                    aggregate,
+                    client=client,
+                )
+
+            camp = Campground(campground.result(), client)
+            camp.campsites = {site.id: Campsite(site) for site in sites.result()}
+            camp.alerts = alerts.result()
+            camp.ratings = ratings.result()
+            return camp, availability.result() if availability else None
 
     @property
     def url(self) -> str:
         return f"https://www.recreation.gov/camping/campgrounds/{self.id}"
 
+    @property
+    def campsites(self) -> dict[str, Campsite]:
+        if self._campsites is None:
+            self.fetch_campsites()
+        return cast(dict[str, Campsite], self._campsites)
+
+    @campsites.setter
+    def campsites(self, campsites: dict[str, Campsite]) -> None:
+        self._campsites = campsites
+
+    @property
+    def alerts(self) -> list[RGApiAlert]:
+        if self._alerts is None:
+            self.fetch_alerts()
+        return cast(list[RGApiAlert], self._alerts)
+
+    @alerts.setter
+    def alerts(self, alerts: list[RGApiAlert]) -> None:
+        self._alerts = alerts
+
+    @property
+    def ratings(self) -> RGApiRatingAggregate:
+        if self._ratings is None:
+            self.fetch_ratings()
+        return cast(RGApiRatingAggregate, self._ratings)
+
+    @ratings.setter
+    def ratings(self, ratings: RGApiRatingAggregate) -> None:
+        self._ratings = ratings
+
     def fetch_campsites(self) -> None:
-        # with ThreadPoolExecutor(max_workers=POOL_NUM_WORKERS) as executor:
-        #     self.campsites = {
-        #         site.id: site
-        #         for site in executor.map(Campsite.fetch, self.campsite_ids)
-        #     }
-        client = RecreationGovClient()
+        client = self.client or RecreationGovClient()
         sites = client.get_campground_sites(self.id)
-        # if self.campsite_ids is None:
-        #     self.campsite_ids = [site.id for site in sites]
         self.campsites = {site.id: Campsite(site) for site in sites}
 
     def fetch_alerts(self) -> None:
-        client = RecreationGovClient()
+        client = self.client or RecreationGovClient()
         self.alerts = client.get_alerts(self.id, LocationType.campground)
 
     def fetch_ratings(self) -> None:
-        client = RecreationGovClient()
+        client = self.client or RecreationGovClient()
         self.ratings = client.get_ratings(self.id, LocationType.campground)
 
     def fetch_availability(
@@ -117,6 +201,7 @@ class Campground:
             start_date=start_date,
             end_date=end_date,
             aggregate=aggregate,
+            client=self.client,
         )
 
 
@@ -124,62 +209,146 @@ class Permit:
     api_permit: RGApiPermit
 
     entrances: dict[str, RgApiPermitEntrance]
-    alerts: list[RGApiAlert] = []
-    ratings: RGApiRatingAggregate
+    division_index: PermitDivisionIndex
 
-    def __init__(self, api_permit: RGApiPermit):
+    def __init__(
+        self, api_permit: RGApiPermit, client: Optional[RecreationGovClient] = None
+    ):
         self.api_permit = api_permit
+        self.client = client
+        self._alerts: Optional[list[RGApiAlert]] = None
+        self._ratings: Optional[RGApiRatingAggregate] = None
+        _bind(self, api_permit)
 
-        self.entrances = {entry.id: entry for entry in self.api_permit.entrance_list}
+        self.entrances = api_permit.entrances
+        self.division_index = api_permit.division_index
 
     @staticmethod
-    def fetch(permit_id: IntOrStr, fetch_all: bool = False) -> "Permit":
-        client = RecreationGovClient()
-        if permit_id in PERMIT_IDS:
-            permit_id = PERMIT_IDS[permit_id]
-        permit = client.get_permit(permit_id)
+    def fetch(
+        permit_id: IntOrStr,
+        fetch_all: bool = False,
+        client: Optional[RecreationGovClient] = None,
+    ) -> "Permit":
+        if not fetch_all:
+            client = client or RecreationGovClient()
+            if permit_id in PERMIT_IDS:
+                permit_id = PERMIT_IDS[permit_id]
+            return Permit(client.get_permit(permit_id), client)
+
+        perm, _ = Permit._fetch_all(permit_id, client=client)
+        return perm
 
-        perm = Permit(permit)
+    @staticmethod
+    def fetch_with_availability(
+        permit_id: IntOrStr,
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+    ) -> tuple["Permit", PermitAvailabilityList]:
+        perm, availability = Permit._fetch_all(permit_id, start_date, end_date)
+        return perm, cast(PermitAvailabilityList, availability)
 
-        if fetch_all:
-            perm.fetch_alerts()
-            perm.fetch_ratings()
+    @staticmethod
+    def _fetch_all(
+        permit_id: IntOrStr,
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+        client: Optional[RecreationGovClient] = None,
+    ) -> tuple["Permit", Optional[PermitAvailabilityList]]:
+        # same fan out as Campground._fetch_all
+        if permit_id in PERMIT_IDS:
+            permit_id = PERMIT_IDS[permit_id]
 
-        return perm
+        client = client or RecreationGovClient()
+        fetch = span("Permit.fetch", {"permit_id": str(permit_id)})
+        with fetch, ThreadPoolExecutor(max_workers=4) as executor:
+            permit = executor.submit(
+                traced_task("fetch permit", client.get_permit), permit_id
+            )
+            alerts = executor.submit(
+                traced_task("fetch alerts", client.get_alerts),
+                permit_id,
+                LocationType.permit,
+            )
+            ratings = executor.submit(
+                traced_task("fetch ratings", client.get_ratings),
+                permit_id,
+                LocationType.permit,
+            )
+            availability = None
+            if start_date is not None:
+                availability = executor.submit(
+                    traced_task(
+                        "fetch availability", PermitAvailabilityList.fetch_availability
+                    ),
+                    str(permit_id),
+                    start_date,
+                    end_date,
+                    client=client,
+                )
+
+            perm = Permit(permit.result(), client)
+            perm.alerts = alerts.result()
+            perm.ratings = ratings.result()
+            return perm, availability.result() if availability else None
 
     @staticmethod
     def known_permits():
         return sorted(PERMIT_IDS.keys())
 
-    def __getattr__(self, attr: str) -> Any:
-        if attr not in self.api_permit.__fields__:
-            raise AttributeError
-        return self.api_permit.__getattribute__(attr)
-
     @property
     def url(self) -> str:
         return f"https://www.recreation.gov/permits/{self.id}"
 
-    def division_for_code(self, code: str) -> RgApiPermitDivision:
-        for divis in self.divisions.values():
-            if divis.code == code:
-                return divis
-
-        raise IndexError(f"Division with {code} not found")
+    @property
+    def alerts(self) -> list[RGApiAlert]:
+        if self._alerts is None:
+            self.fetch_alerts()
+        return cast(list[RGApiAlert], self._alerts)
 
-    def division_for_name(self, name: str) -> RgApiPermitDivision:
-        for divis in self.divisions.values():
-            if divis.name == name:
-                return divis
+    @alerts.setter
+    def alerts(self, alerts: list[RGApiAlert]) -> None:
+        self._alerts = alerts
 
-        raise IndexError(f"Division with {name} not found")
+    @property
+    def ratings(self) -> RGApiRatingAggregate:
+        if self._ratings is None:
+            self.fetch_ratings()
+        return cast(RGApiRatingAggregate, self._ratings)
+
+    @ratings.setter
+    def ratings(self, ratings: RGApiRatingAggregate) -> None:
+        self._ratings = ratings
+
+    def division_for_code(
+        self, code: str, ignore_case: bool = False
+    ) -> RgApiPermitDivision:
+        divis = self.division_index.code(code, ignore_case)
+        if divis is None:
+            raise IndexError(f"Division with {code} not found")
+        return divis
+
+    def division_for_name(
+        self, name: str, ignore_case: bool = False
+    ) -> RgApiPermitDivision:
+        divis = self.division_index.name(name, ignore_case)
+        if divis is None:
+            raise IndexError(f"Division with {name} not found")
+        return divis
+
+    def divisions_for_codes(
+        self, codes: Iterable[str], ignore_case: bool = False
+    ) -> list[RgApiPermitDivision]:
+        return self.division_index.codes(codes, ignore_case)
+
+    def divisions_for_entrance(self, entrance_id: str) -> list[RgApiPermitDivision]:
+        return self.division_index.entrance(entrance_id)
 
     def fetch_alerts(self) -> None:
-        client = RecreationGovClient()
+        client = self.client or RecreationGovClient()
         self.alerts = client.get_alerts(self.id, LocationType.permit)
 
     def fetch_ratings(self) -> None:
-        client = RecreationGovClient()
+        client = self.client or RecreationGovClient()
         self.ratings = client.get_ratings(self.id, LocationType.permit)
 
     def fetch_availability(
@@ -187,5 +356,8 @@ class Permit:
     ) -> PermitAvailabilityList:
         # Adjust to call the static method from PermitAvailabilityList
         return PermitAvailabilityList.fetch_availability(
-            permit_id=self.id, start_date=start_date, end_date=end_date
+            permit_id=self.id,
+            start_date=start_date,
+            end_date=end_date,
+            client=self.client,
         )
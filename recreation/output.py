@@ -0,0 +1,64 @@
+import csv
+import datetime as dt
+import json
+from enum import Enum
+from typing import IO, Any, Optional, Sequence
+
+
+class OutputFormat(str, Enum):
+    table = "table"
+    ndjson = "ndjson"
+    csv = "csv"
+    json = "json"
+
+
+def _jsonable(value: Any) -> Any:
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+class RowWriter:
+    # Writes each row as soon as it is given, so output can be consumed
+    # incrementally with constant memory. JSON output is a single array whose
+    # brackets are written up front and on close.
+    def __init__(
+        self, fp: IO[str], output_format: OutputFormat, fields: Sequence[str]
+    ) -> None:
+        if output_format == OutputFormat.table:
+            raise ValueError("RowWriter does not render tables")
+        self.fp = fp
+        self.output_format = output_format
+        self.fields = list(fields)
+        self.count = 0
+        self._csv: Optional[Any] = None
+
+        if output_format == OutputFormat.csv:
+            self._csv = csv.DictWriter(fp, fieldnames=self.fields)
+            self._csv.writeheader()
+        elif output_format == OutputFormat.json:
+            fp.write("[")
+
+    def write(self, row: dict[str, Any]) -> None:
+        row = {key: _jsonable(row[key]) for key in self.fields}
+        if self._csv is not None:
+            self._csv.writerow(row)
+        elif self.output_format == OutputFormat.ndjson:
+            self.fp.write(json.dumps(row) + "\n")
+        else:
+            self.fp.write(("," if self.count else "") + "\n" + json.dumps(row))
+        self.count += 1
+        self.fp.flush()
+
+    def close(self) -> None:
+        if self.output_format == OutputFormat.json:
+            self.fp.write("\n]\n" if self.count else "]\n")
+        self.fp.flush()
+
+    def __enter__(self) -> "RowWriter":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -0,0 +1,92 @@
+import enum
+import json
+import threading
+from pathlib import Path
+from typing import Optional
+
+from .core import PERMIT_IDS, IntOrStr, cache_dir
+
+PERMIT_FAMILY_FILE = "permit_families.json"
+
+
+class PermitApiFamily(str, enum.Enum):
+    # permits/{id}/availability/month
+    standard = "standard"
+    # permitinyo/{id}/availability
+    inyo = "inyo"
+
+    @property
+    def other(self) -> "PermitApiFamily":
+        if self == PermitApiFamily.standard:
+            return PermitApiFamily.inyo
+        return PermitApiFamily.standard
+
+
+SEED_PERMIT_FAMILIES: dict[str, PermitApiFamily] = {
+    PERMIT_IDS["desolation"]: PermitApiFamily.standard,
+    PERMIT_IDS["humboldt"]: PermitApiFamily.inyo,
+    PERMIT_IDS["yosemite"]: PermitApiFamily.inyo,
+    PERMIT_IDS["inyo"]: PermitApiFamily.inyo,
+    PERMIT_IDS["sierra"]: PermitApiFamily.inyo,
+    PERMIT_IDS["seki"]: PermitApiFamily.inyo,
+    PERMIT_IDS["whitney"]: PermitApiFamily.inyo,
+}
+
+
+class PermitFamilyMap:
+    path: Optional[Path]
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._families: dict[str, PermitApiFamily] = dict(SEED_PERMIT_FAMILIES)
+        self._load()
+
+    def _load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            return
+        for permit_id, family in data.items():
+            try:
+                self._families[str(permit_id)] = PermitApiFamily(family)
+            except ValueError:
+                continue
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        data = {pid: family.value for pid, family in sorted(self._families.items())}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(data, indent=2))
+            tmp_path.replace(self.path)
+        except OSError:
+            # the map is only an optimization, a read-only cache dir is fine
+            pass
+
+    def get(self, permit_id: IntOrStr) -> Optional[PermitApiFamily]:
+        with self._lock:
+            return self._families.get(str(permit_id))
+
+    def set(self, permit_id: IntOrStr, family: PermitApiFamily) -> None:
+        with self._lock:
+            if self._families.get(str(permit_id)) == family:
+                return
+            self._families[str(permit_id)] = family
+            self._save()
+
+
+_default_map: Optional[PermitFamilyMap] = None
+_default_map_lock = threading.Lock()
+
+
+def default_permit_families() -> PermitFamilyMap:
+    global _default_map
+    with _default_map_lock:
+        if _default_map is None:
+            _default_map = PermitFamilyMap(cache_dir() / PERMIT_FAMILY_FILE)
+        return _default_map
@@ -0,0 +1,75 @@
+import datetime as dt
+import sys
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Union
+
+from .availability_list import _months_between
+
+# every campground needs its metadata and its campsites on top of the months
+METADATA_REQUESTS = 2
+
+
+@dataclass
+class CampgroundQuery:
+    campground_id: str
+    start_date: dt.date
+    end_date: dt.date
+
+
+@dataclass
+class FetchPlan:
+    queries: list[CampgroundQuery] = field(default_factory=list)
+    # campground id -> sorted months to fetch, in first-seen campground order
+    months: dict[str, list[dt.date]] = field(default_factory=dict)
+
+    @property
+    def campground_ids(self) -> list[str]:
+        return list(self.months)
+
+    @property
+    def planned_requests(self) -> int:
+        return sum(METADATA_REQUESTS + len(m) for m in self.months.values())
+
+    @property
+    def naive_requests(self) -> int:
+        # one fetch per query, with nothing shared between queries
+        return sum(
+            METADATA_REQUESTS + len(_months_between(q.start_date, q.end_date))
+            for q in self.queries
+        )
+
+
+def plan_fetches(queries: Iterable[CampgroundQuery]) -> FetchPlan:
+    plan = FetchPlan()
+    months: dict[str, set[dt.date]] = {}
+    for query in queries:
+        plan.queries.append(query)
+        months.setdefault(query.campground_id, set()).update(
+            _months_between(query.start_date, query.end_date)
+        )
+    plan.months = {camp_id: sorted(m) for camp_id, m in months.items()}
+    return plan
+
+
+def read_id_files(paths: Iterable[Union[str, Path]]) -> list[str]:
+    # one id per line, the first field of the line; blank lines and `#`
+    # comments are skipped, duplicates kept. `-` reads stdin, so the output of
+    # `campground near` can be piped in
+    ids: list[str] = []
+    for path in paths:
+        if str(path) == "-":
+            ids += _read_ids(sys.stdin)
+            continue
+        with open(path) as f:
+            ids += _read_ids(f)
+    return ids
+
+
+def _read_ids(lines: Iterable[str]) -> list[str]:
+    ids = []
+    for line in lines:
+        fields = line.split("#", 1)[0].split()
+        if fields:
+            ids.append(fields[0])
+    return ids
@@ -0,0 +1,199 @@
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Optional, TypeVar
+
+# pipeline stages, in the order a query goes through them
+RATE_LIMIT = "rate limit wait"
+HTTP_FETCH = "http fetch"
+JSON_DECODE = "json decode"
+VALIDATION = "validation"
+FLATTEN = "flatten"
+AGGREGATE = "aggregate"
+FILTER = "filter"
+RENDER = "render"
+STAGES = [
+    RATE_LIMIT,
+    HTTP_FETCH,
+    JSON_DECODE,
+    VALIDATION,
+    FLATTEN,
+    AGGREGATE,
+    FILTER,
+    RENDER,
+]
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@dataclass
+class StageTiming:
+    name: str
+    elapsed: float
+    # elapsed less the time spent in stages nested inside this one
+    self_elapsed: float
+
+
+StageHook = Callable[[StageTiming], None]
+
+_hooks: list[StageHook] = []
+_local = threading.local()
+
+
+def add_stage_hook(hook: StageHook) -> None:
+    _hooks.append(hook)
+
+
+def remove_stage_hook(hook: StageHook) -> None:
+    _hooks.remove(hook)
+
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(0.0)
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.started
+        stack = _local.stack
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        timing = StageTiming(self.name, elapsed, elapsed - nested)
+        for hook in list(_hooks):
+            hook(timing)
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        pass
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_no_stage = _NoStage()
+
+
+def stage(name: str) -> Any:
+    # Times the block as a pipeline stage when a hook is installed, and is
+    # a shared no-op otherwise.
+    return _Stage(name) if _hooks else _no_stage
+
+
+def timed_stage(name: str) -> Callable[[F], F]:
+    def decorator(func: F) -> F:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _hooks:
+                return func(*args, **kwargs)
+            with _Stage(name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
+
+@dataclass
+class StageTotal:
+    name: str
+    calls: int = 0
+    elapsed: float = 0.0
+    self_elapsed: float = 0.0
+
+
+@dataclass
+class StageProfile:
+    # A stage hook that totals each stage. Stages run in worker threads
+    # overlap, so their totals can add up to more than the wall clock.
+    totals: dict[str, StageTotal] = field(default_factory=dict)
+    started: float = field(default_factory=time.perf_counter)
+    stopped: Optional[float] = None
+
+    def __post_init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def __call__(self, timing: StageTiming) -> None:
+        with self._lock:
+            total = self.totals.get(timing.name)
+            if total is None:
+                total = self.totals[timing.name] = StageTotal(timing.name)
+            total.calls += 1
+            total.elapsed += timing.elapsed
+            total.self_elapsed += timing.self_elapsed
+
+    def __enter__(self) -> "StageProfile":
+        self.started = time.perf_counter()
+        add_stage_hook(self)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        remove_stage_hook(self)
+        self.stopped = time.perf_counter()
+
+    @property
+    def wall(self) -> float:
+        return (self.stopped or time.perf_counter()) - self.started
+
+    def stages(self) -> list[StageTotal]:
+        # known stages in pipeline order, then any others by name
+        order = {name: i for i, name in enumerate(STAGES)}
+        return sorted(
+            self.totals.values(), key=lambda t: (order.get(t.name, len(order)), t.name)
+        )
+
+
+# From 3.12 cProfile runs on sys.monitoring, which is interpreter wide: one
+# profile already sees every thread, and enabling a second one fails.
+PROFILE_PER_THREAD = sys.version_info < (3, 12)
+
+
+class ThreadProfiler:
+    # cProfile of the calling thread and of every thread started while it
+    # runs, such as the fetch executors' workers, merged into one dump.
+    def __init__(self) -> None:
+        import cProfile
+
+        self._new_profile = cProfile.Profile
+        self._profiles: list[Any] = []
+        self._lock = threading.Lock()
+
+    def _profile_thread(self, *args: Any) -> None:
+        sys.setprofile(None)
+        profile = self._new_profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self) -> None:
+        if PROFILE_PER_THREAD:
+            threading.setprofile(self._profile_thread)
+        self._profile_thread()
+
+    def stop(self) -> None:
+        if PROFILE_PER_THREAD:
+            threading.setprofile(None)  # type: ignore
+        self._profiles[0].disable()
+
+    def dump(self, path: str) -> None:
+        import pstats
+
+        with self._lock:
+            profiles = list(self._profiles)
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        stats.dump_stats(path)
@@ -0,0 +1,75 @@
+import threading
+import time
+from typing import Any, Callable, Optional
+
+DEFAULT_RATE = 10.0
+DEFAULT_BURST = 10
+
+
+class RateLimiter:
+    # Token bucket. With shared=True the bucket lives in shared memory so one
+    # budget can be handed to worker processes via a pool initializer; the
+    # monotonic clock is system-wide so every process agrees on elapsed time.
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        shared: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+
+        self._state: Any
+        if shared:
+            import multiprocessing
+
+            self._state = multiprocessing.Array("d", [float(burst), clock()])
+            self._lock = self._state.get_lock()
+        else:
+            self._state = [float(burst), clock()]
+            self._lock = threading.Lock()
+
+    def _take(self) -> float:
+        with self._lock:
+            now = self.clock()
+            tokens = min(
+                self.burst, self._state[0] + (now - self._state[1]) * self.rate
+            )
+            self._state[1] = now
+            if tokens >= 1:
+                self._state[0] = tokens - 1
+                return 0.0
+            self._state[0] = tokens
+            return (1 - tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        return self._take() == 0.0
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        # with a timeout, gives up (without taking a token) once waiting any
+        # longer would take more than `timeout` seconds in total
+        waited = 0.0
+        while True:
+            wait = self._take()
+            if wait == 0.0:
+                return True
+            if timeout is not None and waited + wait > timeout:
+                return False
+            self.sleep(wait)
+            waited += wait
+
+
+_default_limiter: Optional[RateLimiter] = None
+
+
+def default_rate_limiter() -> Optional[RateLimiter]:
+    return _default_limiter
+
+
+def set_default_rate_limiter(limiter: Optional[RateLimiter]) -> None:
+    global _default_limiter
+    _default_limiter = limiter
@@ -1,22 +1,36 @@
 import datetime as dt
+import enum
+import inspect
+from functools import wraps
+from typing import Any, Callable, Optional, get_type_hints
 
 import apiclient.exceptions
 import backoff
+import requests.adapters
 from apiclient import (
     APIClient,
     JsonRequestFormatter,
     JsonResponseHandler,
     endpoint,
 )
-from apiclient_pydantic import serialize_all_methods
-from fake_useragent import UserAgent
+from apiclient.request_strategies import RequestStrategy
+from apiclient_pydantic import (
+    serialize_all_methods,
+    serialize_request,
+    serialize_response,
+)
+from pydantic import parse_obj_as
 
 from ..core import IntOrStr
+from ..profiling import HTTP_FETCH, JSON_DECODE, RATE_LIMIT, VALIDATION, stage
+from ..ratelimit import RateLimiter, default_rate_limiter
+from ..tracing import SpanKind, current_span, span
 from .camp import (
     RGApiCampground,
     RGApiCampgroundAvailability,
     RGApiCampsite,
 )
+from .decode import parse_trusted
 from .extra import LocationType, RGApiAlert, RGApiRatingAggregate
 from .permit import (
     RGApiPermit,
@@ -28,6 +42,39 @@ BACKOFF_EXCEPTIONS = (apiclient.exceptions.APIClientError,)
 BACKOFF_TRIES = 5
 
 
+def _backoff_giveup(exc: Exception) -> bool:
+    # 4xx responses other than rate limiting won't change on retry
+    return isinstance(exc, apiclient.exceptions.ClientError) and exc.status_code != 429
+
+
+def _trace_backoff(details: dict[str, Any]) -> None:
+    call = current_span()
+    if call.is_recording():
+        call.set_attribute("retries", details["tries"])
+        call.add_event(
+            "retry",
+            {
+                "attempt": details["tries"],
+                "wait_s": details["wait"],
+                "exception": repr(details["exception"]),
+            },
+        )
+
+
+def _trace_giveup(details: dict[str, Any]) -> None:
+    current_span().add_event("giveup", {"attempts": details["tries"]})
+
+
+retry_request = backoff.on_exception(
+    backoff.expo,
+    BACKOFF_EXCEPTIONS,
+    max_tries=BACKOFF_TRIES,
+    giveup=_backoff_giveup,
+    on_backoff=_trace_backoff,
+    on_giveup=_trace_giveup,
+)
+
+
 @endpoint(base_url="https://www.recreation.gov/api")
 class RecreationGovEndpoint:
     campground = "camps/campgrounds/{id}"
@@ -43,48 +90,150 @@ class RecreationGovEndpoint:
     permitinyo_availability = "permitinyo/{id}/availability"
 
 
-@serialize_all_methods()
+class ProfiledRequestStrategy(RequestStrategy):
+    # times the request and the decoding of its response as separate stages
+    def _make_request(self, request_method: Callable, *args, **kwargs):
+        def fetch(*fetch_args, **fetch_kwargs):
+            with stage(HTTP_FETCH):
+                response = request_method(*fetch_args, **fetch_kwargs)
+            call = current_span()
+            if call.is_recording():
+                call.set_attributes(
+                    {"http.url": response.url, "http.status_code": response.status_code}
+                )
+            return response
+
+        return super()._make_request(fetch, *args, **kwargs)
+
+    def _decode_response_data(self, response):
+        with stage(JSON_DECODE):
+            return super()._decode_response_data(response)
+
+
+class RateLimitedRequestStrategy(ProfiledRequestStrategy):
+    def __init__(self, rate_limiter: RateLimiter) -> None:
+        self.rate_limiter = rate_limiter
+
+    def _make_request(self, *args, **kwargs):
+        with stage(RATE_LIMIT):
+            self.rate_limiter.acquire()
+        return super()._make_request(*args, **kwargs)
+
+
+def _attribute(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def _serialize() -> Callable[[Callable], Callable]:
+    # apiclient_pydantic's serialize, with each API call traced as a client
+    # span and the validation of its response timed as its own stage
+    def decorator(func: Callable) -> Callable:
+        name = f"RecreationGovClient.{func.__name__}"
+        params = list(inspect.signature(func).parameters)[1:]
+
+        func = serialize_request()(func)
+        response = get_type_hints(func).get("return")
+        if not response or hasattr(APIClient, func.__name__):
+            # APIClient's own methods, like the default headers, aren't calls
+            return serialize_response(response)(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, kind=SpanKind.client) as call:
+                if call.is_recording():
+                    arguments = {**dict(zip(params, args[1:])), **kwargs}
+                    call.set_attributes(
+                        {f"rgapi.{k}": _attribute(v) for k, v in arguments.items()}
+                    )
+                result = func(*args, **kwargs)
+                if result is None:
+                    return result
+                with stage(VALIDATION):
+                    return parse_obj_as(response, result)
+
+        return wrapper
+
+    return decorator
+
+
+_user_agent: Optional[Any] = None
+
+
+def _random_user_agent() -> str:
+    global _user_agent
+    if _user_agent is None:
+        # fake_useragent loads its browser database on import
+        from fake_useragent import UserAgent
+
+        _user_agent = UserAgent()
+    return _user_agent.random
+
+
+@serialize_all_methods(decorator=_serialize)
 class RecreationGovClient(APIClient):
-    def __init__(self):
+    def __init__(
+        self,
+        pool_size: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+    ):
+        if rate_limiter is None:
+            rate_limiter = default_rate_limiter()
+        request_strategy: RequestStrategy = ProfiledRequestStrategy()
+        if rate_limiter is not None:
+            request_strategy = RateLimitedRequestStrategy(rate_limiter)
+
         super().__init__(
             response_handler=JsonResponseHandler,
             request_formatter=JsonRequestFormatter,
+            request_strategy=request_strategy,
         )
 
+        if pool_size:
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=1, pool_maxsize=pool_size
+            )
+            self.get_session().mount("https://", adapter)
+
     def get_default_headers(self) -> dict[str, str]:
         headers: dict[str, str] = super().get_default_headers()
-        headers["User-Agent"] = UserAgent().random
+        headers["User-Agent"] = _random_user_agent()
         return headers
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_campground(self, campground_id: IntOrStr) -> RGApiCampground:
         url = RecreationGovEndpoint.campground.format(id=campground_id)
         headers = self.get_default_headers()
         resp = self.get(url, headers=headers)
         return resp["campground"]
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_campground_sites(self, campground_id: IntOrStr) -> list[RGApiCampsite]:
         url = RecreationGovEndpoint.campground_sites.format(id=campground_id)
         headers = self.get_default_headers()
         resp = self.get(url, headers=headers)
-        return resp["campsites"]
+        # hundreds of sites with nested details, too many to validate each
+        with stage(VALIDATION):
+            return parse_trusted(RGApiCampsite, resp["campsites"])
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_campsite(self, campsite_id: IntOrStr) -> RGApiCampsite:
         url = RecreationGovEndpoint.campsite.format(id=campsite_id)
         headers = self.get_default_headers()
         resp = self.get(url, headers=headers)
         return resp["campsite"]
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_permit(self, permit_id: IntOrStr) -> RGApiPermit:
         url = RecreationGovEndpoint.permit.format(id=permit_id)
         headers = self.get_default_headers()
         resp = self.get(url, headers=headers)
         return resp["payload"]
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_alerts(
         self, location_id: IntOrStr, location_type: LocationType
     ) -> list[RGApiAlert]:
@@ -94,7 +243,7 @@ class RecreationGovClient(APIClient):
         resp = self.get(url, headers=headers, params=params)
         return resp["alerts"]
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_ratings(
         self, location_id: IntOrStr, location_type: LocationType
     ) -> RGApiRatingAggregate:
@@ -110,7 +259,7 @@ class RecreationGovClient(APIClient):
         date_formatted = dt.datetime.strftime(date_object, f"%Y-%m-%dT00:00:00{ms}Z")
         return date_formatted
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_campground_availability(
         self, campground_id: IntOrStr, start_date: dt.date
     ) -> RGApiCampgroundAvailability:
@@ -121,7 +270,7 @@ class RecreationGovClient(APIClient):
         resp = self.get(url, headers=headers, params=params)
         return resp
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_permit_availability(
         self, permit_id: IntOrStr, start_date: dt.date
     ) -> RGApiPermitAvailability:
@@ -132,7 +281,7 @@ class RecreationGovClient(APIClient):
         resp = self.get(url, headers=headers, params=params)
         return resp["payload"]
 
-    @backoff.on_exception(backoff.expo, BACKOFF_EXCEPTIONS, max_tries=BACKOFF_TRIES)
+    @retry_request
     def get_permit_inyo_availability(
         self, permit_id: IntOrStr, start_date: dt.date
     ) -> RGApiPermitInyoAvailability:
@@ -0,0 +1,162 @@
+import enum
+from typing import Any, Callable, Iterable, TypeVar
+
+from pydantic import BaseModel
+from pydantic.fields import SHAPE_DICT, SHAPE_LIST, SHAPE_SINGLETON, ModelField
+
+object_setattr = object.__setattr__
+
+M = TypeVar("M", bound=BaseModel)
+Decoder = Callable[[Any], Any]
+
+_decoders: dict[type, Decoder] = {}
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+# Unlike pydantic, the decoders don't coerce: a value of the wrong type, None
+# included, raises TypeError so parse_trusted falls back to validation.
+
+
+def _check_str(value: Any) -> str:
+    if not isinstance(value, str):
+        raise TypeError(f"expected str, got {value!r}")
+    return value
+
+
+def _check_bool(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise TypeError(f"expected bool, got {value!r}")
+    return value
+
+
+def _check_int(value: Any) -> int:
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f"expected int, got {value!r}")
+    return value
+
+
+def _check_float(value: Any) -> float:
+    # JSON has no separate float type, so whole numbers come as ints
+    if isinstance(value, float):
+        return value
+    return float(_check_int(value))
+
+
+_checks: dict[type, Decoder] = {
+    str: _check_str,
+    bool: _check_bool,
+    int: _check_int,
+    float: _check_float,
+}
+
+
+def _type_decoder(type_: Any) -> Decoder:
+    if isinstance(type_, type):
+        if issubclass(type_, BaseModel):
+            return model_decoder(type_)
+        if issubclass(type_, enum.Enum):
+            return type_
+        if type_ in _checks:
+            return _checks[type_]
+    if type_ is Any:
+        return _identity
+    raise TypeError(f"no trusted decoder for {type_!r}")
+
+
+def _field_decoder(field: ModelField) -> Decoder:
+    convert = _type_decoder(field.type_)
+    decode: Decoder
+    if field.shape == SHAPE_SINGLETON:
+        decode = convert
+    elif field.shape == SHAPE_LIST:
+
+        def decode(value):
+            if not isinstance(value, list):
+                raise TypeError(f"expected list, got {value!r}")
+            return [convert(v) for v in value]
+
+    elif field.shape == SHAPE_DICT:
+
+        def decode(value):
+            return {str(k): convert(v) for k, v in value.items()}
+
+    else:
+        raise TypeError(f"no trusted decoder for {field}")
+
+    if not field.allow_none:
+        return decode
+    return lambda value: None if value is None else decode(value)
+
+
+def model_decoder(model: type[M]) -> Callable[[dict[str, Any]], M]:
+    # Builds, once per model, a decoder that maps a trusted API payload onto
+    # the model through construct(), converting enums, numbers and nested
+    # models by the field types but skipping pydantic's validators. Only
+    # plain models qualify, not ones with validators, a custom __init__ or
+    # private attributes.
+    decoder = _decoders.get(model)
+    if decoder is not None:
+        return decoder
+
+    if (
+        model.__init__ is not BaseModel.__init__
+        or model.__private_attributes__
+        or model.__validators__
+        or model.__pre_root_validators__
+        or model.__post_root_validators__
+    ):
+        raise TypeError(f"no trusted decoder for {model.__name__}")
+
+    fields = list(model.__fields__.values())
+    plan = [(field.alias, field.name, _field_decoder(field)) for field in fields]
+    names = frozenset(field.name for field in fields)
+
+    def decode(data):
+        try:
+            # the API sends every field, so the common case is one pass
+            values = {name: convert(data[alias]) for alias, name, convert in plan}
+            fields_set = set(names)
+        except KeyError:
+            values = {}
+            fields_set = set()
+            for field, (alias, name, convert) in zip(fields, plan):
+                if alias in data:
+                    values[name] = convert(data[alias])
+                    fields_set.add(name)
+                elif field.required:
+                    raise KeyError(alias)
+                else:
+                    values[name] = field.get_default()
+        # what construct() does, minus its per-call defaults pass
+        obj = model.__new__(model)
+        object_setattr(obj, "__dict__", values)
+        object_setattr(obj, "__fields_set__", fields_set)
+        return obj
+
+    _decoders[model] = decode
+    return decode
+
+
+def parse_trusted(model: type[M], records: Iterable[dict[str, Any]]) -> list[M]:
+    # Parses a list of API records, validating only the first with pydantic
+    # and checking the trusted decoder agrees with it, then decoding the rest
+    # without validation. Any disagreement or decoding error falls back to
+    # validating every record, so bad payloads still raise ValidationError.
+    records = list(records)
+    if not records:
+        return []
+    try:
+        decode = model_decoder(model)
+    except TypeError:
+        return [model.parse_obj(record) for record in records]
+
+    first = model.parse_obj(records[0])
+    try:
+        if decode(records[0]) == first:
+            return [first] + [decode(record) for record in records[1:]]
+    except (AttributeError, KeyError, TypeError, ValueError):
+        pass
+    return [first] + [model.parse_obj(record) for record in records[1:]]
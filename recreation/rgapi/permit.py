@@ -1,7 +1,8 @@
+import bisect
 import datetime as dt
 import enum
 import itertools
-from typing import Any
+from typing import Any, Iterable, Optional
 
 from pydantic import BaseModel, Extra, Field, PrivateAttr
 
@@ -55,6 +56,73 @@ class RgApiPermitEntrance(BaseModel):
         return self.__repr__()
 
 
+class PermitDivisionIndex:
+    # Division lookups by code, name and entrance, built once per permit so
+    # repeated lookups on large permits don't scan every division. Where codes
+    # or names collide the first division wins, as a linear scan would.
+    def __init__(self, divisions: dict[str, RgApiPermitDivision]) -> None:
+        self.by_code: dict[str, RgApiPermitDivision] = {}
+        self.by_name: dict[str, RgApiPermitDivision] = {}
+        self.by_entrance: dict[str, list[RgApiPermitDivision]] = {}
+        self._folded_codes: dict[str, RgApiPermitDivision] = {}
+        self._folded_names: dict[str, RgApiPermitDivision] = {}
+
+        for divis in divisions.values():
+            self.by_code.setdefault(divis.code, divis)
+            self.by_name.setdefault(divis.name, divis)
+            self._folded_codes.setdefault(divis.code.casefold(), divis)
+            self._folded_names.setdefault(divis.name.casefold(), divis)
+            for entry_id in divis.entry_ids:
+                self.by_entrance.setdefault(entry_id, []).append(divis)
+
+        # (folded name, position) pairs sorted for prefix search
+        self._divisions = list(divisions.values())
+        self._names = sorted(
+            (divis.name.casefold(), i) for i, divis in enumerate(self._divisions)
+        )
+
+    def code(
+        self, code: str, ignore_case: bool = False
+    ) -> Optional[RgApiPermitDivision]:
+        divis = self.by_code.get(code)
+        if divis is None and ignore_case:
+            divis = self._folded_codes.get(code.casefold())
+        return divis
+
+    def name(
+        self, name: str, ignore_case: bool = False
+    ) -> Optional[RgApiPermitDivision]:
+        divis = self.by_name.get(name)
+        if divis is None and ignore_case:
+            divis = self._folded_names.get(name.casefold())
+        return divis
+
+    def codes(
+        self, codes: Iterable[str], ignore_case: bool = False
+    ) -> list[RgApiPermitDivision]:
+        # divisions for the codes that exist, in the order given
+        found: dict[str, RgApiPermitDivision] = {}
+        for code in codes:
+            divis = self.code(code, ignore_case)
+            if divis is not None:
+                found.setdefault(divis.id, divis)
+        return list(found.values())
+
+    def name_prefix(self, prefix: str) -> list[RgApiPermitDivision]:
+        # case-insensitive, in name order
+        prefix = prefix.casefold()
+        start = bisect.bisect_left(self._names, (prefix, -1))
+        matches = []
+        for name, i in itertools.islice(self._names, start, None):
+            if not name.startswith(prefix):
+                break
+            matches.append(self._divisions[i])
+        return matches
+
+    def entrance(self, entrance_id: str) -> list[RgApiPermitDivision]:
+        return self.by_entrance.get(entrance_id, [])
+
+
 class RGApiPermit(BaseModel):
     id: str
     name: str
@@ -62,11 +130,13 @@ class RGApiPermit(BaseModel):
     entrance_list: list[RgApiPermitEntrance] = Field(list(), alias="entrances")
 
     _entrances: dict[str, RgApiPermitEntrance] = PrivateAttr()
+    _division_index: PermitDivisionIndex = PrivateAttr()
 
     def __init__(self, **data: dict[str, Any]) -> None:
         super().__init__(**data)
 
         self._entrances = {entry.id: entry for entry in self.entrance_list}
+        self._division_index = PermitDivisionIndex(self.divisions)
 
     class Config:
         extra = Extra.ignore
@@ -81,6 +151,10 @@ class RGApiPermit(BaseModel):
     def entrances(self) -> dict[str, RgApiPermitEntrance]:
         return self._entrances
 
+    @property
+    def division_index(self) -> PermitDivisionIndex:
+        return self._division_index
+
 
 class RgApiPermitDateAvailability(BaseModel):
     is_secret_quota: bool
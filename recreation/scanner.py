@@ -0,0 +1,274 @@
+import datetime as dt
+import multiprocessing
+import os
+import queue
+from collections import Counter
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass, field
+from typing import Any, Iterator, Optional, Sequence, TypeVar
+
+import apiclient.exceptions
+
+from .availability_list import (
+    POOL_NUM_WORKERS,
+    CampgroundAvailabilityList,
+    PermitAvailabilityList,
+)
+from .core import PERMIT_IDS
+from .planner import CampgroundQuery, FetchPlan, plan_fetches
+from .ratelimit import DEFAULT_RATE, RateLimiter, set_default_rate_limiter
+from .rgapi.camp import RGApiCampground, RGApiCampsite
+from .rgapi.client import RecreationGovClient
+from .rgapi.permit import PermitDivisionIndex, RgApiPermitDivision
+
+S = TypeVar("S")
+
+
+@dataclass
+class ScanResult:
+    campground_id: str
+    name: str = ""
+    url: str = ""
+    site_names: dict[str, str] = field(default_factory=dict)
+    availability: CampgroundAvailabilityList = field(
+        default_factory=lambda: CampgroundAvailabilityList([])
+    )
+    error: Optional[str] = None
+
+
+def shard(items: Sequence[S], n_shards: int) -> list[list[S]]:
+    # round robin so neighbouring (often similarly sized) ids spread out
+    shards: list[list[S]] = [[] for _ in range(max(1, min(n_shards, len(items))))]
+    for i, item in enumerate(items):
+        shards[i % len(shards)].append(item)
+    return shards
+
+
+def scan_campground(
+    campground_id: str, start_date: dt.date, end_date: dt.date
+) -> ScanResult:
+    client = RecreationGovClient()
+    try:
+        campground = client.get_campground(campground_id)
+        sites = client.get_campground_sites(campground_id)
+        availability = CampgroundAvailabilityList.fetch_availability(
+            campground_id, start_date, end_date
+        )
+    except apiclient.exceptions.APIClientError as exc:
+        return ScanResult(campground_id=campground_id, error=str(exc))
+
+    return _scan_result(campground, sites, availability)
+
+
+def _scan_result(
+    campground: RGApiCampground,
+    sites: list[RGApiCampsite],
+    availability: CampgroundAvailabilityList,
+) -> ScanResult:
+    return ScanResult(
+        campground_id=campground.id,
+        name=campground.name,
+        url=f"https://www.recreation.gov/camping/campgrounds/{campground.id}",
+        site_names={site.id: site.name for site in sites},
+        availability=availability,
+    )
+
+
+def stream_campgrounds(
+    campground_ids: Sequence[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    workers: int = POOL_NUM_WORKERS,
+    client: Optional[RecreationGovClient] = None,
+) -> Iterator[ScanResult]:
+    plan = plan_fetches(
+        CampgroundQuery(camp_id, start_date, end_date) for camp_id in campground_ids
+    )
+    return stream_plan(plan, workers=workers, client=client)
+
+
+def _gather(
+    tasks: dict[Future, tuple[str, Any]],
+) -> Iterator[tuple[str, dict[Any, Any], Optional[str]]]:
+    # Tasks are keyed by (id, part). Yields each id with its parts, or the
+    # first error among them, as soon as the last of its tasks completes.
+    remaining = Counter(key for key, _ in tasks.values())
+    parts: dict[str, dict[Any, Any]] = {key: {} for key in remaining}
+    errors: dict[str, str] = {}
+    for future in as_completed(tasks):
+        key, part = tasks[future]
+        try:
+            parts[key][part] = future.result()
+        except apiclient.exceptions.APIClientError as exc:
+            errors.setdefault(key, str(exc))
+
+        remaining[key] -= 1
+        if remaining[key] == 0:
+            yield key, parts.pop(key), errors.get(key)
+
+
+def stream_plan(
+    plan: FetchPlan,
+    workers: int = POOL_NUM_WORKERS,
+    client: Optional[RecreationGovClient] = None,
+) -> Iterator[ScanResult]:
+    # Every request in the plan (metadata, campsites and each month of every
+    # campground) goes into one bounded thread pool, so requests for different
+    # campgrounds overlap. A campground's result is yielded as soon as its
+    # last request completes.
+    client = client or RecreationGovClient(pool_size=workers)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks: dict[Future, tuple[str, Any]] = {}
+        for camp_id, months in plan.months.items():
+            tasks[executor.submit(client.get_campground, camp_id)] = (camp_id, "camp")
+            tasks[executor.submit(client.get_campground_sites, camp_id)] = (
+                camp_id,
+                "sites",
+            )
+            for month in months:
+                future = executor.submit(
+                    client.get_campground_availability, camp_id, month
+                )
+                tasks[future] = (camp_id, month)
+
+        for camp_id, parts, error in _gather(tasks):
+            if error:
+                yield ScanResult(campground_id=camp_id, error=error)
+                continue
+            availability = CampgroundAvailabilityList.from_campground(
+                [parts[month] for month in plan.months[camp_id]]
+            )
+            yield _scan_result(parts["camp"], parts["sites"], availability)
+
+
+@dataclass
+class PermitScanResult:
+    permit_id: str
+    name: str = ""
+    url: str = ""
+    divisions: dict[str, RgApiPermitDivision] = field(default_factory=dict)
+    division_index: PermitDivisionIndex = field(
+        default_factory=lambda: PermitDivisionIndex({})
+    )
+    availability: PermitAvailabilityList = field(
+        default_factory=lambda: PermitAvailabilityList([])
+    )
+    error: Optional[str] = None
+
+
+def stream_permits(
+    permit_ids: Sequence[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    workers: int = POOL_NUM_WORKERS,
+    client: Optional[RecreationGovClient] = None,
+) -> Iterator[PermitScanResult]:
+    # Permit content and availability for every permit are fetched at once,
+    # and each permit is yielded as soon as both are in. Aliases from
+    # PERMIT_IDS are resolved first so an alias and its id are fetched once.
+    client = client or RecreationGovClient(pool_size=workers)
+    ids = dict.fromkeys(PERMIT_IDS.get(pid, pid) for pid in permit_ids)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        tasks: dict[Future, tuple[str, Any]] = {}
+        for permit_id in ids:
+            tasks[executor.submit(client.get_permit, permit_id)] = (permit_id, "permit")
+            future = executor.submit(
+                PermitAvailabilityList.fetch_availability,
+                permit_id,
+                start_date,
+                end_date,
+                client=client,
+            )
+            tasks[future] = (permit_id, "availability")
+
+        for permit_id, parts, error in _gather(tasks):
+            if error:
+                yield PermitScanResult(permit_id=permit_id, error=error)
+                continue
+            permit = parts["permit"]
+            yield PermitScanResult(
+                permit_id=permit_id,
+                name=permit.name,
+                url=f"https://www.recreation.gov/permits/{permit_id}",
+                divisions=permit.divisions,
+                division_index=permit.division_index,
+                availability=parts["availability"],
+            )
+
+
+# results of the shard running in this worker process, one per campground
+_results: Optional["multiprocessing.Queue[ScanResult]"] = None
+
+
+def _init_worker(
+    rate_limiter: Optional[RateLimiter],
+    results: Optional["multiprocessing.Queue[ScanResult]"] = None,
+) -> None:
+    global _results
+    set_default_rate_limiter(rate_limiter)
+    _results = results
+
+
+def _scan_shard(
+    campground_ids: list[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    workers: int = POOL_NUM_WORKERS,
+) -> int:
+    # Each shard overlaps its requests in a thread pool, like a single process
+    # scan, and hands every campground back as soon as it is complete.
+    assert _results is not None
+    count = 0
+    for result in stream_campgrounds(
+        campground_ids, start_date, end_date, workers=workers
+    ):
+        _results.put(result)
+        count += 1
+    return count
+
+
+def scan_campgrounds(
+    campground_ids: Sequence[str],
+    start_date: dt.date,
+    end_date: dt.date,
+    processes: Optional[int] = None,
+    rate: float = DEFAULT_RATE,
+    workers: int = POOL_NUM_WORKERS,
+) -> Iterator[ScanResult]:
+    # Results are yielded a campground at a time, in completion order. Each
+    # process runs `workers` request threads, and all of them draw from one
+    # shared request budget of `rate` requests per second.
+    processes = processes or os.cpu_count() or 1
+    rate_limiter = RateLimiter(rate=rate, burst=max(1, int(rate)), shared=True)
+    ids = list(dict.fromkeys(campground_ids))
+    shards = shard(ids, processes)
+    results: "multiprocessing.Queue[ScanResult]" = multiprocessing.Queue()
+
+    with ProcessPoolExecutor(
+        max_workers=len(shards),
+        initializer=_init_worker,
+        initargs=(rate_limiter, results),
+    ) as executor:
+        futures = [
+            executor.submit(_scan_shard, ids, start_date, end_date, workers)
+            for ids in shards
+        ]
+        # shards report how many results they sent once they finish
+        expected: Optional[int] = None
+        yielded = 0
+        while expected is None or yielded < expected:
+            try:
+                result = results.get(timeout=0.1)
+            except queue.Empty:
+                if all(future.done() for future in futures):
+                    expected = sum(future.result() for future in futures)
+                continue
+            yielded += 1
+            yield result
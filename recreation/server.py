@@ -0,0 +1,465 @@
+import datetime as dt
+import json
+import logging
+import re
+import threading
+import time
+from concurrent.futures import Future
+from functools import partial
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Hashable, Optional
+from urllib.parse import parse_qs, urlparse
+
+import apiclient.exceptions
+
+from .availability_list import (
+    CampgroundAvailabilityList,
+    PermitAvailabilityList,
+    _months_between,
+)
+from .core import (
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    MAX_WAIT,
+    METADATA_TTL,
+    MONTH_TTL,
+    PERMIT_IDS,
+    POOL_NUM_WORKERS,
+)
+from .models import Campground, Permit
+from .output import _jsonable
+from .ratelimit import DEFAULT_BURST, DEFAULT_RATE, RateLimiter
+from .rgapi.camp import CampsiteAvailabilityStatus
+from .rgapi.client import RecreationGovClient
+from .site_index import CampsiteIndex, SiteFilter
+from .tracing import current_span, span
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    pass
+
+
+class SheddingRateLimiter(RateLimiter):
+    # Raises Overloaded instead of queueing for longer than max_wait, so when
+    # the upstream budget is exhausted requests fail fast instead of piling up.
+    def __init__(self, *args: Any, max_wait: float = MAX_WAIT, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.max_wait = max_wait
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        if not super().acquire(self.max_wait if timeout is None else timeout):
+            raise Overloaded("upstream request budget exhausted")
+        return True
+
+
+def _cache_event(name: str, key: Hashable) -> None:
+    call = current_span()
+    if call.is_recording():
+        call.add_event(name, {"key": str(key)})
+
+
+class SingleFlightCache:
+    # TTL cache where concurrent misses for the same key share one load: the
+    # first caller runs the loader, the rest wait on its future. Failed loads
+    # are not cached.
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, ttl: float, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > self.clock():
+                self.hits += 1
+                _cache_event("cache hit", key)
+                return entry[1]
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                _cache_event("cache coalesced", key)
+                leader = False
+            else:
+                self.misses += 1
+                _cache_event("cache miss", key)
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = loader()
+        except BaseException as exc:
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            raise
+        with self._lock:
+            now = self.clock()
+            # drop expired entries, so keys never asked for again don't pile up
+            expired = [k for k, (expires, _) in self._entries.items() if expires <= now]
+            for stale in expired:
+                del self._entries[stale]
+            self._entries[key] = (now + ttl, value)
+            del self._inflight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _upstream_status(status_code: Optional[int]) -> HTTPStatus:
+    # upstream client errors pass through, unless the code is nonstandard
+    try:
+        return HTTPStatus(status_code)
+    except ValueError:
+        return HTTPStatus.BAD_GATEWAY
+
+
+def _param(params: dict[str, list[str]], name: str) -> Optional[str]:
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def _date_param(params: dict[str, list[str]], name: str) -> Optional[dt.date]:
+    value = _param(params, name)
+    if value is None:
+        return None
+    try:
+        return dt.date.fromisoformat(value)
+    except ValueError:
+        raise QueryError(f"{name} must be YYYY-MM-DD")
+
+
+def _int_param(params: dict[str, list[str]], name: str) -> Optional[int]:
+    value = _param(params, name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+
+
+def _list_param(params: dict[str, list[str]], name: str) -> Optional[list[str]]:
+    value = _param(params, name)
+    return value.split(",") if value else None
+
+
+def _dates(params: dict[str, list[str]]) -> tuple[dt.date, dt.date]:
+    start_date = _date_param(params, "start_date")
+    if start_date is None:
+        raise QueryError("start_date is required")
+    return start_date, _date_param(params, "end_date") or start_date
+
+
+def _bool_param(params: dict[str, list[str]], name: str) -> Optional[bool]:
+    value = _param(params, name)
+    if value is None:
+        return None
+    return value.lower() in ("1", "true", "yes")
+
+
+def _site_filter(params: dict[str, list[str]]) -> SiteFilter:
+    return SiteFilter(
+        equipment=_param(params, "equipment"),
+        min_length=_int_param(params, "min_length"),
+        accessible=_bool_param(params, "accessible"),
+        attributes=SiteFilter.parse_attributes(_list_param(params, "attributes") or []),
+        campsite_types=_list_param(params, "campsite_types"),
+    )
+
+
+def _days_of_week(params: dict[str, list[str]]) -> Optional[list[int]]:
+    days = _list_param(params, "days_of_week")
+    try:
+        return [int(d) for d in days] if days else None
+    except ValueError:
+        raise QueryError("days_of_week must be comma separated integers")
+
+
+class QueryService:
+    # The queries behind the HTTP API. Every upstream request goes through one
+    # shared client and is cached per campground, permit or month, so
+    # overlapping queries from different users share fetches.
+    def __init__(
+        self,
+        client: Optional[RecreationGovClient] = None,
+        rate: float = DEFAULT_RATE,
+        burst: int = DEFAULT_BURST,
+        max_wait: float = MAX_WAIT,
+        workers: int = POOL_NUM_WORKERS,
+        month_ttl: float = MONTH_TTL,
+        metadata_ttl: float = METADATA_TTL,
+    ) -> None:
+        if client is None:
+            limiter = SheddingRateLimiter(rate=rate, burst=burst, max_wait=max_wait)
+            client = RecreationGovClient(pool_size=workers, rate_limiter=limiter)
+        self.client = client
+        self.month_ttl = month_ttl
+        self.metadata_ttl = metadata_ttl
+        self.cache = SingleFlightCache()
+        self.site_index = CampsiteIndex()
+        self.shed = 0
+        self._lock = threading.Lock()
+
+    def record_shed(self) -> None:
+        with self._lock:
+            self.shed += 1
+
+    def _campground(self, campground_id: str) -> Campground:
+        return self.cache.get(
+            ("campground", campground_id),
+            self.metadata_ttl,
+            partial(self._load_campground, campground_id),
+        )
+
+    def _load_campground(self, campground_id: str) -> Campground:
+        camp = Campground.fetch(campground_id, fetch_all=True, client=self.client)
+        with self._lock:
+            self.site_index.add_campground(
+                campground_id, [site.api_campsite for site in camp.campsites.values()]
+            )
+        return camp
+
+    def _permit(self, permit_id: str) -> Permit:
+        return self.cache.get(
+            ("permit", permit_id),
+            self.metadata_ttl,
+            lambda: Permit.fetch(permit_id, client=self.client),
+        )
+
+    def campground_info(self, campground_id: str) -> dict[str, Any]:
+        camp = self._campground(campground_id)
+        return {
+            **camp.api_campground.dict(exclude={"campsite_ids"}),
+            "url": camp.url,
+            "alerts": [alert.body for alert in camp.alerts],
+            "campsites": [
+                {
+                    "id": site.id,
+                    "name": site.name,
+                    "status": site.status,
+                    "campsite_type": site.campsite_type,
+                    "url": site.url,
+                }
+                for site in sorted(camp.campsites.values(), key=lambda s: s.id)
+            ],
+        }
+
+    def campground_availability(
+        self, campground_id: str, params: dict[str, list[str]]
+    ) -> list[dict[str, Any]]:
+        start_date, end_date = _dates(params)
+        status = _param(params, "status")
+        try:
+            status_enum = CampsiteAvailabilityStatus[status] if status else None
+        except KeyError:
+            raise QueryError(f"unknown status {status}")
+
+        camp = self._campground(campground_id)
+        # campsite attributes narrow the sites before any month is fetched
+        site_filter = _site_filter(params)
+        attr_site_ids = None
+        if not site_filter.is_empty:
+            with self._lock:
+                attr_site_ids = self.site_index.site_ids(site_filter, campground_id)
+            if not attr_site_ids:
+                return []
+
+        months = [
+            self.cache.get(
+                ("campground_month", campground_id, month),
+                self.month_ttl,
+                lambda month=month: self.client.get_campground_availability(
+                    campground_id, month
+                ),
+            )
+            for month in _months_between(start_date, end_date)
+        ]
+
+        avail = CampgroundAvailabilityList.from_campground(
+            months, site_ids=attr_site_ids
+        )
+        avail = avail.filter_dates(start_date, end_date, exclude_start_day=True)
+        avail = avail.filter_days_of_week(_days_of_week(params))
+        site_ids = _list_param(params, "site_ids")
+        if site_ids:
+            avail = avail.filter_id(site_ids)
+        length = _int_param(params, "length")
+        if length:
+            avail = avail.filter_length(length)
+        if status_enum:
+            avail = avail.filter_status(status_enum)
+
+        return [
+            {
+                "campsite_id": a.id,
+                "campsite_name": (
+                    camp.campsites[a.id].name if a.id in camp.campsites else a.id
+                ),
+                "start_date": a.date,
+                "end_date": a.date + dt.timedelta(days=a.length),
+                "length": a.length,
+                "status": a.status,
+            }
+            for a in avail.availability
+        ]
+
+    def permit_info(self, permit_id: str) -> dict[str, Any]:
+        permit = self._permit(PERMIT_IDS.get(permit_id, permit_id))
+        return {
+            "id": permit.id,
+            "name": permit.name,
+            "url": permit.url,
+            "divisions": [
+                {"id": div.id, "code": div.code, "name": div.name}
+                for div in permit.divisions.values()
+            ],
+        }
+
+    def permit_availability(
+        self, permit_id: str, params: dict[str, list[str]]
+    ) -> list[dict[str, Any]]:
+        start_date, end_date = _dates(params)
+        permit_id = PERMIT_IDS.get(permit_id, permit_id)
+
+        permit = self._permit(permit_id)
+        availability = []
+        for month in _months_between(start_date, end_date):
+            month_avail = self.cache.get(
+                ("permit_month", permit_id, month),
+                self.month_ttl,
+                lambda month=month: PermitAvailabilityList.fetch_availability(
+                    permit_id, month, month, client=self.client
+                ),
+            )
+            availability += month_avail.availability
+
+        avail = PermitAvailabilityList(availability).filter_dates(start_date, end_date)
+        avail = avail.filter_days_of_week(_days_of_week(params))
+        codes = _list_param(params, "div_codes")
+        if codes:
+            avail = avail.filter_division(
+                permit.divisions_for_codes(codes, ignore_case=True)
+            )
+        remain = _int_param(params, "remain")
+        if remain:
+            avail = avail.filter_remain(remain)
+        is_walkup = _param(params, "is_walkup")
+        if is_walkup is not None:
+            avail = avail.filter_walkup(is_walkup.lower() in ("1", "true", "yes"))
+
+        return [
+            {
+                "division_id": a.id,
+                "division_name": (
+                    permit.divisions[a.id].name if a.id in permit.divisions else a.id
+                ),
+                "date": a.date,
+                "remaining": a.remaining,
+                "total": a.total,
+                "is_walkup": a.is_walkup,
+            }
+            for a in avail.availability
+        ]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "cached": len(self.cache),
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+            "coalesced": self.cache.coalesced,
+            "shed": self.shed,
+        }
+
+
+ROUTES: list[tuple[re.Pattern, str]] = [
+    (re.compile(r"^/campground/(\w+)$"), "campground_info"),
+    (re.compile(r"^/campground/(\w+)/availability$"), "campground_availability"),
+    (re.compile(r"^/permit/(\w+)$"), "permit_info"),
+    (re.compile(r"^/permit/(\w+)/availability$"), "permit_availability"),
+]
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    service: QueryService
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(
+        self, status: HTTPStatus, body: Any, headers: Optional[dict] = None
+    ) -> None:
+        data = json.dumps(body, default=_jsonable).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/stats":
+            self._send(HTTPStatus.OK, self.service.stats())
+            return
+
+        for pattern, method in ROUTES:
+            match = pattern.match(url.path)
+            if match:
+                break
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": "no such endpoint"})
+            return
+
+        args: list[Any] = [match.group(1)]
+        if method.endswith("availability"):
+            args.append(params)
+        try:
+            with span(f"QueryService.{method}", {"http.target": self.path}):
+                body = getattr(self.service, method)(*args)
+        except QueryError as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+        except Overloaded as exc:
+            self.service.record_shed()
+            retry_after = {"Retry-After": "1"}
+            self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": str(exc)}, retry_after)
+        except apiclient.exceptions.ClientError as exc:
+            self._send(_upstream_status(exc.status_code), {"error": str(exc)})
+        except apiclient.exceptions.APIClientError as exc:
+            self._send(HTTPStatus.BAD_GATEWAY, {"error": str(exc)})
+        except Exception:
+            logger.exception("error handling %s", self.path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"})
+        else:
+            self._send(HTTPStatus.OK, body)
+
+
+def make_server(
+    service: QueryService, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT
+) -> ThreadingHTTPServer:
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,214 @@
+import datetime as dt
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Optional, Sequence
+
+import apiclient.exceptions
+
+from .availability_list import CampgroundAvailabilityList, _months_between
+from .core import POOL_NUM_WORKERS
+from .models import Campground
+from .rgapi.camp import RGApiCampgroundAvailability
+from .rgapi.client import RecreationGovClient
+from .scanner import ScanResult
+from .site_index import CampsiteIndex, SiteFilter
+from .tracing import span, traced_task
+
+
+class RecreationSession:
+    # Keeps one pooled client plus campground metadata and availability
+    # months resident, so repeated queries only fetch what they have not
+    # already seen. Availability is cached per (campground, month), so
+    # widening a date range only fetches the new months.
+    def __init__(
+        self,
+        workers: int = POOL_NUM_WORKERS,
+        client: Optional[RecreationGovClient] = None,
+    ) -> None:
+        self.client = client or RecreationGovClient(pool_size=workers)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.campgrounds: dict[str, Campground] = {}
+        self.months: dict[tuple[str, dt.date], RGApiCampgroundAvailability] = {}
+        self.site_index = CampsiteIndex()
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def close(self) -> None:
+        self.executor.shutdown()
+
+    def __enter__(self) -> "RecreationSession":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.campgrounds.clear()
+            self.months.clear()
+            self.site_index = CampsiteIndex()
+
+    def _fetch_campground(self, campground_id: str) -> Campground:
+        # metadata, campsites, alerts and ratings, 4 requests
+        with self._lock:
+            self.requests += 4
+        return Campground.fetch(campground_id, fetch_all=True, client=self.client)
+
+    def _fetch_month(
+        self, campground_id: str, month: dt.date
+    ) -> RGApiCampgroundAvailability:
+        with self._lock:
+            self.requests += 1
+        return self.client.get_campground_availability(campground_id, month)
+
+    def prefetch(
+        self,
+        campground_ids: Sequence[str],
+        start_date: Optional[dt.date] = None,
+        end_date: Optional[dt.date] = None,
+    ) -> dict[str, str]:
+        # Fetches whatever metadata and months are missing for all the
+        # campgrounds at once, and returns an error message per campground
+        # that could not be fetched.
+        months = _months_between(start_date, end_date) if start_date else []
+        with span("RecreationSession.prefetch") as prefetch:
+            return self._prefetch(campground_ids, months, prefetch)
+
+    def _prefetch(
+        self, campground_ids: Sequence[str], months: list[dt.date], prefetch: Any
+    ) -> dict[str, str]:
+        fetch_campground = traced_task("fetch campground", self._fetch_campground)
+        fetch_month = traced_task("fetch month", self._fetch_month)
+
+        # metadata and months already resident are cache hits
+        hits = 0
+        tasks: dict[Future, tuple[str, Optional[dt.date]]] = {}
+        for camp_id in dict.fromkeys(campground_ids):
+            if camp_id not in self.campgrounds:
+                future = self.executor.submit(fetch_campground, camp_id)
+                tasks[future] = (camp_id, None)
+            else:
+                hits += 1
+            for month in months:
+                if (camp_id, month) not in self.months:
+                    future = self.executor.submit(fetch_month, camp_id, month)
+                    tasks[future] = (camp_id, month)
+                else:
+                    hits += 1
+        if prefetch.is_recording():
+            prefetch.set_attributes(
+                {
+                    "campground_ids": list(dict.fromkeys(campground_ids)),
+                    "months": [m.isoformat() for m in months],
+                    "cache.hits": hits,
+                    "cache.misses": len(tasks),
+                }
+            )
+
+        errors: dict[str, str] = {}
+        for future, (camp_id, month) in tasks.items():
+            try:
+                result = future.result()
+            except apiclient.exceptions.APIClientError as exc:
+                errors.setdefault(camp_id, str(exc))
+                continue
+            with self._lock:
+                if month is None:
+                    self.campgrounds[camp_id] = result
+                    self.site_index.add_campground(
+                        camp_id,
+                        [site.api_campsite for site in result.campsites.values()],
+                    )
+                else:
+                    self.months[(camp_id, month)] = result
+        return errors
+
+    def campground(self, campground_id: str) -> Campground:
+        errors = self.prefetch([campground_id])
+        if errors:
+            raise LookupError(errors[campground_id])
+        return self.campgrounds[campground_id]
+
+    def campground_availability(
+        self,
+        campground_id: str,
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+    ) -> CampgroundAvailabilityList:
+        errors = self.prefetch([campground_id], start_date, end_date)
+        if errors:
+            raise LookupError(errors[campground_id])
+        return self._availability(campground_id, start_date, end_date)
+
+    def _availability(
+        self,
+        campground_id: str,
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+        site_ids: Optional[set[str]] = None,
+    ) -> CampgroundAvailabilityList:
+        if site_ids is not None and not site_ids:
+            return CampgroundAvailabilityList([])
+        return CampgroundAvailabilityList.from_campground(
+            [
+                self.months[(campground_id, month)]
+                for month in _months_between(start_date, end_date)
+            ],
+            site_ids=site_ids,
+        )
+
+    def site_ids(
+        self, campground_ids: Sequence[str], site_filter: SiteFilter
+    ) -> tuple[dict[str, set[str]], dict[str, str]]:
+        # the campsites of each campground matching the filter, fetching only
+        # the metadata of campgrounds not seen yet
+        errors = self.prefetch(campground_ids)
+        site_ids = {
+            camp_id: self.site_index.site_ids(site_filter, camp_id)
+            for camp_id in dict.fromkeys(campground_ids)
+            if camp_id not in errors
+        }
+        return site_ids, errors
+
+    def check(
+        self,
+        campground_ids: Sequence[str],
+        start_date: dt.date,
+        end_date: Optional[dt.date] = None,
+        site_filter: Optional[SiteFilter] = None,
+    ) -> list[ScanResult]:
+        # With a site filter, campgrounds without a matching campsite never
+        # have their months fetched.
+        site_ids: dict[str, set[str]] = {}
+        if site_filter is not None and not site_filter.is_empty:
+            site_ids, errors = self.site_ids(campground_ids, site_filter)
+            errors.update(
+                self.prefetch(
+                    [camp_id for camp_id, ids in site_ids.items() if ids],
+                    start_date,
+                    end_date,
+                )
+            )
+        else:
+            errors = self.prefetch(campground_ids, start_date, end_date)
+
+        results = []
+        for camp_id in dict.fromkeys(campground_ids):
+            if camp_id in errors:
+                results.append(ScanResult(campground_id=camp_id, error=errors[camp_id]))
+                continue
+            camp = self.campgrounds[camp_id]
+            results.append(
+                ScanResult(
+                    campground_id=camp_id,
+                    name=camp.name,
+                    url=camp.url,
+                    site_names={
+                        site_id: site.name for site_id, site in camp.campsites.items()
+                    },
+                    availability=self._availability(
+                        camp_id, start_date, end_date, site_ids.get(camp_id)
+                    ),
+                )
+            )
+        return results
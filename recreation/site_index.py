@@ -0,0 +1,161 @@
+import bisect
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+from .rgapi.camp import RGApiCampsite
+
+
+@dataclass
+class SiteFilter:
+    # equipment the site must permit, e.g. "Trailer", and the length in feet
+    # it must fit; min_length alone accepts any equipment that long
+    equipment: Optional[str] = None
+    min_length: Optional[int] = None
+    accessible: Optional[bool] = None
+    # attribute or site detail name to value, any value if the value is empty
+    attributes: dict[str, str] = field(default_factory=dict)
+    campsite_types: Optional[list[str]] = None
+
+    @property
+    def is_empty(self) -> bool:
+        return (
+            self.equipment is None
+            and self.min_length is None
+            and self.accessible is None
+            and not self.attributes
+            and not self.campsite_types
+        )
+
+    @staticmethod
+    def parse_attributes(values: Iterable[str]) -> dict[str, str]:
+        # NAME=VALUE or NAME
+        attributes = {}
+        for value in values:
+            name, _, attr_value = value.partition("=")
+            attributes[name.strip()] = attr_value.strip()
+        return attributes
+
+
+# (campground_id, site_id), so sites are kept apart per campground
+SiteKey = tuple[str, str]
+
+
+def _fold(value: Optional[str]) -> str:
+    return (value or "").strip().casefold()
+
+
+class CampsiteIndex:
+    # Inverted index from campsite equipment, accessibility, attributes and
+    # type to site ids, across campgrounds. Resolving a SiteFilter to site ids
+    # up front lets availability be restricted to those sites before it is
+    # fetched or flattened, instead of filtered afterwards.
+    def __init__(self) -> None:
+        self.campground_sites: dict[str, set[SiteKey]] = {}
+        self._all: set[SiteKey] = set()
+        self._accessible: set[SiteKey] = set()
+        self._types: dict[str, set[SiteKey]] = {}
+        self._attributes: dict[tuple[str, str], set[SiteKey]] = {}
+        self._attribute_names: dict[str, set[SiteKey]] = {}
+        # (max_length, site) sorted, per folded equipment name and overall
+        self._equipment: dict[str, list[tuple[int, SiteKey]]] = {}
+        self._any_equipment: list[tuple[int, SiteKey]] = []
+
+    def __len__(self) -> int:
+        return len(self._all)
+
+    def add_campground(
+        self, campground_id: str, campsites: Iterable[RGApiCampsite]
+    ) -> None:
+        if campground_id in self.campground_sites:
+            self.remove_campground(campground_id)
+
+        keys = self.campground_sites[campground_id] = set()
+        for site in campsites:
+            key = (campground_id, site.id)
+            keys.add(key)
+            self._all.add(key)
+            if site.is_accessible:
+                self._accessible.add(key)
+            self._types.setdefault(_fold(site.campsite_type), set()).add(key)
+
+            details = list(site.attributes) + list(site.site_details.values())
+            for attr in details:
+                name = _fold(attr.attribute_name)
+                self._attribute_names.setdefault(name, set()).add(key)
+                value = _fold(attr.attribute_value)
+                self._attributes.setdefault((name, value), set()).add(key)
+
+            for equip in site.permitted_equipment:
+                if equip.is_deactivated:
+                    continue
+                entry = (equip.max_length, key)
+                bisect.insort(
+                    self._equipment.setdefault(_fold(equip.equipment_name), []), entry
+                )
+                bisect.insort(self._any_equipment, entry)
+
+    def remove_campground(self, campground_id: str) -> None:
+        keys = self.campground_sites.pop(campground_id)
+        self._all -= keys
+        self._accessible -= keys
+        for postings in (
+            list(self._types.values())
+            + list(self._attributes.values())
+            + list(self._attribute_names.values())
+        ):
+            postings -= keys
+        for name, entries in list(self._equipment.items()):
+            self._equipment[name] = [e for e in entries if e[1] not in keys]
+        self._any_equipment = [e for e in self._any_equipment if e[1] not in keys]
+
+    def _equipment_sites(self, site_filter: SiteFilter) -> set[SiteKey]:
+        if site_filter.equipment is not None:
+            entries = self._equipment.get(_fold(site_filter.equipment), [])
+        else:
+            entries = self._any_equipment
+        start = bisect.bisect_left(entries, (site_filter.min_length or 0, ("", "")))
+        return {key for _, key in entries[start:]}
+
+    def site_ids(
+        self, site_filter: SiteFilter, campground_id: Optional[str] = None
+    ) -> set[str]:
+        # site ids matching the filter, in one campground or all of them
+        candidates: list[set[SiteKey]] = [
+            (
+                self.campground_sites.get(campground_id, set())
+                if campground_id is not None
+                else self._all
+            )
+        ]
+        if site_filter.equipment is not None or site_filter.min_length is not None:
+            candidates.append(self._equipment_sites(site_filter))
+        if site_filter.accessible is not None:
+            accessible = self._accessible
+            candidates.append(
+                accessible if site_filter.accessible else candidates[0] - accessible
+            )
+        if site_filter.campsite_types:
+            candidates.append(
+                set().union(
+                    *(
+                        self._types.get(_fold(t), set())
+                        for t in site_filter.campsite_types
+                    )
+                )
+            )
+        for name, value in site_filter.attributes.items():
+            if value:
+                candidates.append(
+                    self._attributes.get((_fold(name), _fold(value)), set())
+                )
+            else:
+                candidates.append(self._attribute_names.get(_fold(name), set()))
+
+        # smallest first, so the intersection shrinks as fast as possible
+        candidates.sort(key=len)
+        result = set(candidates[0])
+        for postings in candidates[1:]:
+            result &= postings
+            if not result:
+                break
+        return {site_id for _, site_id in result}
@@ -0,0 +1,231 @@
+import datetime as dt
+import json
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Any, Optional, Union
+
+from .availability_list import (
+    AvailabilityList,
+    CampgroundAvailability,
+    CampgroundAvailabilityList,
+    PathLike,
+    PermitAvailability,
+    PermitAvailabilityList,
+)
+from .rgapi.camp import CampsiteAvailabilityStatus
+
+# File layout: MAGIC, a little-endian uint32 header length, a JSON header, then
+# one fixed-width column per field, each aligned to COLUMN_ALIGN bytes so it can
+# be cast straight out of a memory map.
+MAGIC = b"RECSNAP1"
+COLUMN_ALIGN = 8
+
+KIND_CAMPGROUND = "campground"
+KIND_PERMIT = "permit"
+
+CAMPGROUND_COLUMNS = {"id": "I", "date": "i", "status": "B", "length": "i"}
+PERMIT_COLUMNS = {
+    "id": "I",
+    "date": "i",
+    "remaining": "i",
+    "total": "i",
+    "is_walkup": "B",
+}
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _encode_columns(
+    avail_list: AvailabilityList,
+) -> tuple[str, dict[str, Any], dict[str, array]]:
+    ids = sorted(set(avail.id for avail in avail_list.availability))
+    id_index = {id: i for i, id in enumerate(ids)}
+    tables: dict[str, Any] = {"id": ids}
+
+    if isinstance(avail_list, CampgroundAvailabilityList):
+        statuses = [status.value for status in CampsiteAvailabilityStatus]
+        status_index = {status: i for i, status in enumerate(statuses)}
+        tables["status"] = statuses
+        columns = {name: array(code) for name, code in CAMPGROUND_COLUMNS.items()}
+        for avail in avail_list.availability:
+            columns["id"].append(id_index[avail.id])
+            columns["date"].append(avail.date.toordinal())
+            columns["status"].append(status_index[avail.status.value])
+            columns["length"].append(avail.length)
+        return KIND_CAMPGROUND, tables, columns
+
+    if isinstance(avail_list, PermitAvailabilityList):
+        columns = {name: array(code) for name, code in PERMIT_COLUMNS.items()}
+        for avail in avail_list.availability:
+            columns["id"].append(id_index[avail.id])
+            columns["date"].append(avail.date.toordinal())
+            columns["remaining"].append(avail.remaining)
+            columns["total"].append(avail.total)
+            columns["is_walkup"].append(int(avail.is_walkup))
+        return KIND_PERMIT, tables, columns
+
+    raise SnapshotError(f"Can't snapshot {avail_list.__class__.__name__}")
+
+
+def save_snapshot(
+    path: PathLike,
+    avail_list: AvailabilityList,
+    meta: Optional[dict[str, Any]] = None,
+) -> None:
+    kind, tables, columns = _encode_columns(avail_list)
+    count = len(avail_list.availability)
+
+    column_specs: dict[str, dict[str, Any]] = {}
+    offset = 0
+    for name, col in columns.items():
+        column_specs[name] = {"typecode": col.typecode, "offset": offset}
+        offset += len(col) * col.itemsize
+        offset += -offset % COLUMN_ALIGN
+
+    header = {
+        "kind": kind,
+        "count": count,
+        "byteorder": sys.byteorder,
+        "meta": meta or {},
+        "tables": tables,
+        "columns": column_specs,
+    }
+    header_bytes = json.dumps(header).encode()
+    prefix_len = len(MAGIC) + 4 + len(header_bytes)
+    header_bytes += b" " * (-prefix_len % COLUMN_ALIGN)
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        for col in columns.values():
+            data = col.tobytes()
+            f.write(data)
+            f.write(b"\0" * (-len(data) % COLUMN_ALIGN))
+
+
+class Snapshot:
+    kind: str
+    count: int
+    meta: dict[str, Any]
+    tables: dict[str, list[str]]
+
+    def __init__(self, path: PathLike) -> None:
+        self.path = Path(path)
+        self._file = open(self.path, "rb")
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # empty files can't be mapped
+            self._file.close()
+            raise SnapshotError(f"{self.path} is not a snapshot file")
+        self._columns: dict[str, memoryview] = {}
+
+        try:
+            self._read_header()
+        except Exception:
+            self.close()
+            raise
+
+    def _read_header(self) -> None:
+        buf = self._mmap
+        if buf[: len(MAGIC)] != MAGIC:
+            raise SnapshotError(f"{self.path} is not a snapshot file")
+        (header_len,) = struct.unpack_from("<I", buf, len(MAGIC))
+        data_start = len(MAGIC) + 4 + header_len
+        header = json.loads(bytes(buf[len(MAGIC) + 4 : data_start]))
+
+        self.kind = header["kind"]
+        self.count = header["count"]
+        self.meta = header["meta"]
+        self.tables = header["tables"]
+        swap = header["byteorder"] != sys.byteorder
+
+        view = memoryview(buf)
+        for name, spec in header["columns"].items():
+            typecode = spec["typecode"]
+            start = data_start + spec["offset"]
+            size = self.count * array(typecode).itemsize
+            column = view[start : start + size].cast(typecode)
+            if swap and typecode not in ("b", "B"):
+                swapped = array(typecode, column)
+                swapped.byteswap()
+                column.release()
+                column = memoryview(swapped)
+            self._columns[name] = column
+        view.release()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "Snapshot":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def column(self, name: str) -> memoryview:
+        return self._columns[name]
+
+    @property
+    def ids(self) -> list[str]:
+        return self.tables["id"]
+
+    def to_list(self) -> Union[CampgroundAvailabilityList, PermitAvailabilityList]:
+        ids = self.tables["id"]
+        cols = self._columns
+        dates = [dt.date.fromordinal(d) for d in set(cols["date"])]
+        date_lookup = {d.toordinal(): d for d in dates}
+
+        if self.kind == KIND_CAMPGROUND:
+            statuses = [CampsiteAvailabilityStatus(s) for s in self.tables["status"]]
+            camp_availability = [
+                CampgroundAvailability(
+                    id=ids[id_idx],
+                    date=date_lookup[date],
+                    status=statuses[status_idx],
+                    length=length,
+                )
+                for id_idx, date, status_idx, length in zip(
+                    cols["id"], cols["date"], cols["status"], cols["length"]
+                )
+            ]
+            return CampgroundAvailabilityList(camp_availability)
+
+        if self.kind == KIND_PERMIT:
+            permit_availability = [
+                PermitAvailability(
+                    id=ids[id_idx],
+                    date=date_lookup[date],
+                    remaining=remaining,
+                    total=total,
+                    is_walkup=bool(is_walkup),
+                )
+                for id_idx, date, remaining, total, is_walkup in zip(
+                    cols["id"],
+                    cols["date"],
+                    cols["remaining"],
+                    cols["total"],
+                    cols["is_walkup"],
+                )
+            ]
+            return PermitAvailabilityList(permit_availability)
+
+        raise SnapshotError(f"Unknown snapshot kind {self.kind}")
+
+    def close(self) -> None:
+        for column in self._columns.values():
+            column.release()
+        self._columns = {}
+        if not self._mmap.closed:
+            self._mmap.close()
+        self._file.close()
+
+
+def load_snapshot(path: PathLike) -> Snapshot:
+    return Snapshot(path)
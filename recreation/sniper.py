@@ -0,0 +1,221 @@
+import datetime as dt
+import email.utils
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import apiclient.exceptions
+import requests
+
+from .availability_list import CampgroundAvailabilityList
+from .rgapi.camp import CampsiteAvailabilityStatus, RGApiCampgroundAvailability
+from .rgapi.client import RecreationGovClient, RecreationGovEndpoint
+
+CLOCK_SAMPLES = 8
+WARMUP_LEAD = 5.0
+# sleep until this close to a fire time, then spin
+SPIN_WINDOW = 0.005
+
+
+@dataclass
+class ClockOffset:
+    # server time = local time + offset
+    offset: float
+    # half width of the window the true offset is known to lie in
+    error: float
+    samples: int
+
+
+def _server_time(response: requests.Response) -> Optional[float]:
+    date_header = response.headers.get("Date")
+    if not date_header:
+        return None
+    return email.utils.parsedate_to_datetime(date_header).timestamp()
+
+
+def measure_clock_offset(
+    session: requests.Session,
+    url: str,
+    samples: int = CLOCK_SAMPLES,
+    clock: Callable[[], float] = time.time,
+) -> ClockOffset:
+    # The Date header only has one second resolution. Each response says the
+    # server clock read [server, server + 1) at some point between sending the
+    # request and reading the response, which bounds the offset; intersecting
+    # the bounds of several samples narrows it to well under a second.
+    low, high = float("-inf"), float("inf")
+    used = 0
+    for _ in range(samples):
+        sent = clock()
+        response = session.head(url, allow_redirects=False)
+        received = clock()
+        server = _server_time(response)
+        if server is None:
+            continue
+        sample_low = server - received
+        sample_high = server + 1 - sent
+        if sample_low > high or sample_high < low:
+            # inconsistent with earlier samples, the clock stepped; start over
+            low, high = sample_low, sample_high
+        else:
+            low, high = max(low, sample_low), min(high, sample_high)
+        used += 1
+
+    if used == 0:
+        raise ValueError(f"No Date header in responses from {url}")
+    return ClockOffset(offset=(low + high) / 2, error=(high - low) / 2, samples=used)
+
+
+def warm_pool(session: requests.Session, url: str, connections: int) -> None:
+    # open the connections concurrently so they all end up idle in the pool
+    with ThreadPoolExecutor(max_workers=connections) as executor:
+        list(
+            executor.map(
+                lambda _: session.head(url, allow_redirects=False),
+                range(connections),
+            )
+        )
+
+
+def wait_until(
+    target: float,
+    clock: Callable[[], float] = time.time,
+    sleep: Callable[[float], None] = time.sleep,
+) -> None:
+    remaining = target - clock()
+    if remaining > SPIN_WINDOW:
+        sleep(remaining - SPIN_WINDOW)
+    while clock() < target:
+        pass
+
+
+@dataclass
+class SnipeAttempt:
+    index: int
+    # all times are seconds relative to the release instant, in server time
+    fired: float
+    received: float
+    available: int
+    error: Optional[str] = None
+
+    @property
+    def latency(self) -> float:
+        return self.received - self.fired
+
+
+@dataclass
+class SnipeResult:
+    campground_id: str
+    month: dt.date
+    release: dt.datetime
+    clock: ClockOffset
+    attempts: list[SnipeAttempt]
+    availability: Optional[CampgroundAvailabilityList] = None
+
+    @property
+    def first_detection(self) -> Optional[SnipeAttempt]:
+        detected = [a for a in self.attempts if a.available > 0]
+        if not detected:
+            return None
+        return min(detected, key=lambda a: a.received)
+
+
+FetchMonth = Callable[[str, dt.date], RGApiCampgroundAvailability]
+
+
+class CampgroundSniper:
+    def __init__(
+        self,
+        campground_id: str,
+        month: dt.date,
+        release: dt.datetime,
+        burst: int = 8,
+        spacing: float = 0.05,
+        lead: float = 0.1,
+        client: Optional[RecreationGovClient] = None,
+        fetch: Optional[FetchMonth] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.campground_id = campground_id
+        self.month = month.replace(day=1)
+        self.release = release
+        self.burst = burst
+        self.spacing = spacing
+        self.lead = lead
+        self.client = client or RecreationGovClient(pool_size=burst)
+        self.fetch = fetch or self.client.get_campground_availability
+        self.clock = clock
+        self.sleep = sleep
+
+    @property
+    def probe_url(self) -> str:
+        return RecreationGovEndpoint.campground.format(id=self.campground_id)
+
+    def fire_times(self, offset: float) -> list[float]:
+        # local clock times for each request, starting `lead` seconds early
+        release_local = self.release.timestamp() - offset
+        start = release_local - self.lead
+        return [start + i * self.spacing for i in range(self.burst)]
+
+    def _attempt(
+        self, index: int, fire_at: float, offset: float
+    ) -> tuple[SnipeAttempt, Optional[CampgroundAvailabilityList]]:
+        release = self.release.timestamp() - offset
+        wait_until(fire_at, self.clock, self.sleep)
+        fired = self.clock()
+        try:
+            month = self.fetch(self.campground_id, self.month)
+        except apiclient.exceptions.APIClientError as exc:
+            attempt = SnipeAttempt(
+                index=index,
+                fired=fired - release,
+                received=self.clock() - release,
+                available=0,
+                error=str(exc),
+            )
+            return attempt, None
+        received = self.clock()
+
+        avail = CampgroundAvailabilityList.from_campground([month])
+        avail = avail.filter_status(CampsiteAvailabilityStatus.available)
+        attempt = SnipeAttempt(
+            index=index,
+            fired=fired - release,
+            received=received - release,
+            available=len(avail.availability),
+        )
+        return attempt, avail
+
+    def run(self, clock_offset: Optional[ClockOffset] = None) -> SnipeResult:
+        session = self.client.get_session()
+        if clock_offset is None:
+            clock_offset = measure_clock_offset(
+                session, self.probe_url, clock=self.clock
+            )
+        offset = clock_offset.offset
+        fire_times = self.fire_times(offset)
+
+        wait_until(fire_times[0] - WARMUP_LEAD, self.clock, self.sleep)
+        warm_pool(session, self.probe_url, self.burst)
+
+        with ThreadPoolExecutor(max_workers=self.burst) as executor:
+            outcomes = list(
+                executor.map(
+                    lambda args: self._attempt(args[0], args[1], offset),
+                    enumerate(fire_times),
+                )
+            )
+
+        snipe = SnipeResult(
+            campground_id=self.campground_id,
+            month=self.month,
+            release=self.release,
+            clock=clock_offset,
+            attempts=[attempt for attempt, _ in outcomes],
+        )
+        detection = snipe.first_detection
+        if detection is not None:
+            snipe.availability = outcomes[detection.index][1]
+        return snipe
@@ -0,0 +1,188 @@
+import datetime as dt
+import statistics
+from collections import Counter
+from dataclasses import dataclass, field
+from itertools import groupby
+from operator import attrgetter
+from typing import Hashable, Iterable, Optional, Sequence
+
+from .history import KIND_CAMPGROUND, HistoryStore, RunVersion
+from .rgapi.camp import CampsiteAvailabilityStatus
+
+OPENED_FROM = frozenset([CampsiteAvailabilityStatus.reserved.value])
+OPENED_TO = frozenset([CampsiteAvailabilityStatus.available.value])
+
+
+@dataclass
+class Opening:
+    site_id: str
+    night: dt.date
+    opened_at: dt.datetime
+
+    @property
+    def lead_days(self) -> int:
+        return (self.night - self.opened_at.date()).days
+
+
+@dataclass
+class CampgroundStats:
+    campground_id: str
+    first_poll: Optional[dt.datetime] = None
+    last_poll: Optional[dt.datetime] = None
+    polls: int = 0
+    reserved_nights: int = 0
+    reopened_nights: int = 0
+    openings: list[Opening] = field(default_factory=list)
+
+    @property
+    def observed_days(self) -> float:
+        if self.first_poll is None or self.last_poll is None:
+            return 0.0
+        return (self.last_poll - self.first_poll).total_seconds() / 86400
+
+    @property
+    def openings_per_day(self) -> float:
+        if self.observed_days == 0:
+            return 0.0
+        return len(self.openings) / self.observed_days
+
+    @property
+    def reopen_rate(self) -> float:
+        # share of site-nights seen reserved that were later seen available
+        if self.reserved_nights == 0:
+            return 0.0
+        return self.reopened_nights / self.reserved_nights
+
+    # hours and weekdays are in UTC unless tz says otherwise, never the
+    # machine's local time
+    def by_hour(self, tz: dt.tzinfo = dt.timezone.utc) -> Counter:
+        return Counter(o.opened_at.astimezone(tz).hour for o in self.openings)
+
+    def by_weekday(self, tz: dt.tzinfo = dt.timezone.utc) -> Counter:
+        return Counter(o.opened_at.astimezone(tz).weekday() for o in self.openings)
+
+    def by_night(self) -> Counter:
+        return Counter(o.night for o in self.openings)
+
+    def by_month(self) -> Counter:
+        return Counter(o.night.replace(day=1) for o in self.openings)
+
+    def lead_time_quantiles(self, n: int = 4) -> list[float]:
+        leads = [o.lead_days for o in self.openings]
+        if len(leads) < 2:
+            return [float(x) for x in leads]
+        return statistics.quantiles(leads, n=n)
+
+
+def find_openings(
+    versions: Iterable[RunVersion],
+    opened_from: frozenset[str] = OPENED_FROM,
+    opened_to: frozenset[str] = OPENED_TO,
+) -> tuple[list[Opening], int, int]:
+    # Replays each site's run versions in poll order, tracking the last known
+    # value of every night, and reports the nights that went from one of
+    # `opened_from` to one of `opened_to`. Also returns how many site-nights
+    # were ever seen in `opened_from`, and how many of those later opened.
+    openings: list[Opening] = []
+    seen_from: set[tuple[str, dt.date]] = set()
+    reopened: set[tuple[str, dt.date]] = set()
+
+    ordered = sorted(versions, key=attrgetter("site_id", "valid_from"))
+    for site_id, site_versions in groupby(ordered, key=attrgetter("site_id")):
+        nights: dict[dt.date, str] = {}
+        for valid_from, poll_versions in groupby(
+            site_versions, key=attrgetter("valid_from")
+        ):
+            for version in poll_versions:
+                night = version.date
+                while night < version.end_date:
+                    previous = nights.get(night)
+                    if previous in opened_from and version.value in opened_to:
+                        openings.append(Opening(site_id, night, valid_from))
+                        reopened.add((site_id, night))
+                    if version.value in opened_from:
+                        seen_from.add((site_id, night))
+                    nights[night] = version.value
+                    night += dt.timedelta(days=1)
+
+    openings.sort(key=attrgetter("opened_at", "site_id", "night"))
+    return openings, len(seen_from), len(reopened)
+
+
+def campground_stats(
+    store: HistoryStore,
+    campground_id: str,
+    start_date: Optional[dt.date] = None,
+    end_date: Optional[dt.date] = None,
+) -> CampgroundStats:
+    stats = CampgroundStats(campground_id=campground_id)
+
+    polls = store.polls(KIND_CAMPGROUND, campground_id)
+    if not polls:
+        return stats
+    stats.first_poll = polls[0].polled_at
+    stats.last_poll = polls[-1].last_polled_at
+    stats.polls = sum(p.count for p in polls)
+
+    versions = store.history(KIND_CAMPGROUND, campground_id, start_date, end_date)
+    openings, reserved, reopened = find_openings(versions)
+    if start_date or end_date:
+        openings = [
+            o
+            for o in openings
+            if (start_date is None or o.night >= start_date)
+            and (end_date is None or o.night <= end_date)
+        ]
+    stats.openings = openings
+    stats.reserved_nights = reserved
+    stats.reopened_nights = reopened
+    return stats
+
+
+def all_campground_stats(
+    store: HistoryStore,
+    campground_ids: Optional[Sequence[str]] = None,
+    start_date: Optional[dt.date] = None,
+    end_date: Optional[dt.date] = None,
+) -> list[CampgroundStats]:
+    if campground_ids is None:
+        campground_ids = [sid for _, sid in store.sources(KIND_CAMPGROUND)]
+    return [
+        campground_stats(store, camp_id, start_date, end_date)
+        for camp_id in campground_ids
+    ]
+
+
+def opening_rates(
+    stats: Iterable[CampgroundStats],
+) -> dict[tuple[str, dt.date], float]:
+    # openings per observed day for each (campground, month of night)
+    rates: dict[tuple[str, dt.date], float] = {}
+    for camp_stats in stats:
+        if camp_stats.observed_days == 0:
+            continue
+        for month, count in camp_stats.by_month().items():
+            rates[(camp_stats.campground_id, month)] = count / camp_stats.observed_days
+    return rates
+
+
+def allocate_intervals(
+    rates: dict[Hashable, float],
+    requests_per_hour: float,
+    min_interval: float,
+    max_interval: float,
+) -> dict[Hashable, float]:
+    # Split a request budget across keys in proportion to their opening rate,
+    # with a floor so quiet keys still get polled every max_interval.
+    if not rates:
+        return {}
+    floor = 3600 / max_interval
+    spare = max(requests_per_hour - floor * len(rates), 0)
+    total = sum(rates.values())
+
+    intervals: dict[Hashable, float] = {}
+    for key, rate in rates.items():
+        share = spare * rate / total if total else spare / len(rates)
+        per_hour = floor + share
+        intervals[key] = min(max(3600 / per_hour, min_interval), max_interval)
+    return intervals
@@ -0,0 +1,135 @@
+import datetime as dt
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Iterable, Iterator, Optional, Union
+
+from .availability_list import CampgroundAvailability, CampgroundAvailabilityList
+from .diff import AvailabilityChange
+
+if TYPE_CHECKING:
+    from .watch import WatchQuery
+
+# nights per index bucket
+BUCKET_DAYS = 7
+
+
+@dataclass
+class Subscription:
+    subscription_id: str
+    query: "WatchQuery"
+    tenant: Optional[str] = None
+
+
+def _nights(start_date: dt.date, end_date: dt.date) -> tuple[int, int]:
+    return start_date.toordinal(), end_date.toordinal()
+
+
+class SubscriptionIndex:
+    # Inverted index from (campground, bucket of nights) to the subscriptions
+    # whose date window covers those nights. When a diff arrives only the
+    # subscriptions sharing a bucket with a changed site-night are looked at,
+    # and they only filter the runs that overlap a change.
+    def __init__(self, bucket_days: int = BUCKET_DAYS) -> None:
+        self.bucket_days = bucket_days
+        self.subscriptions: dict[str, Subscription] = {}
+        self._buckets: dict[tuple[str, int], set[str]] = {}
+        # insertion order, so matches come out in the order subscriptions were added
+        self._order: dict[str, int] = {}
+        self._added = 0
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def __iter__(self) -> Iterator[Subscription]:
+        return iter(self.subscriptions.values())
+
+    def _buckets_for(self, first_night: int, last_night: int) -> range:
+        return range(
+            first_night // self.bucket_days, last_night // self.bucket_days + 1
+        )
+
+    def _keys(self, sub: Subscription) -> Iterator[tuple[str, int]]:
+        # a query matches runs with a night between its start and end dates
+        first, last = _nights(sub.query.start_date, sub.query.end_date)
+        for bucket in self._buckets_for(first, last):
+            yield sub.query.campground_id, bucket
+
+    def add(self, sub: Subscription) -> None:
+        if sub.subscription_id in self.subscriptions:
+            self.remove(sub.subscription_id)
+        self.subscriptions[sub.subscription_id] = sub
+        self._order[sub.subscription_id] = self._added
+        self._added += 1
+        for key in self._keys(sub):
+            self._buckets.setdefault(key, set()).add(sub.subscription_id)
+
+    def remove(self, subscription_id: str) -> None:
+        sub = self.subscriptions.pop(subscription_id)
+        del self._order[subscription_id]
+        for key in self._keys(sub):
+            ids = self._buckets[key]
+            ids.discard(subscription_id)
+            if not ids:
+                del self._buckets[key]
+
+    def campground_ids(self) -> list[str]:
+        return list(dict.fromkeys(s.query.campground_id for s in self))
+
+    def for_campground(self, campground_id: str) -> list[Subscription]:
+        return [s for s in self if s.query.campground_id == campground_id]
+
+    def candidates(
+        self,
+        campground_id: str,
+        runs: Iterable[Union[AvailabilityChange, CampgroundAvailability]],
+    ) -> list[Subscription]:
+        # Subscriptions whose window and sites overlap any of the runs.
+        runs = list(runs)
+        ids: set[str] = set()
+        for run in runs:
+            first, last = _nights(run.date, run.end_date - dt.timedelta(days=1))
+            for bucket in self._buckets_for(first, last):
+                ids |= self._buckets.get((campground_id, bucket), set())
+
+        subs = []
+        for sub_id in sorted(ids, key=self._order.__getitem__):
+            sub = self.subscriptions[sub_id]
+            query = sub.query
+            if any(
+                run.date <= query.end_date
+                and run.end_date > query.start_date
+                and (not query.site_ids or run.id in query.site_ids)
+                for run in runs
+            ):
+                subs.append(sub)
+        return subs
+
+    def match(
+        self,
+        campground_id: str,
+        current: CampgroundAvailabilityList,
+        changes: Iterable[AvailabilityChange],
+    ) -> list[tuple[Subscription, CampgroundAvailability]]:
+        # Only the runs of `current` that overlap a change can produce a match,
+        # and only subscriptions overlapping one of those runs are evaluated.
+        changed: dict[str, list[AvailabilityChange]] = {}
+        for change in changes:
+            changed.setdefault(change.id, []).append(change)
+        if not changed:
+            return []
+
+        touched = CampgroundAvailabilityList(
+            [
+                avail
+                for avail in current.availability
+                if any(
+                    change.date < avail.end_date and avail.date < change.end_date
+                    for change in changed.get(avail.id, [])
+                )
+            ]
+        )
+
+        matches = []
+        for sub in self.candidates(campground_id, touched.availability):
+            for avail in sub.query.apply(touched).availability:
+                matches.append((sub, avail))
+        return matches
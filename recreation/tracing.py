@@ -0,0 +1,334 @@
+import contextvars
+import enum
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from os import PathLike
+from typing import Any, Callable, Optional, Protocol, TypeVar, Union
+
+from .profiling import StageTiming, add_stage_hook, remove_stage_hook
+
+SERVICE_NAME = "recreation"
+
+F = TypeVar("F", bound=Callable[..., Any])
+AttributeValue = Union[str, bool, int, float, list]
+
+
+class SpanKind(int, enum.Enum):
+    # OTLP span kinds
+    internal = 1
+    client = 3
+
+
+class StatusCode(int, enum.Enum):
+    unset = 0
+    ok = 1
+    error = 2
+
+
+def _new_id(n_bytes: int) -> str:
+    return os.urandom(n_bytes).hex()
+
+
+@dataclass
+class SpanEvent:
+    name: str
+    time_unix_nano: int
+    attributes: dict[str, AttributeValue] = field(default_factory=dict)
+
+
+class Span:
+    # A timed operation in a trace. Spans started inside the `with` block,
+    # in this thread or in tasks wrapped with traced_task, become its
+    # children.
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        parent: Optional["Span"],
+        kind: SpanKind = SpanKind.internal,
+        attributes: Optional[dict[str, AttributeValue]] = None,
+        start_time_unix_nano: Optional[int] = None,
+    ) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else _new_id(16)
+        self.span_id = _new_id(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.attributes: dict[str, AttributeValue] = dict(attributes or {})
+        self.events: list[SpanEvent] = []
+        self.status = StatusCode.unset
+        self.status_message = ""
+        self.start_time_unix_nano = start_time_unix_nano or time.time_ns()
+        self.end_time_unix_nano: Optional[int] = None
+        self._token: Optional[contextvars.Token] = None
+
+    def is_recording(self) -> bool:
+        return self.end_time_unix_nano is None
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        self.attributes[key] = value
+
+    def set_attributes(self, attributes: dict[str, AttributeValue]) -> None:
+        self.attributes.update(attributes)
+
+    def add_event(self, name: str, attributes: Optional[dict] = None) -> None:
+        self.events.append(SpanEvent(name, time.time_ns(), dict(attributes or {})))
+
+    def record_exception(self, exc: BaseException) -> None:
+        self.status = StatusCode.error
+        self.status_message = str(exc)
+        self.add_event(
+            "exception",
+            {"exception.type": type(exc).__name__, "exception.message": str(exc)},
+        )
+
+    def end(self, end_time_unix_nano: Optional[int] = None) -> None:
+        if self.end_time_unix_nano is not None:
+            return
+        self.end_time_unix_nano = end_time_unix_nano or time.time_ns()
+        self.tracer._finish(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current.set(self)
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if exc is not None:
+            self.record_exception(exc)
+        if self._token is not None:
+            _current.reset(self._token)
+        self.end()
+
+    def to_otlp(self) -> dict[str, Any]:
+        span: dict[str, Any] = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": int(self.kind),
+            "startTimeUnixNano": str(self.start_time_unix_nano),
+            "endTimeUnixNano": str(self.end_time_unix_nano),
+            "attributes": _otlp_attributes(self.attributes),
+            "events": [
+                {
+                    "timeUnixNano": str(event.time_unix_nano),
+                    "name": event.name,
+                    "attributes": _otlp_attributes(event.attributes),
+                }
+                for event in self.events
+            ],
+            "status": {"code": int(self.status)},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoSpan:
+    # what span() hands out while tracing is off, so instrumented code pays
+    # one global lookup and nothing else
+    __slots__ = ()
+
+    def is_recording(self) -> bool:
+        return False
+
+    def set_attribute(self, key: str, value: AttributeValue) -> None:
+        pass
+
+    def set_attributes(self, attributes: dict[str, AttributeValue]) -> None:
+        pass
+
+    def add_event(self, name: str, attributes: Optional[dict] = None) -> None:
+        pass
+
+    def record_exception(self, exc: BaseException) -> None:
+        pass
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        pass
+
+
+_no_span = _NoSpan()
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "recreation_span", default=None
+)
+
+
+def _otlp_value(value: AttributeValue) -> dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [_otlp_value(v) for v in value]}}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: dict[str, AttributeValue]) -> list[dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(v)} for key, v in attributes.items()]
+
+
+def otlp_request(spans: list[Span], service_name: str = SERVICE_NAME) -> dict:
+    # an OTLP/JSON ExportTraceServiceRequest, what a collector's /v1/traces
+    # endpoint or otlpjsonfile receiver takes
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": _otlp_attributes({"service.name": service_name})
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": SERVICE_NAME},
+                        "spans": [span.to_otlp() for span in spans],
+                    }
+                ],
+            }
+        ]
+    }
+
+
+class SpanExporter(Protocol):
+    def export(self, spans: list[Span]) -> None: ...
+
+    def shutdown(self) -> None: ...
+
+
+class FileSpanExporter:
+    # Appends each finished trace to a file as one line of OTLP/JSON.
+    def __init__(
+        self, path: Union[str, PathLike], service_name: str = SERVICE_NAME
+    ) -> None:
+        self.path = path
+        self.service_name = service_name
+        self._file = open(path, "a")
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        line = json.dumps(otlp_request(spans, self.service_name))
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class MemorySpanExporter:
+    # Keeps finished spans in memory, a collector stand-in for tests
+    def __init__(self) -> None:
+        self.spans: list[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, spans: list[Span]) -> None:
+        with self._lock:
+            self.spans += spans
+
+    def shutdown(self) -> None:
+        pass
+
+    def named(self, name: str) -> list[Span]:
+        return [span for span in self.spans if span.name == name]
+
+
+class Tracer:
+    # Collects the spans of each trace and exports them together once its
+    # root span ends, so the export holds one trace per query.
+    def __init__(self, exporter: SpanExporter) -> None:
+        self.exporter = exporter
+        self._pending: dict[str, list[Span]] = {}
+        self._lock = threading.Lock()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            spans = self._pending.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent_span_id is not None:
+                return
+            del self._pending[span.trace_id]
+        self.exporter.export(spans)
+
+    def _stage(self, timing: StageTiming) -> None:
+        # pipeline stages become child spans of the span they ran in
+        parent = _current.get()
+        if parent is None:
+            return
+        end = time.time_ns()
+        Span(
+            self,
+            timing.name,
+            parent,
+            start_time_unix_nano=end - int(timing.elapsed * 1e9),
+        ).end(end)
+
+    def shutdown(self) -> None:
+        # exports whatever traces never saw their root end
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for spans in pending:
+            self.exporter.export(spans)
+        self.exporter.shutdown()
+
+
+_tracer: Optional[Tracer] = None
+
+
+def set_tracer(tracer: Optional[Tracer]) -> None:
+    global _tracer
+    if _tracer is not None:
+        remove_stage_hook(_tracer._stage)
+    _tracer = tracer
+    if tracer is not None:
+        add_stage_hook(tracer._stage)
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def span(
+    name: str,
+    attributes: Optional[dict[str, AttributeValue]] = None,
+    kind: SpanKind = SpanKind.internal,
+) -> Any:
+    # a child of the current span, or a new trace when there is none
+    tracer = _tracer
+    if tracer is None:
+        return _no_span
+    return Span(tracer, name, _current.get(), kind, attributes)
+
+
+def current_span() -> Any:
+    if _tracer is None:
+        return _no_span
+    return _current.get() or _no_span
+
+
+def traced_task(name: str, func: F) -> F:
+    # Wraps func for an executor so each call runs in a span under the
+    # current one, timing how long it waited in the executor's queue
+    tracer = _tracer
+    if tracer is None:
+        return func
+    parent = _current.get()
+    submitted = time.time_ns()
+
+    def run(*args, **kwargs):
+        started = time.time_ns()
+        with Span(tracer, name, parent, start_time_unix_nano=started) as task:
+            task.set_attribute("executor.queue_wait_ms", (started - submitted) / 1e6)
+            return func(*args, **kwargs)
+
+    return run  # type: ignore
@@ -0,0 +1,234 @@
+import datetime as dt
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Optional
+
+import apiclient.exceptions
+
+from .availability_list import CampgroundAvailability, CampgroundAvailabilityList
+from .core import DEFAULT_INTERVAL, MAX_INTERVAL, MIN_INTERVAL
+from .diff import AvailabilityChange, opened_availability
+from .rgapi.camp import CampsiteAvailabilityStatus
+from .subscriptions import Subscription, SubscriptionIndex
+from .tracing import span
+
+# interval multipliers applied after each poll
+CHANGED_FACTOR = 0.5
+UNCHANGED_FACTOR = 1.25
+THROTTLED_FACTOR = 2.0
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class WatchQuery:
+    campground_id: str
+    start_date: dt.date
+    end_date: dt.date
+    length: Optional[int] = None
+    days_of_week: Optional[list[int]] = None
+    site_ids: Optional[list[str]] = None
+    status: CampsiteAvailabilityStatus = CampsiteAvailabilityStatus.available
+
+    @staticmethod
+    def from_dict(data: dict[str, Any]) -> "WatchQuery":
+        start_date = dt.date.fromisoformat(data["start_date"])
+        end_date = dt.date.fromisoformat(data.get("end_date") or data["start_date"])
+        return WatchQuery(
+            campground_id=str(data["campground_id"]),
+            start_date=start_date,
+            end_date=end_date,
+            length=data.get("length"),
+            days_of_week=data.get("days_of_week"),
+            site_ids=(
+                [str(s) for s in data["site_ids"]] if data.get("site_ids") else None
+            ),
+            status=CampsiteAvailabilityStatus[data.get("status", "available")],
+        )
+
+    def apply(self, avail: CampgroundAvailabilityList) -> CampgroundAvailabilityList:
+        avail = avail.filter_dates(
+            self.start_date, self.end_date, exclude_start_day=True
+        )
+        avail = avail.filter_days_of_week(self.days_of_week)
+        if self.site_ids:
+            avail = avail.filter_id(self.site_ids)
+        avail = avail.filter_status(self.status)
+        if self.length:
+            avail = avail.filter_length(self.length)
+        return avail
+
+
+@dataclass
+class WatchEvent:
+    query: WatchQuery
+    availability: CampgroundAvailability
+    detected_at: dt.datetime
+
+
+@dataclass(order=True)
+class CampgroundSchedule:
+    next_poll: float
+    campground_id: str = field(compare=False)
+    interval: float = field(compare=False, default=DEFAULT_INTERVAL)
+    polls: int = field(compare=False, default=0)
+    changes: int = field(compare=False, default=0)
+    errors: int = field(compare=False, default=0)
+
+
+def _is_throttled(exc: Exception) -> bool:
+    if isinstance(exc, apiclient.exceptions.ServerError):
+        return True
+    return isinstance(exc, apiclient.exceptions.ClientError) and exc.status_code == 429
+
+
+FetchFunc = Callable[[str, dt.date, dt.date], CampgroundAvailabilityList]
+
+
+class CampgroundWatcher:
+    def __init__(
+        self,
+        queries: Iterable[WatchQuery],
+        on_event: Callable[[WatchEvent], None],
+        fetch: Optional[FetchFunc] = None,
+        interval: float = DEFAULT_INTERVAL,
+        min_interval: float = MIN_INTERVAL,
+        max_interval: float = MAX_INTERVAL,
+        emit_initial: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.queries: dict[str, list[WatchQuery]] = {}
+        self.index = SubscriptionIndex()
+        for query in queries:
+            self.queries.setdefault(query.campground_id, []).append(query)
+            self.index.add(Subscription(str(len(self.index)), query))
+
+        self.on_event = on_event
+        self.fetch = fetch or CampgroundAvailabilityList.fetch_availability
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.emit_initial = emit_initial
+        self.clock = clock
+        self.sleep = sleep
+
+        self.snapshots: dict[str, CampgroundAvailabilityList] = {}
+        self.schedules = {
+            camp_id: CampgroundSchedule(
+                next_poll=clock(),
+                campground_id=camp_id,
+                interval=self._clamp(interval),
+            )
+            for camp_id in self.queries
+        }
+        self._queue = list(self.schedules.values())
+        heapq.heapify(self._queue)
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _window(self, campground_id: str) -> tuple[dt.date, dt.date]:
+        queries = self.queries[campground_id]
+        return (
+            min(q.start_date for q in queries),
+            max(q.end_date for q in queries),
+        )
+
+    def _matching_events(
+        self,
+        campground_id: str,
+        current: CampgroundAvailabilityList,
+        opened: Optional[list[AvailabilityChange]],
+    ) -> list[WatchEvent]:
+        # opened is None on the first poll, when there's nothing to diff against
+        now = dt.datetime.now(dt.timezone.utc)
+        if opened is None:
+            if not self.emit_initial:
+                return []
+            return [
+                WatchEvent(query, avail, now)
+                for query in self.queries[campground_id]
+                for avail in query.apply(current).availability
+            ]
+
+        return [
+            WatchEvent(sub.query, avail, now)
+            for sub, avail in self.index.match(campground_id, current, opened)
+        ]
+
+    def poll(self, schedule: CampgroundSchedule) -> list[WatchEvent]:
+        with span("CampgroundWatcher.poll") as poll:
+            events = self._poll(schedule, poll)
+            if poll.is_recording():
+                poll.set_attributes(
+                    {"events": len(events), "interval_s": schedule.interval}
+                )
+            return events
+
+    def _poll(self, schedule: CampgroundSchedule, poll: Any) -> list[WatchEvent]:
+        camp_id = schedule.campground_id
+        start_date, end_date = self._window(camp_id)
+        schedule.polls += 1
+        if poll.is_recording():
+            poll.set_attributes(
+                {
+                    "campground_id": camp_id,
+                    "start_date": start_date.isoformat(),
+                    "end_date": end_date.isoformat(),
+                    "queries": len(self.queries[camp_id]),
+                }
+            )
+
+        try:
+            current = self.fetch(camp_id, start_date, end_date)
+        except apiclient.exceptions.APIClientError as exc:
+            schedule.errors += 1
+            poll.record_exception(exc)
+            if _is_throttled(exc):
+                poll.set_attribute("throttled", True)
+                schedule.interval = self._clamp(schedule.interval * THROTTLED_FACTOR)
+            return []
+
+        previous = self.snapshots.get(camp_id)
+        self.snapshots[camp_id] = current
+
+        opened: Optional[list[AvailabilityChange]] = None
+        if previous is not None:
+            opened = list(opened_availability(previous, current))
+            poll.set_attribute("opened", len(opened))
+            if opened:
+                schedule.changes += 1
+                schedule.interval = self._clamp(schedule.interval * CHANGED_FACTOR)
+            else:
+                schedule.interval = self._clamp(schedule.interval * UNCHANGED_FACTOR)
+
+        events = self._matching_events(camp_id, current, opened)
+        for event in events:
+            # a failing handler must not stop the remaining events or the watcher
+            try:
+                self.on_event(event)
+            except Exception as exc:
+                poll.record_exception(exc)
+                logger.exception("watch event handler failed for %s", camp_id)
+        return events
+
+    def step(self) -> list[WatchEvent]:
+        schedule = heapq.heappop(self._queue)
+        delay = schedule.next_poll - self.clock()
+        if delay > 0:
+            self.sleep(delay)
+
+        try:
+            events = self.poll(schedule)
+        finally:
+            schedule.next_poll = self.clock() + schedule.interval
+            heapq.heappush(self._queue, schedule)
+        return events
+
+    def run(self, max_polls: Optional[int] = None) -> None:
+        polls = 0
+        while self._queue and (max_polls is None or polls < max_polls):
+            self.step()
+            polls += 1
@@ -6,30 +6,65 @@ camping.py
     - info
     - avail
     - check
+    - near
+    - catalog
+    - diff
+    - watch
+    - snipe
+    - stats
   - permit
     - info
     - avail
+    - check
+    - near
+    - index
+  - shell
+  - serve
 """
 
-import dataclasses
 import datetime as dt
-from concurrent.futures import ThreadPoolExecutor
-from typing import Optional
+import json
+import sys
+from typing import TYPE_CHECKING, Optional
 
 import typer
 from rich import box
 from rich.console import Console
+from rich.live import Live
 from rich.table import Table
 from rich.text import Text
 
-from recreation.availability_list import CampgroundAvailabilityList
-from recreation.models import Campground, Permit, RGApiAlert
-from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.core import (
+    DEFAULT_HOST,
+    DEFAULT_INTERVAL,
+    DEFAULT_PORT,
+    MAX_INTERVAL,
+    MAX_WAIT,
+    MIN_INTERVAL,
+    MONTH_TTL,
+    POOL_NUM_WORKERS,
+)
+from recreation.output import OutputFormat, RowWriter
+from recreation.profiling import RENDER, timed_stage
+from recreation.ratelimit import DEFAULT_BURST, DEFAULT_RATE, RateLimiter
+
+if TYPE_CHECKING:
+    from recreation.availability_list import (
+        CampgroundAvailabilityList,
+        PermitAvailabilityList,
+    )
+    from recreation.models import Campground, Permit
+    from recreation.profiling import StageProfile
+    from recreation.rgapi.client import RecreationGovClient
+    from recreation.rgapi.extra import RGApiAlert
+    from recreation.session import RecreationSession
+    from recreation.watch import WatchQuery
 
 console = Console()
+err_console = Console(stderr=True)
 
 
-def alert_table(alerts: list[RGApiAlert]) -> Optional[Table]:
+def alert_table(alerts: list["RGApiAlert"]) -> Optional[Table]:
     alerttab = Table(
         title="Alerts", box=box.HORIZONTALS, style="red", show_header=False
     )
@@ -42,6 +77,14 @@ def alert_table(alerts: list[RGApiAlert]) -> Optional[Table]:
     return alerttab
 
 
+def rate_limited_client(rate: float, workers: int) -> "RecreationGovClient":
+    # one request budget for the command, leaving the process default alone
+    from recreation.rgapi.client import RecreationGovClient
+
+    limiter = RateLimiter(rate=rate, burst=max(1, int(rate)))
+    return RecreationGovClient(pool_size=workers, rate_limiter=limiter)
+
+
 app = typer.Typer(help="recreation.gov camping and permit checker")
 
 campground_app = typer.Typer(
@@ -53,10 +96,86 @@ permit_app = typer.Typer(help="commands for checking permits", add_completion=Fa
 app.add_typer(permit_app, name="permit")
 
 
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(
+        False, "--profile", help="Print the time spent in each pipeline stage"
+    ),
+    profile_dump: str = typer.Option(
+        None, "--profile-dump", help="Write cProfile stats of the run to file"
+    ),
+    trace: str = typer.Option(
+        None, "--trace", help="Append OTLP/JSON traces of each query to file"
+    ),
+):
+    if trace:
+        from recreation.tracing import FileSpanExporter, Tracer, set_tracer
+
+        tracer = Tracer(FileSpanExporter(trace))
+        set_tracer(tracer)
+
+        def stop_tracing():
+            set_tracer(None)
+            tracer.shutdown()
+
+        ctx.call_on_close(stop_tracing)
+
+    if profile:
+        from recreation.profiling import StageProfile
+
+        stage_profile = StageProfile()
+        # closes in reverse, so the profile stops before it is printed
+        ctx.call_on_close(lambda: print_stage_profile(stage_profile))
+        ctx.with_resource(stage_profile)
+
+    if profile_dump:
+        from recreation.profiling import ThreadProfiler
+
+        profiler = ThreadProfiler()
+
+        def dump_profile():
+            profiler.stop()
+            profiler.dump(profile_dump)
+            err_console.print(f"cProfile stats written to {profile_dump}")
+
+        ctx.call_on_close(dump_profile)
+        profiler.start()
+
+
+def print_stage_profile(stage_profile: "StageProfile") -> None:
+    wall = stage_profile.wall
+    table = Table(
+        title="Pipeline stages",
+        caption=f"{wall:.3f}s wall clock; stages in worker threads overlap",
+        box=box.SIMPLE_HEAD,
+    )
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Total (s)", justify="right")
+    table.add_column("Self (s)", justify="right")
+    table.add_column("Self % of wall", justify="right")
+    for total in stage_profile.stages():
+        table.add_row(
+            total.name,
+            str(total.calls),
+            f"{total.elapsed:.3f}",
+            f"{total.self_elapsed:.3f}",
+            f"{100 * total.self_elapsed / wall:.1f}" if wall else "",
+        )
+    err_console.print(table)
+
+
 @campground_app.command("info", help="get info about a campground")
 def campground_info(camp_id: str):
+    from recreation.models import Campground
+
     camp = Campground.fetch(camp_id, fetch_all=True)
+    print_campground(camp)
+
 
+@timed_stage(RENDER)
+def print_campground(camp: "Campground") -> None:
     name = Text(camp.name, style="bold blue")
     console.print(name)
 
@@ -105,18 +224,70 @@ def campground_avail(
     site_ids: str = typer.Option(None, "--site-ids", "-i", help="Site IDs"),
     length: int = typer.Option(None, "--length", "-l", help="Booking window length"),
     status: str = typer.Option(None, help="Campsite status"),
+    equipment: str = typer.Option(
+        None, help="Equipment the site must permit, e.g. Trailer"
+    ),
+    equipment_length: int = typer.Option(
+        None, help="Equipment length in feet the site must fit"
+    ),
+    accessible: Optional[bool] = typer.Option(
+        None, "--accessible/--not-accessible", help="Accessible sites only, or none"
+    ),
+    attribute: Optional[list[str]] = typer.Option(
+        None, help="Site attribute NAME=VALUE, or NAME for any value"
+    ),
+    save: str = typer.Option(None, help="Save fetched availability snapshot to file"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
 ):
+    from recreation.availability_list import CampgroundAvailabilityList
+    from recreation.models import Campground
+    from recreation.rgapi.camp import CampsiteAvailabilityStatus
+    from recreation.site_index import CampsiteIndex, SiteFilter
+
     if not end_date:
         end_date = start_date
 
     sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
     edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
 
-    camp = Campground.fetch(camp_id, fetch_all=True)
+    site_filter = SiteFilter(
+        equipment=equipment,
+        min_length=equipment_length,
+        accessible=accessible,
+        attributes=SiteFilter.parse_attributes(attribute or []),
+    )
+    if site_filter.is_empty:
+        camp, avail = Campground.fetch_with_availability(camp_id, sdate, edate)
+    else:
+        # campsites first, so only the matching sites' availability is kept
+        # and nothing more is fetched when none match
+        camp = Campground.fetch(camp_id, fetch_all=True)
+        index = CampsiteIndex()
+        index.add_campground(
+            camp.id, [site.api_campsite for site in camp.campsites.values()]
+        )
+        attr_site_ids = index.site_ids(site_filter, camp.id)
+        avail = (
+            CampgroundAvailabilityList.fetch_availability(
+                camp.id, sdate, edate, client=camp.client, site_ids=attr_site_ids
+            )
+            if attr_site_ids
+            else CampgroundAvailabilityList([])
+        )
 
-    console.print(alert_table(camp.alerts))
+    if output_format == OutputFormat.table:
+        console.print(alert_table(camp.alerts))
 
-    avail = camp.fetch_availability(sdate, edate)
+    if save:
+        avail.save(
+            save,
+            meta={
+                "campground_id": camp.id,
+                "fetched_at": dt.datetime.now(dt.timezone.utc).isoformat(),
+            },
+        )
     avail = avail.filter_dates(sdate, edate, exclude_start_day=True)
 
     if days_of_week:
@@ -134,6 +305,40 @@ def campground_avail(
         status_enum = CampsiteAvailabilityStatus[status]
         avail = avail.filter_status(status_enum)
 
+    print_campground_avail(camp, avail, output_format)
+
+
+@timed_stage(RENDER)
+def print_campground_avail(
+    camp: "Campground",
+    avail: "CampgroundAvailabilityList",
+    output_format: OutputFormat,
+) -> None:
+    if output_format != OutputFormat.table:
+        fields = [
+            "campground_id",
+            "campsite_name",
+            "campsite_id",
+            "start_date",
+            "end_date",
+            "length",
+            "status",
+        ]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for a in avail.availability:
+                writer.write(
+                    {
+                        "campground_id": camp.id,
+                        "campsite_name": camp.campsites[a.id].name,
+                        "campsite_id": a.id,
+                        "start_date": a.date,
+                        "end_date": a.date + dt.timedelta(days=a.length),
+                        "length": a.length,
+                        "status": a.status,
+                    }
+                )
+        return
+
     availtab = Table(title="Available campsites", box=box.SIMPLE_HEAD)
     availtab.add_column("Campsite name")
     availtab.add_column("Campsite ID")
@@ -154,11 +359,12 @@ def campground_avail(
     console.print(availtab)
 
 
-@campground_app.command(
-    "check", help="[DISABLED] check availability for one or more campgrounds"
-)
+@campground_app.command("check", help="check availability for one or more campgrounds")
 def campground_check(
-    camp_ids: str,
+    camp_ids: str = typer.Argument(None),
+    from_file: Optional[list[str]] = typer.Option(
+        None, "--from-file", "-f", help="File of campground IDs, one per line"
+    ),
     start_date: str = typer.Option(
         dt.date.today().isoformat(), "--start-date", "-s", help="Start date"
     ),
@@ -166,12 +372,21 @@ def campground_check(
     site_ids: str = typer.Option(None, "--site-ids", "-i", help="Site IDs"),
     length: int = typer.Option(None, "--length", "-l", help="Booking window length"),
     status: str = typer.Option(None, help="Campsite status"),
+    workers: int = typer.Option(
+        POOL_NUM_WORKERS, help="Concurrent requests per process"
+    ),
+    processes: int = typer.Option(
+        1, "--processes", "-p", help="Worker processes to shard campgrounds over"
+    ),
+    rate: float = typer.Option(DEFAULT_RATE, help="Request budget per second"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
 ):
-    # console.print(
-    #     "This command is disabled until I figure out how to avoid API rate limiting",
-    #     style="bold red",
-    # )
-    # return
+    from recreation.availability_list import CampgroundAvailabilityList
+    from recreation.planner import CampgroundQuery, plan_fetches, read_id_files
+    from recreation.rgapi.camp import CampsiteAvailabilityStatus
+    from recreation.scanner import ScanResult, scan_campgrounds, stream_plan
 
     if not end_date:
         end_date = start_date
@@ -189,42 +404,38 @@ def campground_check(
     availtab.add_column("Status")
 
     camp_id_list = [
-        camp_id.strip() for camp_id in camp_ids.split(",") if camp_id.strip()
+        camp_id.strip() for camp_id in (camp_ids or "").split(",") if camp_id.strip()
     ]
+    if from_file:
+        camp_id_list += read_id_files(from_file)
+    if not camp_id_list:
+        raise typer.BadParameter("no campgrounds to check")
 
-    @dataclasses.dataclass
-    class CampAndAvail:
-        camp: Campground
-        avail: CampgroundAvailabilityList
-
-    def fetch_camp_and_avail(camp_id):
-        camp = Campground.fetch(camp_id, fetch_all=False)
-        camp.fetch_campsites()
-        avail = camp.fetch_availability(sdate, edate)
-
-        return CampAndAvail(camp, avail)
-
-    workers = 0
+    plan = plan_fetches(
+        CampgroundQuery(camp_id, sdate, edate) for camp_id in camp_id_list
+    )
+    err_console.print(
+        f"{len(plan.campground_ids)} campgrounds, "
+        f"{plan.planned_requests} requests planned "
+        f"({plan.naive_requests} without dedup)",
+        style="dim",
+    )
 
-    if workers <= 1:
-        camps_and_avails: dict[str, CampAndAvail] = {
-            camp_id: fetch_camp_and_avail(camp_id) for camp_id in camp_id_list
-        }
+    if processes > 1:
+        results = scan_campgrounds(
+            plan.campground_ids,
+            sdate,
+            edate,
+            processes=processes,
+            rate=rate,
+            workers=workers,
+        )
     else:
-        with ThreadPoolExecutor(max_workers=workers) as executor:
-            camps_and_avails: dict[str, CampAndAvail] = {
-                caa.camp.id: caa
-                for caa in executor.map(fetch_camp_and_avail, camp_id_list)
-            }
-
-    for camp_id, camp_and_avail in camps_and_avails.items():
-        # camp = Campground.fetch(camp_id, fetch_all=True)
-        camp = camp_and_avail.camp
-        avail = camp_and_avail.avail
-
-        # console.print(alert_table(camp.alerts))
+        client = rate_limited_client(rate, workers)
+        results = stream_plan(plan, workers=workers, client=client)
 
-        # avail = camp.fetch_availability(sdate, edate)
+    def availability(result: ScanResult) -> CampgroundAvailabilityList:
+        avail = result.availability
         avail = avail.filter_dates(sdate, edate, exclude_start_day=True)
 
         if site_ids:
@@ -238,22 +449,458 @@ def campground_check(
             status_enum = CampsiteAvailabilityStatus[status]
             avail = avail.filter_status(status_enum)
 
-        for a in avail.availability:
-            availtab.add_row(
-                f"[link={camp.url}]{camp.name}[/link]",
-                camp.id,
-                camp.campsites[a.id].name,
+        return avail
+
+    def rows(result: ScanResult) -> list[tuple[str, ...]]:
+        return [
+            (
+                result.name,
+                result.campground_id,
+                result.site_names.get(a.id, a.id),
                 a.id,
                 a.date.isoformat(),
                 str(a.length),
                 a.status.value,
             )
+            for a in availability(result).availability
+        ]
 
+    # rows are emitted per campground as soon as it completes, so the order
+    # follows completion rather than the order of camp_ids
+    if output_format != OutputFormat.table:
+        fields = [
+            "campground_name",
+            "campground_id",
+            "campsite_name",
+            "campsite_id",
+            "start_date",
+            "length",
+            "status",
+        ]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for result in results:
+                if result.error:
+                    err_console.print(f"{result.campground_id}: {result.error}")
+                    continue
+                for a in availability(result).availability:
+                    writer.write(
+                        {
+                            "campground_name": result.name,
+                            "campground_id": result.campground_id,
+                            "campsite_name": result.site_names.get(a.id, a.id),
+                            "campsite_id": a.id,
+                            "start_date": a.date,
+                            "length": a.length,
+                            "status": a.status,
+                        }
+                    )
+        return
+
+    if not console.is_terminal:
+        for result in results:
+            if result.error:
+                err_console.print(f"{result.campground_id}: {result.error}")
+                continue
+            for row in rows(result):
+                print("\t".join(row), flush=True)
+        return
+
+    with Live(availtab, console=console, refresh_per_second=4):
+        for result in results:
+            if result.error:
+                console.print(f"{result.campground_id}: {result.error}", style="red")
+                continue
+            for row in rows(result):
+                availtab.add_row(f"[link={result.url}]{row[0]}[/link]", *row[1:])
+
+
+@campground_app.command(
+    "near",
+    help="find campgrounds near a point in the offline catalog",
+    context_settings={"ignore_unknown_options": True},
+)
+def campground_near(
+    latitude: float,
+    longitude: float,
+    radius: float = typer.Option(25.0, "--radius", "-r", help="Radius in km"),
+    facility_type: Optional[list[str]] = typer.Option(
+        ["Campground"], "--type", "-t", help="Facility types, all if empty"
+    ),
+    limit: int = typer.Option(None, "--limit", "-n", help="Nearest N only"),
+    catalog: str = typer.Option(None, help="Catalog file"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
+):
+    from recreation.catalog import FacilityCatalog
+
+    try:
+        facilities = FacilityCatalog.load(catalog)
+    except FileNotFoundError:
+        raise typer.BadParameter(
+            "no facility catalog, import one with `campground catalog`"
+        )
+    types = [t for t in facility_type or [] if t]
+    matches = facilities.near(latitude, longitude, radius, types, limit)
+
+    if output_format != OutputFormat.table:
+        fields = ["facility_id", "name", "distance_km", "latitude", "longitude"]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for facility, distance in matches:
+                writer.write(
+                    {
+                        "facility_id": facility.facility_id,
+                        "name": facility.name,
+                        "distance_km": round(distance, 2),
+                        "latitude": facility.latitude,
+                        "longitude": facility.longitude,
+                    }
+                )
+        return
+
+    # ids first, so the output can be piped into `campground check -f -`
+    if not console.is_terminal:
+        for facility, distance in matches:
+            print(f"{facility.facility_id}\t{facility.name}\t{distance:.1f}")
+        return
+
+    neartab = Table(title=f"Within {radius:g} km", box=box.SIMPLE_HEAD)
+    neartab.add_column("Campground name")
+    neartab.add_column("Campground ID")
+    neartab.add_column("Distance (km)", justify="right")
+    neartab.add_column("Type")
+    for facility, distance in matches:
+        url = f"https://www.recreation.gov/camping/campgrounds/{facility.facility_id}"
+        neartab.add_row(
+            f"[link={url}]{facility.name}[/link]",
+            facility.facility_id,
+            f"{distance:.1f}",
+            facility.facility_type,
+        )
+    console.print(neartab)
+
+
+@campground_app.command(
+    "catalog", help="import a RIDB facilities export as the offline catalog"
+)
+def campground_catalog(
+    export: str = typer.Argument(..., help="RIDB facilities export, CSV or JSON"),
+    catalog: str = typer.Option(None, help="Catalog file to write"),
+):
+    from recreation.catalog import FacilityCatalog
+
+    facilities = FacilityCatalog.from_export(export)
+    path = facilities.save(catalog)
+    console.print(f"{len(facilities)} facilities saved to {path}")
+
+
+@campground_app.command("diff", help="compare two saved availability snapshots")
+def campground_diff(
+    old_snapshot: str,
+    new_snapshot: str,
+    opened_only: bool = typer.Option(False, help="Only report newly opened sites"),
+):
+    from recreation.availability_list import CampgroundAvailabilityList
+    from recreation.diff import diff_availability, opened_availability, write_ndjson
+
+    old = CampgroundAvailabilityList.load(old_snapshot)
+    new = CampgroundAvailabilityList.load(new_snapshot)
+
+    if opened_only:
+        changes = opened_availability(old, new)
+    else:
+        changes = diff_availability(old, new)
+    write_ndjson(changes, sys.stdout)
+
+
+@campground_app.command(
+    "watch", help="poll campgrounds and report availability as it opens"
+)
+def campground_watch(
+    camp_ids: str = typer.Argument(None),
+    start_date: str = typer.Option(
+        dt.date.today().isoformat(), "--start-date", "-s", help="Start date"
+    ),
+    end_date: str = typer.Option(None, "--end-date", "-e", help="End date"),
+    days_of_week: str = typer.Option(None, "--days-of-week", "-w", help="Days of week"),
+    site_ids: str = typer.Option(None, "--site-ids", "-i", help="Site IDs"),
+    length: int = typer.Option(None, "--length", "-l", help="Booking window length"),
+    query_file: str = typer.Option(
+        None, "--query-file", "-q", help="File of JSON queries, one per line"
+    ),
+    interval: float = typer.Option(DEFAULT_INTERVAL, help="Initial poll interval"),
+    min_interval: float = typer.Option(MIN_INTERVAL, help="Minimum poll interval"),
+    max_interval: float = typer.Option(MAX_INTERVAL, help="Maximum poll interval"),
+    initial: bool = typer.Option(False, help="Report availability on first poll"),
+    ndjson: bool = typer.Option(False, help="Print events as NDJSON"),
+    history: bool = typer.Option(False, help="Record every poll to history"),
+    history_db: str = typer.Option(
+        None, help="History database, in the cache directory by default"
+    ),
+):
+    import apiclient.exceptions
+
+    from recreation.availability_list import CampgroundAvailabilityList
+    from recreation.history import HistoryStore
+    from recreation.models import Campground
+    from recreation.watch import CampgroundWatcher, WatchEvent, WatchQuery
+
+    if not end_date:
+        end_date = start_date
+
+    sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
+    edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    queries: list[WatchQuery] = []
+    if camp_ids:
+        for camp_id in camp_ids.split(","):
+            if not camp_id.strip():
+                continue
+            queries.append(
+                WatchQuery(
+                    campground_id=camp_id.strip(),
+                    start_date=sdate,
+                    end_date=edate,
+                    length=length,
+                    days_of_week=(
+                        [int(d) for d in days_of_week.split(",")]
+                        if days_of_week
+                        else None
+                    ),
+                    site_ids=site_ids.split(",") if site_ids else None,
+                )
+            )
+    if query_file:
+        with open(query_file) as f:
+            queries += [
+                WatchQuery.from_dict(json.loads(line)) for line in f if line.strip()
+            ]
+
+    if not queries:
+        raise typer.BadParameter("no campgrounds to watch")
+
+    camps: dict[str, Campground] = {}
+
+    def campground(camp_id: str) -> Optional[Campground]:
+        # metadata is cosmetic; report the bare id and retry on the next event
+        if camp_id not in camps:
+            try:
+                camp = Campground.fetch(camp_id)
+                camp.campsites
+            except apiclient.exceptions.APIClientError:
+                return None
+            camps[camp_id] = camp
+        return camps[camp_id]
+
+    def on_event(event: WatchEvent):
+        camp_id = event.query.campground_id
+        camp = campground(camp_id)
+        camp_name = camp.name if camp else camp_id
+        a = event.availability
+        site = camp.campsites.get(a.id) if camp else None
+        site_name = site.name if site else a.id
+
+        if ndjson:
+            record = {
+                "detected_at": event.detected_at.isoformat(),
+                "campground_id": camp_id,
+                "campground_name": camp_name,
+                "campsite_id": a.id,
+                "campsite_name": site_name,
+                "start_date": a.date.isoformat(),
+                "end_date": a.end_date.isoformat(),
+                "length": a.length,
+                "status": a.status.value,
+            }
+            print(json.dumps(record), flush=True)
+        else:
+            link = f"[link={camp.url}]{site_name}[/link]" if camp else site_name
+            console.print(
+                f"{event.detected_at:%H:%M:%S} [bold blue]{camp_name}[/bold blue] "
+                f"{link} ({a.id}) "
+                f"{a.date.isoformat()} - {a.end_date.isoformat()} "
+                f"{a.length} nights {a.status.value}"
+            )
+
+    store = HistoryStore(history_db) if history else None
+
+    def fetch(camp_id: str, sdate: dt.date, edate: dt.date):
+        avail = CampgroundAvailabilityList.fetch_availability(camp_id, sdate, edate)
+        if store:
+            store.record(camp_id, avail)
+        return avail
+
+    watcher = CampgroundWatcher(
+        queries,
+        on_event,
+        fetch=fetch,
+        interval=interval,
+        min_interval=min_interval,
+        max_interval=max_interval,
+        emit_initial=initial,
+    )
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+@campground_app.command(
+    "snipe", help="fetch a campground month in a burst at its release instant"
+)
+def campground_snipe(
+    camp_id: str,
+    month: str = typer.Option(..., "--month", "-m", help="Month to fetch (YYYY-MM)"),
+    release: str = typer.Option(
+        ..., "--release", "-r", help="Release instant, ISO format with timezone"
+    ),
+    burst: int = typer.Option(8, help="Number of requests in the burst"),
+    spacing: float = typer.Option(0.05, help="Seconds between requests"),
+    lead: float = typer.Option(0.1, help="Seconds before release to start"),
+):
+    from recreation.models import Campground
+    from recreation.sniper import CampgroundSniper
+
+    mdate = dt.datetime.strptime(month, "%Y-%m").date()
+    release_time = dt.datetime.fromisoformat(release)
+    if release_time.tzinfo is None:
+        release_time = release_time.astimezone()
+
+    sniper = CampgroundSniper(
+        camp_id, mdate, release_time, burst=burst, spacing=spacing, lead=lead
+    )
+    console.print(f"Waiting for release at {release_time.isoformat()}")
+    result = sniper.run()
+    console.print(
+        f"Server clock offset {result.clock.offset:+.3f}s "
+        f"(±{result.clock.error:.3f}s, {result.clock.samples} samples)"
+    )
+
+    attempttab = Table(title="Burst", box=box.SIMPLE_HEAD)
+    attempttab.add_column("#")
+    attempttab.add_column("Fired")
+    attempttab.add_column("Received")
+    attempttab.add_column("Latency")
+    attempttab.add_column("Available")
+    attempttab.add_column("Error")
+    for a in result.attempts:
+        attempttab.add_row(
+            str(a.index),
+            f"{a.fired:+.3f}",
+            f"{a.received:+.3f}",
+            f"{a.latency:.3f}",
+            str(a.available),
+            a.error or "",
+        )
+    console.print(attempttab)
+
+    detection = result.first_detection
+    if detection is None:
+        console.print("No availability detected", style="bold red")
+        return
+    console.print(
+        f"Availability detected {detection.received:.3f}s after release",
+        style="bold green",
+    )
+
+    camp = Campground.fetch(camp_id)
+    availtab = Table(title="Available campsites", box=box.SIMPLE_HEAD)
+    availtab.add_column("Campsite name")
+    availtab.add_column("Campsite ID")
+    availtab.add_column("Start date")
+    availtab.add_column("Length")
+    for a in result.availability.availability:
+        site = camp.campsites.get(a.id)
+        availtab.add_row(
+            f"[link={camp.url}]{site.name if site else a.id}[/link]",
+            a.id,
+            a.date.isoformat(),
+            str(a.length),
+        )
     console.print(availtab)
 
 
+@campground_app.command("stats", help="cancellation statistics from poll history")
+def campground_stats(
+    camp_ids: str = typer.Argument(None),
+    history_db: str = typer.Option(
+        None, help="History database, in the cache directory by default"
+    ),
+    start_date: str = typer.Option(None, "--start-date", "-s", help="Start date"),
+    end_date: str = typer.Option(None, "--end-date", "-e", help="End date"),
+    budget: float = typer.Option(
+        None, help="Requests per hour to split across campground-months"
+    ),
+    min_interval: float = typer.Option(MIN_INTERVAL, help="Minimum poll interval"),
+    max_interval: float = typer.Option(MAX_INTERVAL, help="Maximum poll interval"),
+):
+    from recreation.history import HistoryStore
+    from recreation.stats import all_campground_stats, allocate_intervals, opening_rates
+
+    sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date() if end_date else None
+    camp_id_list = (
+        [camp_id.strip() for camp_id in camp_ids.split(",") if camp_id.strip()]
+        if camp_ids
+        else None
+    )
+
+    try:
+        store = HistoryStore(history_db, create=False)
+    except FileNotFoundError as exc:
+        raise typer.BadParameter(
+            f"{exc}, record one with campground watch --history",
+            param_hint="--history-db",
+        )
+    with store:
+        stats = all_campground_stats(store, camp_id_list, sdate, edate)
+
+    statstab = Table(title="Cancellations", box=box.SIMPLE_HEAD)
+    statstab.add_column("Campground ID")
+    statstab.add_column("Polls")
+    statstab.add_column("Days observed")
+    statstab.add_column("Openings")
+    statstab.add_column("Per day")
+    statstab.add_column("Reopen rate")
+    statstab.add_column("Lead days (median)")
+    statstab.add_column("Peak hour (UTC)")
+    for camp_stats in stats:
+        quantiles = camp_stats.lead_time_quantiles(2)
+        hours = camp_stats.by_hour().most_common(1)
+        statstab.add_row(
+            camp_stats.campground_id,
+            str(camp_stats.polls),
+            f"{camp_stats.observed_days:.1f}",
+            str(len(camp_stats.openings)),
+            f"{camp_stats.openings_per_day:.2f}",
+            f"{camp_stats.reopen_rate:.1%}",
+            f"{quantiles[0]:.0f}" if quantiles else "",
+            f"{hours[0][0]:02d}:00" if hours else "",
+        )
+    console.print(statstab)
+
+    rates = opening_rates(stats)
+    intervals = (
+        allocate_intervals(rates, budget, min_interval, max_interval) if budget else {}
+    )
+    monthtab = Table(title="Openings by campground-month", box=box.SIMPLE_HEAD)
+    monthtab.add_column("Campground ID")
+    monthtab.add_column("Month")
+    monthtab.add_column("Openings per day")
+    if intervals:
+        monthtab.add_column("Poll interval")
+    for (camp_id, month), rate in sorted(rates.items(), key=lambda kv: -kv[1]):
+        row = [camp_id, month.strftime("%Y-%m"), f"{rate:.2f}"]
+        if intervals:
+            row.append(f"{intervals[(camp_id, month)]:.0f}s")
+        monthtab.add_row(*row)
+    console.print(monthtab)
+
+
 @permit_app.command("info", help="get info about a permit")
 def permit_info(permit_id: str):
+    from recreation.models import Permit
+
     permit = Permit.fetch(permit_id, fetch_all=True)
 
     name = Text(permit.name, style="bold blue")
@@ -330,18 +977,23 @@ def permit_avail(
     ),
     remain: int = typer.Option(None, "--remain", "-r", help="Remaining spots"),
     is_walkup: bool = typer.Option(None, help="Is walkup permit"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
 ):
+    from recreation.models import Permit
+
     if not end_date:
         end_date = start_date
 
     sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
     edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
 
-    permit = Permit.fetch(permit_id, fetch_all=True)
+    permit, avail = Permit.fetch_with_availability(permit_id, sdate, edate)
 
-    console.print(alert_table(permit.alerts))
+    if output_format == OutputFormat.table:
+        console.print(alert_table(permit.alerts))
 
-    avail = permit.fetch_availability(sdate, edate)
     avail = avail.filter_dates(sdate, edate)
 
     if days_of_week:
@@ -354,9 +1006,7 @@ def permit_avail(
 
     if division_codes:
         dcodes = division_codes.split(",")
-        divisions = [
-            div for div_id, div in permit.divisions.items() if div.code in dcodes
-        ]
+        divisions = permit.divisions_for_codes(dcodes, ignore_case=True)
         avail = avail.filter_division(divisions)
 
     if remain:
@@ -365,6 +1015,40 @@ def permit_avail(
     if is_walkup:
         avail = avail.filter_walkup(is_walkup)
 
+    print_permit_avail(permit, avail, output_format)
+
+
+@timed_stage(RENDER)
+def print_permit_avail(
+    permit: "Permit",
+    avail: "PermitAvailabilityList",
+    output_format: OutputFormat,
+) -> None:
+    if output_format != OutputFormat.table:
+        fields = [
+            "permit_id",
+            "division_name",
+            "division_id",
+            "date",
+            "remaining",
+            "total",
+            "is_walkup",
+        ]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for a in avail.availability:
+                writer.write(
+                    {
+                        "permit_id": permit.id,
+                        "division_name": permit.divisions[a.id].name,
+                        "division_id": a.id,
+                        "date": a.date,
+                        "remaining": a.remaining,
+                        "total": a.total,
+                        "is_walkup": a.is_walkup,
+                    }
+                )
+        return
+
     availtab = Table(title="Available permits", box=box.SIMPLE_HEAD)
     availtab.add_column("Division name")
     availtab.add_column("Division ID")
@@ -385,5 +1069,485 @@ def permit_avail(
     console.print(availtab)
 
 
+@permit_app.command("check", help="check availability for one or more permits")
+def permit_check(
+    permit_ids: str,
+    start_date: str = typer.Option(
+        dt.date.today().isoformat(), "--start-date", "-s", help="Start date"
+    ),
+    end_date: str = typer.Option(None, "--end-date", "-e", help="End date"),
+    days_of_week: str = typer.Option(None, "--days-of-week", "-w", help="Days of week"),
+    division_codes: str = typer.Option(
+        None, "--div-codes", "-c", help="Division codes"
+    ),
+    remain: int = typer.Option(None, "--remain", "-r", help="Remaining spots"),
+    is_walkup: bool = typer.Option(None, help="Is walkup permit"),
+    workers: int = typer.Option(POOL_NUM_WORKERS, help="Concurrent requests"),
+    rate: float = typer.Option(DEFAULT_RATE, help="Request budget per second"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
+):
+    from recreation.availability_list import PermitAvailabilityList
+    from recreation.scanner import PermitScanResult, stream_permits
+
+    if not end_date:
+        end_date = start_date
+
+    sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
+    edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
+
+    permit_id_list = [pid.strip() for pid in permit_ids.split(",") if pid.strip()]
+
+    client = rate_limited_client(rate, workers)
+    results = stream_permits(
+        permit_id_list, sdate, edate, workers=workers, client=client
+    )
+
+    def availability(result: PermitScanResult) -> PermitAvailabilityList:
+        avail = result.availability.filter_dates(sdate, edate)
+
+        if days_of_week:
+            dow = [int(d) for d in days_of_week.split(",")]
+            avail = avail.filter_days_of_week(dow)
+
+        if division_codes:
+            dcodes = division_codes.split(",")
+            divisions = result.division_index.codes(dcodes, ignore_case=True)
+            avail = avail.filter_division(divisions)
+
+        if remain:
+            avail = avail.filter_remain(remain)
+
+        if is_walkup:
+            avail = avail.filter_walkup(is_walkup)
+
+        return avail
+
+    def division_name(result: PermitScanResult, division_id: str) -> str:
+        division = result.divisions.get(division_id)
+        return division.name if division else division_id
+
+    def rows(result: PermitScanResult) -> list[tuple[str, ...]]:
+        return [
+            (
+                result.name,
+                result.permit_id,
+                division_name(result, a.id),
+                a.id,
+                a.date.isoformat(),
+                str(a.remaining),
+                str(a.total),
+                str(a.is_walkup),
+            )
+            for a in availability(result).availability
+        ]
+
+    # rows are emitted per permit as soon as it completes
+    if output_format != OutputFormat.table:
+        fields = [
+            "permit_name",
+            "permit_id",
+            "division_name",
+            "division_id",
+            "date",
+            "remaining",
+            "total",
+            "is_walkup",
+        ]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for result in results:
+                if result.error:
+                    err_console.print(f"{result.permit_id}: {result.error}")
+                    continue
+                for a in availability(result).availability:
+                    writer.write(
+                        {
+                            "permit_name": result.name,
+                            "permit_id": result.permit_id,
+                            "division_name": division_name(result, a.id),
+                            "division_id": a.id,
+                            "date": a.date,
+                            "remaining": a.remaining,
+                            "total": a.total,
+                            "is_walkup": a.is_walkup,
+                        }
+                    )
+        return
+
+    if not console.is_terminal:
+        for result in results:
+            if result.error:
+                err_console.print(f"{result.permit_id}: {result.error}")
+                continue
+            for row in rows(result):
+                print("\t".join(row), flush=True)
+        return
+
+    availtab = Table(title="Available permits", box=box.SIMPLE_HEAD)
+    availtab.add_column("Permit name")
+    availtab.add_column("Permit ID")
+    availtab.add_column("Division name")
+    availtab.add_column("Division ID")
+    availtab.add_column("Date")
+    availtab.add_column("Remain")
+    availtab.add_column("Total")
+    availtab.add_column("Is walkup")
+
+    with Live(availtab, console=console, refresh_per_second=4):
+        for result in results:
+            if result.error:
+                console.print(f"{result.permit_id}: {result.error}", style="red")
+                continue
+            for row in rows(result):
+                availtab.add_row(f"[link={result.url}]{row[0]}[/link]", *row[1:])
+
+
+def build_entry_point_index(workers: int, client: "RecreationGovClient"):
+    from recreation.catalog import CATALOG_FILE, FacilityCatalog
+    from recreation.core import cache_dir
+    from recreation.entrypoints import EntryPointIndex, known_permit_ids
+
+    catalog_path = cache_dir() / CATALOG_FILE
+    catalog = FacilityCatalog.load(catalog_path) if catalog_path.exists() else None
+    index, errors = EntryPointIndex.fetch(
+        known_permit_ids(catalog), workers=workers, client=client
+    )
+    for permit_id, error in errors.items():
+        err_console.print(f"{permit_id}: {error}")
+    path = index.save()
+    err_console.print(
+        f"{len(index)} entry points from {len(index.permit_ids)} permits "
+        f"saved to {path}",
+        style="dim",
+    )
+    return index
+
+
+@permit_app.command(
+    "index", help="index entry points of known and catalog permits for `near`"
+)
+def permit_index(
+    workers: int = typer.Option(POOL_NUM_WORKERS, help="Concurrent requests"),
+    rate: float = typer.Option(DEFAULT_RATE, help="Request budget per second"),
+):
+    build_entry_point_index(workers, rate_limited_client(rate, workers))
+
+
+@permit_app.command(
+    "near",
+    help="permit entry points near a point with availability",
+    context_settings={"ignore_unknown_options": True},
+)
+def permit_near(
+    latitude: float,
+    longitude: float,
+    radius: float = typer.Option(30.0, "--radius", help="Radius in km"),
+    start_date: str = typer.Option(
+        dt.date.today().isoformat(), "--start-date", "-s", help="Start date"
+    ),
+    end_date: str = typer.Option(None, "--end-date", "-e", help="End date"),
+    days_of_week: str = typer.Option(None, "--days-of-week", "-w", help="Days of week"),
+    kind: Optional[list[str]] = typer.Option(
+        None, help="division or entrance, both if not given"
+    ),
+    remain: int = typer.Option(1, "--remain", "-r", help="Remaining spots"),
+    workers: int = typer.Option(POOL_NUM_WORKERS, help="Concurrent requests"),
+    rate: float = typer.Option(DEFAULT_RATE, help="Request budget per second"),
+    output_format: OutputFormat = typer.Option(
+        OutputFormat.table, "--format", help="Output format"
+    ),
+):
+    from recreation.entrypoints import EntryPointIndex, stream_entry_points
+
+    if not end_date:
+        end_date = start_date
+
+    sdate = dt.datetime.strptime(start_date, "%Y-%m-%d").date()
+    edate = dt.datetime.strptime(end_date, "%Y-%m-%d").date()
+    dow = [int(d) for d in days_of_week.split(",")] if days_of_week else None
+
+    client = rate_limited_client(rate, workers)
+    try:
+        index = EntryPointIndex.load()
+    except FileNotFoundError:
+        index = build_entry_point_index(workers, client)
+
+    # only permits with an entry point in range get their availability fetched
+    matches = index.near(latitude, longitude, radius, kind)
+    err_console.print(
+        f"{len(matches)} entry points in range from "
+        f"{len({p.permit_id for p, _ in matches})} of "
+        f"{len(index.permit_ids)} permits",
+        style="dim",
+    )
+
+    def rows(results):
+        for result in results:
+            if result.error:
+                err_console.print(f"{result.point.permit_id}: {result.error}")
+                continue
+            avail = result.availability.filter_remain(remain).filter_days_of_week(dow)
+            for a in avail.availability:
+                yield result, a
+
+    def table_row(result, a) -> tuple[str, ...]:
+        return (
+            result.point.permit_name,
+            result.point.name,
+            result.point.kind,
+            f"{result.distance:.1f}",
+            a.id,
+            a.date.isoformat(),
+            str(a.remaining),
+            str(a.total),
+        )
+
+    results = stream_entry_points(matches, sdate, edate, workers=workers, client=client)
+
+    if output_format != OutputFormat.table:
+        fields = [
+            "permit_name",
+            "permit_id",
+            "kind",
+            "name",
+            "distance_km",
+            "division_id",
+            "date",
+            "remaining",
+            "total",
+        ]
+        with RowWriter(sys.stdout, output_format, fields) as writer:
+            for result, a in rows(results):
+                writer.write(
+                    {
+                        "permit_name": result.point.permit_name,
+                        "permit_id": result.point.permit_id,
+                        "kind": result.point.kind,
+                        "name": result.point.name,
+                        "distance_km": round(result.distance, 2),
+                        "division_id": a.id,
+                        "date": a.date,
+                        "remaining": a.remaining,
+                        "total": a.total,
+                    }
+                )
+        return
+
+    if not console.is_terminal:
+        for result, a in rows(results):
+            print("\t".join(table_row(result, a)), flush=True)
+        return
+
+    availtab = Table(title=f"Entry points within {radius:g} km", box=box.SIMPLE_HEAD)
+    availtab.add_column("Permit name")
+    availtab.add_column("Entry point")
+    availtab.add_column("Kind")
+    availtab.add_column("Distance (km)", justify="right")
+    availtab.add_column("Division ID")
+    availtab.add_column("Date")
+    availtab.add_column("Remain")
+    availtab.add_column("Total")
+
+    with Live(availtab, console=console, refresh_per_second=4):
+        for result, a in rows(results):
+            row = table_row(result, a)
+            availtab.add_row(
+                f"[link=https://www.recreation.gov/permits/{result.point.permit_id}]"
+                f"{row[0]}[/link]",
+                *row[1:],
+            )
+
+
+SHELL_HELP = """\
+info ID                     campground info
+avail ID START [END]        availability for one campground
+check ID,ID,.. START [END]  availability for several campgrounds
+dates START [END]           change the dates of the current search
+length N|off                only bookings of at least N nights
+days 0,1,..|off             only these days of week (0 is Monday)
+sites ID,ID,..|off          only these campsites
+status NAME                 only this status (default available)
+show                        show the current search again
+cache                       show cache size and requests made
+clear                       drop cached data
+help                        show this help
+quit                        exit the shell"""
+
+
+def shell_results(
+    session: "RecreationSession", camp_ids: list[str], query: "WatchQuery"
+) -> None:
+    from dataclasses import replace
+
+    results = session.check(camp_ids, query.start_date, query.end_date)
+    availtab = Table(title="Available campsites", box=box.SIMPLE_HEAD)
+    availtab.add_column("Campground name")
+    availtab.add_column("Campground ID")
+    availtab.add_column("Campsite name")
+    availtab.add_column("Campsite ID")
+    availtab.add_column("Start date")
+    availtab.add_column("Length")
+    availtab.add_column("Status")
+
+    for result in results:
+        if result.error:
+            console.print(f"{result.campground_id}: {result.error}", style="red")
+            continue
+        avail = replace(query, campground_id=result.campground_id).apply(
+            result.availability
+        )
+        for a in avail.availability:
+            availtab.add_row(
+                f"[link={result.url}]{result.name}[/link]",
+                result.campground_id,
+                result.site_names.get(a.id, a.id),
+                a.id,
+                a.date.isoformat(),
+                str(a.length),
+                a.status.value,
+            )
+    console.print(availtab)
+
+
+@app.command("shell", help="interactive shell that keeps fetched data cached")
+def shell(
+    workers: int = typer.Option(POOL_NUM_WORKERS, help="Concurrent requests"),
+):
+    import shlex
+    import time
+
+    import apiclient.exceptions
+    import requests
+
+    from recreation.rgapi.camp import CampsiteAvailabilityStatus
+    from recreation.session import RecreationSession
+    from recreation.watch import WatchQuery
+
+    try:
+        import readline  # noqa: F401
+    except ImportError:
+        pass
+
+    def parse_dates(args: list[str]) -> tuple[dt.date, dt.date]:
+        sdate = dt.date.fromisoformat(args[0])
+        edate = dt.date.fromisoformat(args[1]) if len(args) > 1 else sdate
+        return sdate, edate
+
+    def off(arg: str) -> bool:
+        return arg in ("off", "none", "-")
+
+    camp_ids: list[str] = []
+    query = WatchQuery(
+        campground_id="", start_date=dt.date.today(), end_date=dt.date.today()
+    )
+
+    with RecreationSession(workers=workers) as session:
+        while True:
+            try:
+                line = input("camping> ")
+            except (EOFError, KeyboardInterrupt):
+                console.print()
+                break
+
+            try:
+                args = shlex.split(line)
+            except ValueError as exc:
+                console.print(str(exc), style="red")
+                continue
+            if not args:
+                continue
+            cmd, args = args[0], args[1:]
+
+            started = time.perf_counter()
+            try:
+                if cmd in ("quit", "exit"):
+                    break
+                elif cmd == "help":
+                    console.print(SHELL_HELP, highlight=False)
+                    continue
+                elif cmd == "info":
+                    print_campground(session.campground(args[0]))
+                elif cmd in ("avail", "check"):
+                    camp_ids = [c.strip() for c in args[0].split(",") if c.strip()]
+                    if cmd == "avail":
+                        camp_ids = camp_ids[:1]
+                    sdate, edate = parse_dates(args[1:])
+                    query.start_date, query.end_date = sdate, edate
+                    shell_results(session, camp_ids, query)
+                elif cmd == "dates":
+                    query.start_date, query.end_date = parse_dates(args)
+                elif cmd == "length":
+                    query.length = None if off(args[0]) else int(args[0])
+                elif cmd == "days":
+                    query.days_of_week = (
+                        None if off(args[0]) else [int(d) for d in args[0].split(",")]
+                    )
+                elif cmd == "sites":
+                    query.site_ids = None if off(args[0]) else args[0].split(",")
+                elif cmd == "status":
+                    query.status = CampsiteAvailabilityStatus[args[0]]
+                elif cmd == "cache":
+                    console.print(
+                        f"{len(session.campgrounds)} campgrounds, "
+                        f"{len(session.months)} months cached, "
+                        f"{session.requests} requests made"
+                    )
+                    continue
+                elif cmd == "clear":
+                    session.clear()
+                    continue
+                elif cmd != "show":
+                    console.print(f"unknown command {cmd}, try help", style="red")
+                    continue
+
+                # searches are refined in place, so show the refined results
+                if cmd not in ("info", "avail", "check") and camp_ids:
+                    shell_results(session, camp_ids, query)
+            except (
+                IndexError,
+                ValueError,
+                KeyError,
+                LookupError,
+                apiclient.exceptions.APIClientError,
+                requests.exceptions.RequestException,
+            ) as exc:
+                console.print(f"{cmd}: {exc!r}", style="red")
+                continue
+            console.print(f"{time.perf_counter() - started:.3f}s", style="dim")
+
+
+@app.command("serve", help="serve queries over a local HTTP JSON API")
+def serve(
+    host: str = typer.Option(DEFAULT_HOST, help="Address to listen on"),
+    port: int = typer.Option(DEFAULT_PORT, help="Port to listen on"),
+    rate: float = typer.Option(DEFAULT_RATE, help="Upstream requests per second"),
+    burst: int = typer.Option(DEFAULT_BURST, help="Upstream request burst"),
+    max_wait: float = typer.Option(
+        MAX_WAIT,
+        help="Seconds a request may wait for upstream budget before it is shed",
+    ),
+    month_ttl: float = typer.Option(MONTH_TTL, help="Seconds cached months stay fresh"),
+    workers: int = typer.Option(POOL_NUM_WORKERS, help="Upstream connections"),
+):
+    from recreation.server import QueryService, make_server
+
+    service = QueryService(
+        rate=rate,
+        burst=burst,
+        max_wait=max_wait,
+        workers=workers,
+        month_ttl=month_ttl,
+    )
+    server = make_server(service, host, port)
+    err_console.print(f"serving on http://{host}:{port}", style="dim")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     app()
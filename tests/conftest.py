@@ -0,0 +1,150 @@
+import datetime as dt
+import threading
+from types import SimpleNamespace
+from typing import Optional
+
+import apiclient.exceptions
+
+from recreation.availability_list import (
+    CampgroundAvailability,
+    CampgroundAvailabilityList,
+)
+from recreation.rgapi.camp import RGApiCampgroundAvailability
+from recreation.rgapi.permit import RGApiPermit, RGApiPermitInyoAvailability
+
+# helpers shared by the tests, imported with `from conftest import ...`
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def runs(*avails) -> CampgroundAvailabilityList:
+    # (site id, day in July 2022, status, length) for each run
+    return CampgroundAvailabilityList(
+        [
+            CampgroundAvailability(site_id, dt.date(2022, 7, day), status, length)
+            for site_id, day, status, length in avails
+        ]
+    )
+
+
+def campground_month_data(
+    month: dt.date, status: str = "Available", days: int = 1
+) -> dict:
+    # the month of a campground with one site, "001", with `status` for the
+    # first `days` days
+    return {
+        "campsites": {
+            "64082": {
+                "availabilities": {
+                    f"{(month + dt.timedelta(days=d)).isoformat()}T00:00:00Z": status
+                    for d in range(days)
+                },
+                "campsite_id": "64082",
+                "campsite_reserve_type": "Site-Specific",
+                "campsite_type": "CABIN NONELECTRIC",
+                "loop": "LOOP",
+                "max_num_people": 4,
+                "min_num_people": 1,
+                "site": "001",
+                "type_of_use": "Overnight",
+            }
+        }
+    }
+
+
+def campground_month(
+    month: dt.date, status: str = "Available", days: int = 1
+) -> RGApiCampgroundAvailability:
+    return RGApiCampgroundAvailability(**campground_month_data(month, status, days))
+
+
+def inyo_month(
+    month: dt.date, remaining: dict[str, int]
+) -> RGApiPermitInyoAvailability:
+    return RGApiPermitInyoAvailability(
+        payload={
+            month.isoformat(): {
+                div_id: {"total": 8, "remaining": left, "is_walkup": False}
+                for div_id, left in remaining.items()
+            }
+        }
+    )
+
+
+class FakeCampClient:
+    # Campground "missing" doesn't exist, the others have the one site of
+    # campground_month. Months of campground "slow" aren't returned until
+    # release_slow is set.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = []
+        self.release_slow = threading.Event()
+
+    def record(self, *call):
+        with self.lock:
+            self.calls.append(call)
+
+    @property
+    def months(self) -> list[tuple[str, dt.date]]:
+        return [call[1:] for call in self.calls if call[0] == "month"]
+
+    def get_campground(self, camp_id):
+        self.record("camp", camp_id)
+        if camp_id == "missing":
+            raise apiclient.exceptions.ClientError("not found")
+        return SimpleNamespace(id=camp_id, name=f"Camp {camp_id}")
+
+    def get_campground_sites(self, camp_id):
+        self.record("sites", camp_id)
+        return [SimpleNamespace(id="64082", name="001")]
+
+    def get_campground_availability(self, camp_id, month):
+        if camp_id == "missing":
+            raise apiclient.exceptions.ClientError("not found")
+        self.record("month", camp_id, month)
+        if camp_id == "slow":
+            self.release_slow.wait(5)
+        return campground_month(month)
+
+
+class FakePermitClient:
+    # Permits come from `catalog`, or are made up by id when there is none,
+    # except "missing". Their availability is only on the Inyo endpoint, with
+    # `remaining` spots for each division.
+    def __init__(
+        self,
+        catalog: Optional[dict[str, RGApiPermit]] = None,
+        remaining: Optional[dict[str, int]] = None,
+    ):
+        self.catalog = catalog
+        self.remaining = remaining or {"424": 5}
+        self.permits = []
+        self.availability = []
+
+    def get_permit(self, permit_id):
+        self.permits.append(permit_id)
+        if permit_id == "missing" or (
+            self.catalog is not None and permit_id not in self.catalog
+        ):
+            raise apiclient.exceptions.ClientError("not found")
+        if self.catalog is None:
+            return RGApiPermit(id=permit_id, name=f"Permit {permit_id}", divisions={})
+        return self.catalog[permit_id]
+
+    def get_permit_availability(self, permit_id, month):
+        raise apiclient.exceptions.ClientError("not found")
+
+    def get_permit_inyo_availability(self, permit_id, month):
+        if permit_id == "missing":
+            raise apiclient.exceptions.ClientError("not found")
+        self.availability.append(permit_id)
+        return inyo_month(month, self.remaining)
@@ -0,0 +1,46 @@
+import importlib.util
+from pathlib import Path
+
+import apiclient.exceptions
+import pytest
+import requests
+from typer.testing import CliRunner
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="module")
+def camping():
+    # the CLI is a script, not part of the package
+    spec = importlib.util.spec_from_file_location(
+        "camping", ROOT / "scripts" / "camping.py"
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class FailingClient:
+    # every request fails, with a connection error for campground "offline"
+    def __getattr__(self, name):
+        def request(camp_id, *args, **kwargs):
+            if camp_id == "offline":
+                raise requests.exceptions.ConnectionError("connection refused")
+            raise apiclient.exceptions.ServerError("unavailable", status_code=503)
+
+        return request
+
+
+def test_shell_survives_request_errors(camping, monkeypatch):
+    monkeypatch.setattr(
+        "recreation.session.RecreationGovClient", lambda **kwargs: FailingClient()
+    )
+    result = CliRunner().invoke(
+        camping.app, ["shell"], input="info 234436\ninfo offline\ncache\nquit\n"
+    )
+
+    assert result.exit_code == 0, result.output
+    assert "unavailable" in result.output
+    assert "ConnectionError" in result.output
+    # the shell kept going after both failures
+    assert "0 campgrounds" in result.output
@@ -0,0 +1,99 @@
+import json
+import random
+
+from recreation.catalog import (
+    CatalogFacility,
+    FacilityCatalog,
+    haversine_km,
+    read_ridb_export,
+)
+
+
+def test_haversine_km():
+    assert haversine_km(41.5, -121.6, 41.5, -121.6) == 0
+    # one degree of latitude
+    assert round(haversine_km(41.0, -121.6, 42.0, -121.6), 1) == 111.2
+
+
+def test_near_matches_brute_force():
+    rng = random.Random(0)
+    facilities = [
+        CatalogFacility(
+            facility_id=str(n),
+            name=f"Facility {n}",
+            latitude=rng.uniform(-85, 85),
+            longitude=rng.uniform(-180, 180),
+            facility_type=rng.choice(["Campground", "Permit"]),
+        )
+        for n in range(3000)
+    ]
+    catalog = FacilityCatalog(facilities)
+
+    for _ in range(50):
+        lat, lon = rng.uniform(-80, 80), rng.uniform(-180, 180)
+        radius = rng.choice([10, 100, 500, 2000])
+        expected = sorted(
+            (haversine_km(lat, lon, f.latitude, f.longitude), f.facility_id)
+            for f in facilities
+            if haversine_km(lat, lon, f.latitude, f.longitude) <= radius
+            and f.facility_type == "Campground"
+        )
+        found = catalog.near(lat, lon, radius, ["campground"])
+        assert [f.facility_id for f, _ in found] == [i for _, i in expected]
+
+
+def test_near_across_antimeridian():
+    catalog = FacilityCatalog(
+        [
+            CatalogFacility("1", "East", -17.0, 179.9),
+            CatalogFacility("2", "West", -17.0, -179.9),
+        ]
+    )
+    assert [f.facility_id for f, _ in catalog.near(-17.0, 179.95, 20)] == ["1", "2"]
+    assert [f.facility_id for f, _ in catalog.near(-17.0, 179.95, 20, limit=1)] == ["1"]
+
+
+def test_read_ridb_export(tmp_path):
+    csv_path = tmp_path / "Facilities_API_v1.csv"
+    csv_path.write_text(
+        "FacilityID,FacilityName,FacilityTypeDescription,FacilityLatitude,"
+        "FacilityLongitude,ParentRecAreaID\n"
+        "234436,LITTLE MT. HOFFMAN LOOKOUT,Campground,41.5786111,-121.6597222,1073\n"
+        "1,NOWHERE,Campground,,,\n"
+    )
+    json_path = tmp_path / "Facilities_API_v1.json"
+    json_path.write_text(
+        json.dumps(
+            {
+                "RECDATA": [
+                    {
+                        "FacilityID": 234436,
+                        "FacilityName": "LITTLE MT. HOFFMAN LOOKOUT",
+                        "FacilityTypeDescription": "Campground",
+                        "FacilityLatitude": 41.5786111,
+                        "FacilityLongitude": -121.6597222,
+                        "ParentRecAreaID": 1073,
+                    }
+                ]
+            }
+        )
+    )
+
+    expected = [
+        CatalogFacility(
+            "234436",
+            "LITTLE MT. HOFFMAN LOOKOUT",
+            41.5786111,
+            -121.6597222,
+            "Campground",
+            "1073",
+        )
+    ]
+    assert read_ridb_export(csv_path) == expected
+    assert read_ridb_export(json_path) == expected
+
+    catalog = FacilityCatalog.from_export(csv_path)
+    path = catalog.save(tmp_path / "facilities.json")
+    loaded = FacilityCatalog.load(path)
+    assert list(loaded) == expected
+    assert loaded.get("234436") == expected[0]
@@ -0,0 +1,163 @@
+import random
+from typing import Any
+
+import pytest
+from pydantic import BaseModel, ValidationError, parse_obj_as
+
+from recreation.rgapi.camp import RGApiCampsite
+from recreation.rgapi.decode import model_decoder, parse_trusted
+from recreation.rgapi.permit import RGApiPermit
+
+EQUIPMENT = ["Tent", "Trailer", "RV", "Pickup Camper"]
+TYPES = ["STANDARD NONELECTRIC", "RV NONELECTRIC", "TENT ONLY NONELECTRIC"]
+
+
+def detail(rng: random.Random, i: int, id_key: str = "attribute_id") -> dict:
+    return {
+        id_key: rng.choice([i, None]),
+        "attribute_name": f"Attribute {i}",
+        "attribute_value": rng.choice(["Yes", "No", "12", None]),
+        "attribute_code": rng.choice([f"attr_{i}", None]),
+        "ignored": "extra",
+    }
+
+
+def campsite_data(rng: random.Random, site: int) -> dict[str, Any]:
+    return {
+        "campsite_id": str(site),
+        "campsite_latitude": rng.choice([41.57, 41]),
+        "campsite_longitude": -121.65,
+        "campsite_name": f"A{site:03d}",
+        "campsite_reserve_type": rng.choice(["Site-Specific", "Non Site-Specific"]),
+        "campsite_status": rng.choice(["Open", "Not Reservable"]),
+        "campsite_type": rng.choice(TYPES),
+        "facility_id": "234436",
+        "loop": rng.choice(["A", None]),
+        "parent_site_id": None,
+        "is_accessible": rng.random() < 0.2,
+        "is_deactivated": False,
+        "permitted_equipment": [
+            {
+                "campsite_equipment_type_id": i,
+                "equipment_name": name,
+                "max_length": rng.choice([0, 20, 35]),
+                "is_deactivated": rng.random() < 0.1,
+            }
+            for i, name in enumerate(rng.sample(EQUIPMENT, rng.randrange(4)))
+        ],
+        "notices": [
+            {
+                "notice_type": "warning",
+                "notice_text": "Bears",
+                "hide_on_permit": False,
+                "active": True,
+            }
+        ][: rng.randrange(2)],
+        "attributes": [detail(rng, i) for i in range(rng.randrange(5))],
+        "site_details_map": {
+            f"detail_{i}": detail(rng, i) for i in range(rng.randrange(5))
+        },
+        "equipment_details_map": {
+            f"equip_{i}": detail(rng, i, "equipment_id")
+            for i in range(rng.randrange(3))
+        },
+    }
+
+
+def assert_same(a: Any, b: Any):
+    # equal, and with the same types all the way down
+    assert type(a) is type(b)
+    if isinstance(a, BaseModel):
+        assert a.__fields_set__ == b.__fields_set__
+        assert list(a.__dict__) == list(b.__dict__)
+        for name in a.__fields__:
+            assert_same(getattr(a, name), getattr(b, name))
+    elif isinstance(a, list):
+        assert len(a) == len(b)
+        for x, y in zip(a, b):
+            assert_same(x, y)
+    elif isinstance(a, dict):
+        assert list(a) == list(b)
+        for key in a:
+            assert_same(a[key], b[key])
+    else:
+        assert a == b
+
+
+def test_parse_trusted_matches_validation():
+    rng = random.Random(0)
+    records = [campsite_data(rng, site) for site in range(300)]
+    # fields left out fall back to their defaults, and are not marked as set
+    del records[5]["loop"]
+    del records[6]["parent_site_id"]
+
+    assert_same(
+        parse_trusted(RGApiCampsite, records),
+        parse_obj_as(list[RGApiCampsite], records),
+    )
+    assert parse_trusted(RGApiCampsite, []) == []
+
+
+def test_parse_trusted_falls_back_to_validation():
+    rng = random.Random(1)
+    records = [campsite_data(rng, site) for site in range(3)]
+
+    records[2]["campsite_status"] = "Closed Forever"
+    with pytest.raises(ValidationError):
+        parse_trusted(RGApiCampsite, records)
+
+    del records[2]["campsite_status"]
+    with pytest.raises(ValidationError):
+        parse_trusted(RGApiCampsite, records)
+
+    # a string where pydantic would coerce it is still coerced
+    records = [campsite_data(rng, site) for site in range(3)]
+    records[0]["campsite_latitude"] = "41.5"
+    records[1]["campsite_latitude"] = "41.5"
+    assert [s.latitude for s in parse_trusted(RGApiCampsite, records)][:2] == [
+        41.5,
+        41.5,
+    ]
+
+
+@pytest.mark.parametrize(
+    "key, value",
+    [
+        ("campsite_name", None),
+        ("campsite_name", 7),
+        ("is_accessible", "false"),
+        ("is_accessible", None),
+        ("facility_id", 234436),
+        ("campsite_longitude", True),
+        ("notices", "none"),
+        (
+            "permitted_equipment",
+            [
+                {
+                    "campsite_equipment_type_id": "1",
+                    "equipment_name": "Tent",
+                    "max_length": 20.0,
+                    "is_deactivated": "no",
+                }
+            ],
+        ),
+    ],
+)
+def test_parse_trusted_validates_mistyped_records(key, value):
+    # a value the decoder would pass through or convert differently sends
+    # the rest to validation, so the result is the same either way
+    rng = random.Random(2)
+    records = [campsite_data(rng, site) for site in range(3)]
+    records[2][key] = value
+    try:
+        expected = parse_obj_as(list[RGApiCampsite], records)
+    except ValidationError:
+        with pytest.raises(ValidationError):
+            parse_trusted(RGApiCampsite, records)
+    else:
+        assert_same(parse_trusted(RGApiCampsite, records), expected)
+
+
+def test_model_decoder_rejects_models_with_private_state():
+    with pytest.raises(TypeError):
+        model_decoder(RGApiPermit)
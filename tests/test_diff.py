@@ -0,0 +1,90 @@
+import datetime as dt
+import io
+import json
+
+from conftest import runs
+
+from recreation.diff import (
+    AvailabilityChange,
+    DiffKind,
+    diff_availability,
+    opened_availability,
+    write_ndjson,
+)
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+
+AVAILABLE = CampsiteAvailabilityStatus.available
+RESERVED = CampsiteAvailabilityStatus.reserved
+NOT_AVAILABLE = CampsiteAvailabilityStatus.not_available
+
+
+def test_diff_opened_and_closed():
+    old = runs(
+        ("1", 1, RESERVED, 10),
+        ("2", 1, AVAILABLE, 5),
+        ("2", 6, RESERVED, 5),
+    )
+    new = runs(
+        ("1", 1, RESERVED, 3),
+        ("1", 4, AVAILABLE, 2),
+        ("1", 6, RESERVED, 5),
+        ("2", 1, AVAILABLE, 2),
+        ("2", 3, RESERVED, 8),
+    )
+
+    changes = list(diff_availability(old, new))
+    assert changes == [
+        AvailabilityChange(
+            DiffKind.opened, "1", dt.date(2022, 7, 4), 2, RESERVED, AVAILABLE
+        ),
+        AvailabilityChange(
+            DiffKind.closed, "2", dt.date(2022, 7, 3), 3, AVAILABLE, RESERVED
+        ),
+    ]
+    assert [c.kind for c in opened_availability(old, new)] == [DiffKind.opened]
+
+
+def test_diff_coalesces_across_runs():
+    old = runs(("1", 1, RESERVED, 2), ("1", 3, RESERVED, 2))
+    new = runs(("1", 1, AVAILABLE, 4))
+
+    changes = list(diff_availability(old, new))
+    assert len(changes) == 1
+    assert changes[0].date == dt.date(2022, 7, 1)
+    assert changes[0].end_date == dt.date(2022, 7, 5)
+
+
+def test_diff_ignores_uncovered_sites_and_dates():
+    old = runs(("1", 1, RESERVED, 5))
+    new = runs(("1", 3, AVAILABLE, 10), ("2", 1, AVAILABLE, 5))
+
+    changes = list(diff_availability(old, new))
+    assert len(changes) == 1
+    assert changes[0].id == "1"
+    assert changes[0].date == dt.date(2022, 7, 3)
+    assert changes[0].length == 3
+
+
+def test_diff_status_only_change_ignored():
+    old = runs(("1", 1, RESERVED, 5))
+    new = runs(("1", 1, NOT_AVAILABLE, 5))
+    assert list(diff_availability(old, new)) == []
+
+
+def test_write_ndjson():
+    old = runs(("1", 1, RESERVED, 2))
+    new = runs(("1", 1, AVAILABLE, 2))
+
+    out = io.StringIO()
+    count = write_ndjson(diff_availability(old, new), out, {"campground_id": "9"})
+    assert count == 1
+    assert json.loads(out.getvalue()) == {
+        "kind": "opened",
+        "id": "1",
+        "date": "2022-07-01",
+        "end_date": "2022-07-03",
+        "length": 2,
+        "old_status": "Reserved",
+        "new_status": "Available",
+        "campground_id": "9",
+    }
@@ -0,0 +1,108 @@
+import datetime as dt
+
+from conftest import FakePermitClient
+
+from recreation.core import CACHE_DIR_ENV
+from recreation.entrypoints import (
+    DIVISION,
+    ENTRANCE,
+    EntryPointIndex,
+    permit_entry_points,
+    stream_entry_points,
+)
+from recreation.rgapi.permit import RGApiPermit
+
+
+def division(div_id, name, latitude, longitude, entry_ids=()):
+    return {
+        "code": div_id,
+        "district": "",
+        "description": "",
+        "entry_ids": list(entry_ids),
+        "exit_ids": [],
+        "id": div_id,
+        "latitude": latitude,
+        "longitude": longitude,
+        "name": name,
+        "type": "Entry Point",
+    }
+
+
+def entrance(entry_id, name, latitude, longitude, is_entry=True):
+    return {
+        "has_parking": True,
+        "id": entry_id,
+        "name": name,
+        "is_entry": is_entry,
+        "is_exit": True,
+        "is_issue_station": False,
+        "latitude": latitude,
+        "longitude": longitude,
+        "town": "",
+    }
+
+
+PERMITS = {
+    "233262": RGApiPermit(
+        id="233262",
+        name="Inyo",
+        divisions={
+            "424": division("424", "Bishop Pass", 37.17, -118.56, ["9"]),
+            "425": division("425", "Piute Pass", 37.24, -118.69),
+            "426": division("426", "No Location", 0.0, 0.0),
+        },
+        entrances=[
+            entrance("9", "South Lake", 37.16, -118.57),
+            entrance("10", "Ranger Station", 37.36, -118.39, is_entry=False),
+        ],
+    ),
+    "233261": RGApiPermit(
+        id="233261",
+        name="Desolation",
+        divisions={"290": division("290", "Camper Flat", 38.95, -120.17)},
+    ),
+}
+
+
+def test_permit_entry_points():
+    points = permit_entry_points(PERMITS["233262"])
+    assert [(p.kind, p.id) for p in points] == [
+        (DIVISION, "424"),
+        (DIVISION, "425"),
+        (ENTRANCE, "9"),
+    ]
+    assert points[2].division_ids == ["424"]
+
+
+def test_entry_point_index(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    client = FakePermitClient(PERMITS, remaining={"424": 5, "425": 1})
+    index, errors = EntryPointIndex.fetch(
+        ["233262", "desolation", "missing"], workers=2, client=client
+    )
+    assert list(errors) == ["missing"]
+    assert index.permit_ids == ["233262", "233261"]
+
+    # South Lake trailhead, the Bishop Pass zone, then Piute Pass 13 km away
+    near = index.near(37.16, -118.57, 15)
+    assert [(p.kind, p.id) for p, _ in near] == [
+        (ENTRANCE, "9"),
+        (DIVISION, "424"),
+        (DIVISION, "425"),
+    ]
+    assert [p.id for p, _ in index.near(37.16, -118.57, 15, [ENTRANCE])] == ["9"]
+
+    index.save()
+    assert [
+        (p.kind, p.id) for p, _ in EntryPointIndex.load().near(37.16, -118.57, 15)
+    ] == [(p.kind, p.id) for p, _ in near]
+
+    # only the permit in range has its availability fetched
+    start = (dt.date.today().replace(day=1) + dt.timedelta(days=40)).replace(day=1)
+    results = list(stream_entry_points(near, start, start, workers=2, client=client))
+    assert client.availability == ["233262"]
+    assert {r.point.id: r.availability.ids for r in results} == {
+        "9": ["424"],
+        "424": ["424"],
+        "425": ["425"],
+    }
@@ -0,0 +1,119 @@
+import datetime as dt
+
+import pytest
+from conftest import runs
+
+from recreation.availability_list import PermitAvailability, PermitAvailabilityList
+from recreation.core import CACHE_DIR_ENV
+from recreation.history import (
+    KIND_CAMPGROUND,
+    KIND_PERMIT,
+    HistoryStore,
+    default_history_path,
+)
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+
+AVAILABLE = CampsiteAvailabilityStatus.available
+RESERVED = CampsiteAvailabilityStatus.reserved
+
+
+def at(minute: int) -> dt.datetime:
+    return dt.datetime(2022, 6, 1, 12, minute, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(tmp_path / "history.sqlite") as store:
+        yield store
+
+
+def test_record_only_writes_deltas(store):
+    first = runs(("1", 1, RESERVED, 10), ("2", 1, AVAILABLE, 10))
+    second = runs(
+        ("1", 1, RESERVED, 3),
+        ("1", 4, AVAILABLE, 2),
+        ("1", 6, RESERVED, 5),
+        ("2", 1, AVAILABLE, 10),
+    )
+
+    store.record("234436", first, polled_at=at(0))
+    store.record("234436", first, polled_at=at(1))
+    store.record("234436", second, polled_at=at(2))
+
+    polls = store.polls(KIND_CAMPGROUND, "234436")
+    assert [p.changed for p in polls] == [2, 3]
+    assert [p.count for p in polls] == [2, 1]
+    assert polls[0].last_polled_at == at(1)
+    assert polls[0].start_date == dt.date(2022, 7, 1)
+
+    assert store.snapshot(KIND_CAMPGROUND, "234436").availability == (
+        second.availability
+    )
+    assert store.snapshot(KIND_CAMPGROUND, "234436", at=at(1)).availability == (
+        first.availability
+    )
+
+
+def test_record_partial_window(store):
+    store.record("1", runs(("1", 1, RESERVED, 20)), polled_at=at(0))
+    store.record("1", runs(("1", 11, AVAILABLE, 10)), polled_at=at(1))
+
+    current = store.snapshot(KIND_CAMPGROUND, "1")
+    assert (
+        current.availability
+        == runs(("1", 1, RESERVED, 10), ("1", 11, AVAILABLE, 10)).availability
+    )
+
+
+def test_snapshot_filters(store):
+    store.record(
+        "1",
+        runs(("1", 1, RESERVED, 5), ("1", 6, AVAILABLE, 5), ("2", 1, RESERVED, 10)),
+    )
+    avail = store.snapshot(
+        KIND_CAMPGROUND,
+        "1",
+        start_date=dt.date(2022, 7, 7),
+        site_ids=["1"],
+    )
+    assert avail.availability == runs(("1", 6, AVAILABLE, 5)).availability
+
+
+def test_history_versions(store):
+    store.record("1", runs(("1", 1, RESERVED, 2)), polled_at=at(0))
+    store.record("1", runs(("1", 1, AVAILABLE, 2)), polled_at=at(5))
+
+    versions = store.history(KIND_CAMPGROUND, "1", site_ids=["1"])
+    assert [(v.value, v.valid_from, v.valid_to) for v in versions] == [
+        ("Reserved", at(0), at(5)),
+        ("Available", at(5), None),
+    ]
+
+
+def test_permit_run_length_encoded(store):
+    days = [
+        PermitAvailability("290", dt.date(2022, 7, d), 5, 14, False) for d in (1, 2, 3)
+    ]
+    days.append(PermitAvailability("290", dt.date(2022, 7, 4), 4, 14, False))
+    avail = PermitAvailabilityList(days)
+
+    store.record("233261", avail)
+    assert store.polls(KIND_PERMIT, "233261")[0].changed == 2
+    assert store.snapshot(KIND_PERMIT, "233261").availability == days
+    assert store.sources() == [(KIND_PERMIT, "233261")]
+
+
+def test_history_path(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path / "cache"))
+    path = tmp_path / "cache" / "history.sqlite"
+    assert default_history_path() == path
+
+    # reading needs an existing database, and doesn't leave an empty one
+    with pytest.raises(FileNotFoundError):
+        HistoryStore(create=False)
+    assert not path.exists()
+
+    with HistoryStore() as store:
+        store.record("234436", runs(("1", 1, AVAILABLE, 2)), at(0))
+    with HistoryStore(create=False) as store:
+        assert store.path == path
@@ -0,0 +1,63 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# modules the CLI should only import once a command needs them
+LAZY_MODULES = [
+    "apiclient",
+    "apiclient_pydantic",
+    "backoff",
+    "dateutil",
+    "fake_useragent",
+    "pydantic",
+    "requests",
+    "sqlite3",
+]
+# cumulative import time of the recreation package when running --help
+RECREATION_BUDGET_US = 50_000
+
+
+def import_times(*args: str) -> dict[str, tuple[int, bool]]:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # module -> (cumulative microseconds, imported at top level)
+    times: dict[str, tuple[int, bool]] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = (int(cumulative), not name.startswith("  "))
+    return times
+
+
+def imported(times: dict[str, tuple[int, bool]], package: str) -> list[str]:
+    return [name for name in times if name.split(".")[0] == package]
+
+
+def test_cli_help_imports_lazily():
+    times = import_times("scripts/camping.py", "--help")
+
+    for package in LAZY_MODULES:
+        assert not imported(times, package), package
+
+    # nested imports are already counted in their parent's cumulative time
+    recreation = sum(
+        times[name][0] for name in imported(times, "recreation") if times[name][1]
+    )
+    assert recreation < RECREATION_BUDGET_US
+
+
+def test_availability_list_imports_lazily():
+    times = import_times("-c", "import recreation.availability_list")
+    for package in ["apiclient", "dateutil", "fake_useragent"]:
+        assert not imported(times, package), package
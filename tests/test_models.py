@@ -1,9 +1,12 @@
+import json
+import threading
 from http.client import responses
 
 import pytest
 import responses
 
 from recreation.models import Campground, Campsite
+from recreation.rgapi.camp import RGApiCampground, RGApiCampsite
 
 
 @pytest.fixture
@@ -49,7 +52,8 @@ def test_campground_init(campground_model, campground_data):
         campground_model.url == f"https://www.recreation.gov/camping/campgrounds/{cid}"
     )
     assert campground_model.campsite_ids == ["64082"]
-    assert campground_model.campsites == {}
+    # campsites aren't fetched until they're read
+    assert campground_model._campsites is None
 
 
 @responses.activate
@@ -89,3 +93,111 @@ def test_campground_fetch_campsites(campground_model, campsite_data):
     assert site_id in camp.campsites
     assert camp.campsites[site_id].id == site_id
     assert camp.campsites[site_id].name == campsite_data["campsite_name"]
+
+
+CAMPGROUND_DATA = {
+    "campsites": ["64082"],
+    "facility_email": "",
+    "facility_id": "234436",
+    "facility_latitude": 41.5786111,
+    "facility_longitude": -121.6597222,
+    "facility_map_url": "",
+    "facility_name": "LITTLE MT. HOFFMAN LOOKOUT",
+    "facility_phone": "530-964-2184",
+    "facility_type": "STANDARD",
+    "parent_asset_id": "1073",
+}
+CAMPSITE_DATA = {
+    "campsite_id": "64082",
+    "campsite_latitude": 41.578691,
+    "campsite_longitude": -121.658252,
+    "campsite_name": "001",
+    "campsite_reserve_type": "Site-Specific",
+    "campsite_status": "Open",
+    "campsite_type": "CABIN NONELECTRIC",
+    "facility_id": "234436",
+    "loop": "AREA LITTLE MT. HOFFMAN LOOKOUT",
+    "parent_site_id": None,
+    "is_accessible": False,
+    "is_deactivated": False,
+    "permitted_equipment": [],
+    "notices": [],
+    "attributes": [],
+    "site_details_map": {},
+    "equipment_details_map": {},
+}
+RATINGS_DATA = {
+    "aggregate_cell_coverage_ratings": [],
+    "average_rating": 3.5,
+    "location_id": "234436",
+    "location_type": "Campground",
+    "number_of_ratings": 20,
+    "star_counts": {},
+}
+
+
+@responses.activate
+def test_campground_fetch_all_is_concurrent():
+    # every request waits for all the others, so this only completes if
+    # they are in flight at the same time
+    barrier = threading.Barrier(4, timeout=5)
+
+    def respond(body):
+        def callback(request):
+            barrier.wait()
+            return 200, {}, json.dumps(body)
+
+        return callback
+
+    base = "https://www.recreation.gov/api"
+    for url, body in [
+        (f"{base}/camps/campgrounds/234436", {"campground": CAMPGROUND_DATA}),
+        (f"{base}/camps/campgrounds/234436/campsites", {"campsites": [CAMPSITE_DATA]}),
+        (f"{base}/communication/external/alert", {"alerts": []}),
+        (f"{base}/ratingreview/aggregate", RATINGS_DATA),
+    ]:
+        responses.add_callback(responses.GET, url, callback=respond(body))
+
+    camp = Campground.fetch("234436", fetch_all=True)
+    assert camp.name == CAMPGROUND_DATA["facility_name"]
+    assert list(camp.campsites) == ["64082"]
+    assert camp.alerts == []
+    assert camp.ratings.average_rating == 3.5
+
+
+@responses.activate
+def test_campground_metadata_is_lazy_and_per_instance():
+    base = "https://www.recreation.gov/api/camps/campgrounds/234436"
+    responses.add(responses.GET, base, json={"campground": CAMPGROUND_DATA})
+    responses.add(
+        responses.GET, f"{base}/campsites", json={"campsites": [CAMPSITE_DATA]}
+    )
+
+    camp = Campground.fetch("234436")
+    other = Campground.fetch("234436")
+    other.campsites = {}
+    assert len(responses.calls) == 2
+
+    assert camp.campsites["64082"].name == "001"
+    assert camp.campsites["64082"].id == "64082"
+    assert list(camp.campsites) == ["64082"]
+    assert other.campsites == {}
+    assert len(responses.calls) == 3
+
+
+def test_campground_campsites_fetch_through_its_client():
+    class FakeClient:
+        def __init__(self):
+            self.calls = []
+
+        def get_campground_sites(self, campground_id):
+            self.calls.append(campground_id)
+            return [RGApiCampsite.parse_obj(CAMPSITE_DATA)]
+
+    client = FakeClient()
+    camp = Campground(RGApiCampground.parse_obj(CAMPGROUND_DATA), client)
+    assert client.calls == []
+
+    assert list(camp.campsites) == ["64082"]
+    assert camp.campsites["64082"].name == "001"
+    assert client.calls == ["234436"]
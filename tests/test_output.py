@@ -0,0 +1,66 @@
+import datetime as dt
+import io
+import json
+
+import pytest
+
+from recreation.output import OutputFormat, RowWriter
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+
+FIELDS = ["campsite_id", "start_date", "status"]
+ROWS = [
+    {
+        "campsite_id": "64082",
+        "start_date": dt.date(2023, 7, 1),
+        "status": CampsiteAvailabilityStatus.available,
+        "ignored": 1,
+    },
+    {
+        "campsite_id": "64083",
+        "start_date": dt.date(2023, 7, 2),
+        "status": CampsiteAvailabilityStatus.reserved,
+    },
+]
+EXPECTED = [
+    {"campsite_id": "64082", "start_date": "2023-07-01", "status": "Available"},
+    {"campsite_id": "64083", "start_date": "2023-07-02", "status": "Reserved"},
+]
+
+
+def write_rows(output_format: OutputFormat, rows) -> str:
+    fp = io.StringIO()
+    with RowWriter(fp, output_format, FIELDS) as writer:
+        for row in rows:
+            writer.write(row)
+    return fp.getvalue()
+
+
+def test_ndjson():
+    out = write_rows(OutputFormat.ndjson, ROWS)
+    assert [json.loads(line) for line in out.splitlines()] == EXPECTED
+
+
+def test_csv():
+    out = write_rows(OutputFormat.csv, ROWS)
+    assert out.splitlines() == [
+        "campsite_id,start_date,status",
+        "64082,2023-07-01,Available",
+        "64083,2023-07-02,Reserved",
+    ]
+
+
+def test_json():
+    assert json.loads(write_rows(OutputFormat.json, ROWS)) == EXPECTED
+    assert json.loads(write_rows(OutputFormat.json, [])) == []
+
+
+def test_streams_rows():
+    fp = io.StringIO()
+    writer = RowWriter(fp, OutputFormat.ndjson, FIELDS)
+    writer.write(ROWS[0])
+    assert json.loads(fp.getvalue()) == EXPECTED[0]
+
+
+def test_table_rejected():
+    with pytest.raises(ValueError):
+        RowWriter(io.StringIO(), OutputFormat.table, FIELDS)
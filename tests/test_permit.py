@@ -4,6 +4,7 @@ from typing import Any
 import pytest
 
 from recreation.rgapi.permit import (
+    PermitDivisionIndex,
     RGApiPermit,
     RGApiPermitAvailability,
     RgApiPermitDivision,
@@ -110,6 +111,30 @@ def test_permit_init(permit_data, permit_division, permit_entrance):
     assert permit.entrance_list[1] == permit_entrance
 
 
+def test_permit_division_index(permit_division_data):
+    divisions = {
+        str(i): RgApiPermitDivision(
+            **{**permit_division_data, "id": str(i), "code": code, "name": name}
+        )
+        for i, (code, name) in enumerate(
+            [("GL", "Glen Alpine"), ("gl", "Gilmore Lake"), ("EC", "Echo Lakes")]
+        )
+    }
+    index = PermitDivisionIndex(divisions)
+
+    assert index.code("gl").id == "1"
+    assert index.code("Gl") is None
+    assert index.code("Gl", ignore_case=True).id == "0"
+    assert index.name("echo lakes") is None
+    assert index.name("echo lakes", ignore_case=True).id == "2"
+    assert [d.id for d in index.codes(["EC", "xx", "GL", "EC"])] == ["2", "0"]
+    assert [d.id for d in index.name_prefix("g")] == ["1", "0"]
+    assert [d.id for d in index.name_prefix("GLEN")] == ["0"]
+    assert index.name_prefix("z") == []
+    assert [d.id for d in index.entrance("106")] == ["0", "1", "2"]
+    assert index.entrance("1") == []
+
+
 @pytest.fixture
 def permit_availability_data() -> dict[str, Any]:
     return {
@@ -0,0 +1,96 @@
+import datetime as dt
+import json
+
+import pytest
+import responses
+from apiclient.exceptions import ClientError
+
+from recreation.availability_list import PermitAvailabilityList
+from recreation.permit_family import PermitApiFamily, PermitFamilyMap
+
+STANDARD_URL = "https://www.recreation.gov/api/permits/{id}/availability/month"
+INYO_URL = "https://www.recreation.gov/api/permitinyo/{id}/availability"
+
+
+@pytest.fixture
+def start_date() -> dt.date:
+    return dt.date.today().replace(day=1) + dt.timedelta(days=40)
+
+
+@pytest.fixture
+def inyo_month_data(start_date) -> dict:
+    return {
+        "payload": {
+            start_date.isoformat(): {
+                "424": {"total": 8, "remaining": 5, "is_walkup": False},
+            },
+        }
+    }
+
+
+@pytest.fixture
+def family_map(tmp_path) -> PermitFamilyMap:
+    return PermitFamilyMap(tmp_path / "families.json")
+
+
+def test_family_map_seeded(family_map):
+    assert family_map.get("233261") == PermitApiFamily.standard
+    assert family_map.get("233262") == PermitApiFamily.inyo
+    assert family_map.get("999999") is None
+
+
+def test_family_map_persisted(tmp_path, family_map):
+    family_map.set("999999", PermitApiFamily.inyo)
+
+    data = json.loads((tmp_path / "families.json").read_text())
+    assert data["999999"] == "inyo"
+    assert PermitFamilyMap(tmp_path / "families.json").get(999999) == (
+        PermitApiFamily.inyo
+    )
+
+
+@responses.activate
+def test_fetch_availability_probes_once(start_date, inyo_month_data, family_map):
+    permit_id = "999999"
+    standard = responses.add(
+        responses.GET, STANDARD_URL.format(id=permit_id), status=404, json={}
+    )
+    inyo = responses.add(
+        responses.GET, INYO_URL.format(id=permit_id), status=200, json=inyo_month_data
+    )
+
+    end_date = start_date + dt.timedelta(days=31)
+    avail = PermitAvailabilityList.fetch_availability(
+        permit_id, start_date, end_date, families=family_map
+    )
+    assert avail.ids == ["424"]
+    assert family_map.get(permit_id) == PermitApiFamily.inyo
+    assert standard.call_count == 1
+    assert inyo.call_count == 2
+
+    PermitAvailabilityList.fetch_availability(
+        permit_id, start_date, end_date, families=family_map
+    )
+    assert standard.call_count == 1
+    assert inyo.call_count == 4
+
+
+@responses.activate
+def test_fetch_availability_tries_each_family_once(start_date, family_map):
+    permit_id = "999999"
+    family_map.set(permit_id, PermitApiFamily.inyo)
+    standard = responses.add(
+        responses.GET, STANDARD_URL.format(id=permit_id), status=403, json={}
+    )
+    inyo = responses.add(
+        responses.GET, INYO_URL.format(id=permit_id), status=404, json={}
+    )
+
+    with pytest.raises(ClientError) as exc_info:
+        PermitAvailabilityList.fetch_availability(
+            permit_id, start_date, start_date, families=family_map
+        )
+    # the remembered family's error, without fetching it again
+    assert exc_info.value.status_code == 404
+    assert inyo.call_count == 1
+    assert standard.call_count == 1
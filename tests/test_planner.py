@@ -0,0 +1,49 @@
+import datetime as dt
+import io
+
+from recreation.planner import CampgroundQuery, plan_fetches, read_id_files
+
+
+def test_read_id_files(tmp_path):
+    first = tmp_path / "first.txt"
+    first.write_text("232451\n232449\n\n# lookouts\n232451\n")
+    second = tmp_path / "second.txt"
+    second.write_text("234436  # fav\n232449\n")
+    assert read_id_files([first, second]) == [
+        "232451",
+        "232449",
+        "232451",
+        "234436",
+        "232449",
+    ]
+
+
+def test_read_id_files_stdin(monkeypatch):
+    # tab separated output of `campground near`
+    monkeypatch.setattr(
+        "sys.stdin", io.StringIO("234436\tLITTLE MT. HOFFMAN LOOKOUT\t3.2\n")
+    )
+    assert read_id_files(["-"]) == ["234436"]
+
+
+def test_plan_fetches():
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    start = start.replace(day=10)
+    next_month = (start + dt.timedelta(days=31)).replace(day=1)
+
+    plan = plan_fetches(
+        [
+            CampgroundQuery("1", start, start),
+            CampgroundQuery("2", start, start),
+            CampgroundQuery("1", start, next_month),
+            CampgroundQuery("1", next_month, next_month),
+        ]
+    )
+    assert plan.campground_ids == ["1", "2"]
+    assert plan.months == {
+        "1": [start.replace(day=1), next_month],
+        "2": [start.replace(day=1)],
+    }
+    # 2 metadata requests per campground, plus its months
+    assert plan.planned_requests == (2 + 2) + (2 + 1)
+    assert plan.naive_requests == (2 + 1) + (2 + 1) + (2 + 2) + (2 + 1)
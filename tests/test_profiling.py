@@ -0,0 +1,122 @@
+import datetime as dt
+import time
+
+import responses
+from conftest import campground_month
+
+from recreation.availability_list import CampgroundAvailabilityList
+from recreation.profiling import (
+    AGGREGATE,
+    FILTER,
+    FLATTEN,
+    HTTP_FETCH,
+    JSON_DECODE,
+    VALIDATION,
+    StageProfile,
+    ThreadProfiler,
+    stage,
+)
+from recreation.rgapi.client import RecreationGovClient
+from recreation.rgapi.extra import LocationType
+
+
+def test_stage_self_time_excludes_nested_stages():
+    assert stage("idle") is stage("idle")
+
+    with StageProfile() as profile:
+        with stage("outer"):
+            time.sleep(0.02)
+            with stage("inner"):
+                time.sleep(0.02)
+        with stage("inner"):
+            pass
+
+    outer, inner = profile.totals["outer"], profile.totals["inner"]
+    assert (outer.calls, inner.calls) == (1, 2)
+    assert outer.elapsed >= inner.elapsed
+    assert outer.self_elapsed < outer.elapsed - 0.015
+    assert profile.wall >= outer.elapsed
+    assert [t.name for t in profile.stages()] == ["inner", "outer"]
+
+    # nothing is recorded once the profile is done
+    with stage("outer"):
+        pass
+    assert profile.totals["outer"].calls == 1
+
+
+@responses.activate
+def test_client_stages():
+    responses.add(
+        responses.GET,
+        "https://www.recreation.gov/api/communication/external/alert",
+        json={"alerts": []},
+        status=200,
+    )
+    with StageProfile() as profile:
+        alerts = RecreationGovClient(rate_limiter=None).get_alerts(
+            "234436", LocationType.campground
+        )
+    assert alerts == []
+    assert profile.totals[HTTP_FETCH].calls == 1
+    assert profile.totals[JSON_DECODE].calls == 1
+    assert profile.totals[VALIDATION].calls == 1
+
+
+def test_default_headers_are_not_a_stage():
+    # APIClient's own methods are serialized but aren't timed as API calls
+    with StageProfile() as profile:
+        headers = RecreationGovClient(rate_limiter=None).get_default_headers()
+    assert "User-Agent" in headers
+    assert profile.totals == {}
+
+
+def test_availability_stages():
+    month = dt.date(2022, 7, 1)
+    api_month = campground_month(month, days=3)
+    with StageProfile() as profile:
+        avail = CampgroundAvailabilityList.from_campground([api_month])
+        avail = avail.filter_dates(month, month).filter_length(2)
+    assert [a.length for a in avail.availability] == [3]
+    assert [t.name for t in profile.stages()] == [FLATTEN, AGGREGATE, FILTER]
+    assert profile.totals[FILTER].calls == 2
+
+
+def _worker_only():
+    return sum(range(1000))
+
+
+def test_thread_profiler_includes_worker_threads(tmp_path):
+    import pstats
+    from concurrent.futures import ThreadPoolExecutor
+
+    profiler = ThreadProfiler()
+    profiler.start()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: _worker_only(), range(4)))
+    profiler.stop()
+    profiler.dump(str(tmp_path / "run.prof"))
+
+    stats = pstats.Stats(str(tmp_path / "run.prof"))
+    assert any(func[2] == "_worker_only" for func in stats.stats)  # type: ignore
+
+
+def test_thread_profiler_uses_one_profile_on_sys_monitoring(monkeypatch):
+    # 3.12+ cProfile is process wide, and a second enable() in a worker
+    # raises, so no per-thread hook may be installed there
+    import sys
+    import threading
+
+    import recreation.profiling
+
+    monkeypatch.setattr(recreation.profiling, "PROFILE_PER_THREAD", False)
+    hooks = []
+    worker = threading.Thread(target=lambda: hooks.append(sys.getprofile()))
+    profiler = ThreadProfiler()
+    profiler.start()
+    try:
+        worker.start()
+        worker.join(timeout=5)
+    finally:
+        profiler.stop()
+    assert hooks == [None]
+    assert len(profiler._profiles) == 1
@@ -0,0 +1,122 @@
+import datetime as dt
+
+import responses
+from conftest import FakeCampClient, FakeClock, FakePermitClient
+
+from recreation.core import CACHE_DIR_ENV
+from recreation.ratelimit import RateLimiter
+from recreation.scanner import (
+    scan_campground,
+    scan_campgrounds,
+    shard,
+    stream_campgrounds,
+    stream_permits,
+)
+
+
+def test_shard():
+    assert shard(["a", "b", "c", "d", "e"], 2) == [["a", "c", "e"], ["b", "d"]]
+    assert shard(["a"], 4) == [["a"]]
+    assert shard([], 4) == [[]]
+
+
+def test_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=2, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.now == 0
+    assert not limiter.try_acquire()
+    limiter.acquire()
+    assert clock.now == 0.5
+    limiter.acquire()
+    assert clock.now == 1.0
+
+
+def test_shared_rate_limiter():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, shared=True, clock=clock, sleep=clock.sleep)
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+    clock.now = 1.0
+    assert limiter.try_acquire()
+
+
+@responses.activate
+def test_scan_campground_error():
+    responses.add(
+        responses.GET,
+        "https://www.recreation.gov/api/camps/campgrounds/1",
+        status=404,
+        json={},
+    )
+    today = dt.date.today()
+    result = scan_campground("1", today, today)
+    assert result.campground_id == "1"
+    assert result.error is not None
+    assert result.availability.availability == []
+
+
+def test_stream_campgrounds():
+    client = FakeCampClient()
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    end = start + dt.timedelta(days=35)
+
+    results = stream_campgrounds(
+        ["slow", "fast", "missing", "fast"], start, end, workers=8, client=client
+    )
+    seen = []
+    for result in results:
+        seen.append(result)
+        if result.campground_id == "fast":
+            client.release_slow.set()
+
+    by_id = {result.campground_id: result for result in seen}
+    assert len(seen) == 3
+    # fast finished while slow was still waiting on its months
+    assert [r.campground_id for r in seen].index("fast") < [
+        r.campground_id for r in seen
+    ].index("slow")
+    assert by_id["missing"].error is not None
+    assert by_id["fast"].name == "Camp fast"
+    assert by_id["fast"].site_names == {"64082": "001"}
+    assert by_id["fast"].availability.availability
+    assert sum(1 for call in client.calls if call[:2] == ("month", "fast")) == 2
+
+
+def test_scan_campgrounds(monkeypatch):
+    # the worker processes fork with the fake client in place
+    monkeypatch.setattr(
+        "recreation.scanner.RecreationGovClient", lambda **kwargs: FakeCampClient()
+    )
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+
+    results = list(
+        scan_campgrounds(
+            ["a", "b", "missing", "c", "b"], start, start, processes=2, workers=2
+        )
+    )
+    by_id = {result.campground_id: result for result in results}
+    assert len(results) == 4
+    assert by_id["missing"].error is not None
+    assert by_id["c"].name == "Camp c"
+    assert by_id["c"].availability.availability
+
+
+def test_stream_permits(tmp_path, monkeypatch):
+    monkeypatch.setenv(CACHE_DIR_ENV, str(tmp_path))
+    client = FakePermitClient()
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+
+    results = {
+        result.permit_id: result
+        for result in stream_permits(
+            ["inyo", "233262", "missing"], start, start, workers=4, client=client
+        )
+    }
+    # the alias and its id are fetched once
+    assert sorted(client.permits) == ["233262", "missing"]
+    assert results["missing"].error is not None
+    assert results["233262"].name == "Permit 233262"
+    assert results["233262"].availability.ids == ["424"]
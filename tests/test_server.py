@@ -0,0 +1,256 @@
+import datetime as dt
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import apiclient.exceptions
+import pytest
+from conftest import FakeClock, campground_month
+
+from recreation.ratelimit import RateLimiter
+from recreation.rgapi.camp import RGApiCampground, RGApiCampsite
+from recreation.rgapi.extra import RGApiRatingAggregate
+from recreation.server import (
+    Overloaded,
+    QueryService,
+    SheddingRateLimiter,
+    SingleFlightCache,
+    make_server,
+)
+
+
+def test_rate_limiter_timeout():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=1, clock=clock, sleep=clock.sleep)
+    assert limiter.acquire(timeout=0)
+    assert not limiter.acquire(timeout=0.5)
+    assert clock.now == 0
+    assert limiter.acquire(timeout=1)
+    assert clock.now == 1
+
+
+def test_shedding_rate_limiter():
+    clock = FakeClock()
+    limiter = SheddingRateLimiter(
+        rate=1, burst=1, max_wait=0.5, clock=clock, sleep=clock.sleep
+    )
+    limiter.acquire()
+    with pytest.raises(Overloaded):
+        limiter.acquire()
+
+
+def test_single_flight_coalesces():
+    cache = SingleFlightCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return "value"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("k", 60, loader)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.misses + cache.coalesced < 8 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["value"] * 8
+    assert len(calls) == 1
+    assert cache.coalesced == 7
+    assert cache.get("k", 60, loader) == "value"
+    assert cache.hits == 1
+
+
+def test_single_flight_expiry_and_errors():
+    clock = FakeClock()
+    cache = SingleFlightCache(clock=clock)
+    assert cache.get("k", 10, lambda: 1) == 1
+    assert cache.get("k", 10, lambda: 2) == 1
+    clock.now = 11
+    assert cache.get("k", 10, lambda: 3) == 3
+
+    def fail():
+        raise ValueError("upstream")
+
+    with pytest.raises(ValueError):
+        cache.get("e", 10, fail)
+    assert cache.get("e", 10, lambda: 4) == 4
+
+
+def test_single_flight_prunes_expired_entries():
+    clock = FakeClock()
+    cache = SingleFlightCache(clock=clock)
+    for key in range(5):
+        cache.get(key, 10, lambda: key)
+    assert len(cache) == 5
+    clock.now = 10
+    cache.get("fresh", 10, lambda: "value")
+    assert len(cache) == 1
+
+
+class FakeClient:
+    def __init__(self):
+        self.months = []
+        self.overloaded = False
+        self.error = None
+
+    def get_campground(self, campground_id):
+        return RGApiCampground(
+            campsites=["64082"],
+            facility_email="",
+            facility_id=campground_id,
+            facility_latitude=41.57,
+            facility_longitude=-121.65,
+            facility_map_url="",
+            facility_name="LITTLE MT. HOFFMAN LOOKOUT",
+            facility_phone="",
+            facility_type="STANDARD",
+            parent_asset_id="1073",
+        )
+
+    def get_campground_sites(self, campground_id):
+        return [
+            RGApiCampsite(
+                campsite_id="64082",
+                campsite_latitude=41.57,
+                campsite_longitude=-121.65,
+                campsite_name="001",
+                campsite_reserve_type="Site-Specific",
+                campsite_status="Open",
+                campsite_type="CABIN NONELECTRIC",
+                facility_id=campground_id,
+                loop="LOOP",
+                parent_site_id=None,
+                is_accessible=False,
+                is_deactivated=False,
+                permitted_equipment=[],
+                notices=[],
+                attributes=[],
+                site_details_map={},
+                equipment_details_map={},
+            )
+        ]
+
+    def get_alerts(self, location_id, location_type):
+        return []
+
+    def get_ratings(self, location_id, location_type):
+        return RGApiRatingAggregate(
+            aggregate_cell_coverage_ratings=[],
+            average_rating=0,
+            location_id=location_id,
+            location_type=location_type.value,
+            number_of_ratings=0,
+            star_counts={},
+        )
+
+    def get_campground_availability(self, campground_id, month):
+        if self.overloaded:
+            raise Overloaded("upstream request budget exhausted")
+        if self.error is not None:
+            raise self.error
+        self.months.append(month)
+        return campground_month(month, days=3)
+
+
+@pytest.fixture
+def server():
+    client = FakeClient()
+    server = make_server(QueryService(client=client), port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}", client
+    server.shutdown()
+    server.server_close()
+
+
+def get(url):
+    try:
+        with urllib.request.urlopen(url) as resp:
+            return resp.status, json.load(resp)
+    except urllib.error.HTTPError as exc:
+        return exc.code, json.load(exc)
+
+
+def test_server_campground_availability(server):
+    base, client = server
+    month = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    month = month.replace(day=1)
+    query = f"start_date={month}&end_date={month}"
+
+    status, rows = get(f"{base}/campground/234436/availability?{query}")
+    assert status == 200
+    assert rows == [
+        {
+            "campsite_id": "64082",
+            "campsite_name": "001",
+            "start_date": month.isoformat(),
+            "end_date": (month + dt.timedelta(days=3)).isoformat(),
+            "length": 3,
+            "status": "Available",
+        }
+    ]
+
+    status, rows = get(f"{base}/campground/234436/availability?{query}&length=4")
+    assert status == 200
+    assert rows == []
+    # the second query was answered from the month cache
+    assert client.months == [month]
+
+    status, info = get(f"{base}/campground/234436")
+    assert info["name"] == "LITTLE MT. HOFFMAN LOOKOUT"
+    assert [site["name"] for site in info["campsites"]] == ["001"]
+
+    status, stats = get(f"{base}/stats")
+    assert stats["misses"] == 2
+    assert stats["hits"] == 3
+
+
+def test_server_campground_site_filter(server):
+    base, client = server
+    month = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    month = month.replace(day=1)
+    query = f"start_date={month}&end_date={month}"
+
+    # the only campsite is not accessible, so no month is fetched
+    status, rows = get(f"{base}/campground/234436/availability?{query}&accessible=1")
+    assert status == 200
+    assert rows == []
+    assert client.months == []
+
+    status, rows = get(f"{base}/campground/234436/availability?{query}&accessible=0")
+    assert [row["campsite_id"] for row in rows] == ["64082"]
+    assert client.months == [month]
+
+
+def test_server_errors(server):
+    base, client = server
+    assert get(f"{base}/campground/234436/availability")[0] == 400
+    assert get(f"{base}/nothing")[0] == 404
+
+    client.overloaded = True
+    status, body = get(f"{base}/campground/234436/availability?start_date=2099-01-01")
+    assert status == 503
+    assert get(f"{base}/stats")[1]["shed"] == 1
+    client.overloaded = False
+
+    query = f"{base}/campground/234436/availability?start_date=2099-01-01"
+    client.error = apiclient.exceptions.ClientError("gone", status_code=404)
+    assert get(query)[0] == 404
+    # codes HTTPStatus doesn't know are reported as a bad gateway
+    client.error = apiclient.exceptions.ClientError("closed", status_code=499)
+    assert get(query)[0] == 502
+    client.error = RuntimeError("bug")
+    assert get(query) == (500, {"error": "internal error"})
@@ -0,0 +1,109 @@
+import datetime as dt
+from types import SimpleNamespace
+
+import apiclient.exceptions
+import pytest
+from conftest import FakeCampClient
+
+from recreation.models import Campsite
+from recreation.rgapi.camp import RGApiCampsite
+from recreation.session import RecreationSession
+from recreation.site_index import SiteFilter
+
+
+def campsite(campground_id: str) -> Campsite:
+    # campground "2" takes trailers up to 30ft, the others are tent only
+    equipment = [
+        {
+            "campsite_equipment_type_id": 1,
+            "equipment_name": "Trailer" if campground_id == "2" else "Tent",
+            "max_length": 30 if campground_id == "2" else 0,
+            "is_deactivated": False,
+        }
+    ]
+    return Campsite(
+        RGApiCampsite(
+            campsite_id="64082",
+            campsite_latitude=41.57,
+            campsite_longitude=-121.65,
+            campsite_name="001",
+            campsite_reserve_type="Site-Specific",
+            campsite_status="Open",
+            campsite_type="CABIN NONELECTRIC",
+            facility_id=campground_id,
+            loop="LOOP",
+            parent_site_id=None,
+            is_accessible=False,
+            is_deactivated=False,
+            permitted_equipment=equipment,
+            notices=[],
+            attributes=[],
+            site_details_map={},
+            equipment_details_map={},
+        )
+    )
+
+
+@pytest.fixture
+def session(monkeypatch):
+    def fetch(campground_id, fetch_all=False, client=None):
+        if campground_id == "missing":
+            raise apiclient.exceptions.ClientError("not found")
+        return SimpleNamespace(
+            name=f"Camp {campground_id}",
+            url=f"https://www.recreation.gov/camping/campgrounds/{campground_id}",
+            campsites={"64082": campsite(campground_id)},
+        )
+
+    monkeypatch.setattr("recreation.session.Campground.fetch", fetch)
+    with RecreationSession(workers=4, client=FakeCampClient()) as session:
+        yield session
+
+
+def test_session_caches_months(session):
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    next_month = (start.replace(day=1) + dt.timedelta(days=32)).replace(day=1)
+
+    avail = session.campground_availability("1", start)
+    assert len(avail.availability) == 1
+    assert session.requests == 4 + 1
+
+    # same month again is served from the cache
+    session.campground_availability("1", start)
+    assert session.requests == 4 + 1
+
+    # widening the range only fetches the new month
+    avail = session.campground_availability("1", start, next_month)
+    assert session.requests == 4 + 2
+    assert session.client.months == [
+        ("1", start.replace(day=1)),
+        ("1", next_month),
+    ]
+
+
+def test_session_check(session):
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    results = session.check(["1", "missing", "2", "1"], start)
+
+    assert [r.campground_id for r in results] == ["1", "missing", "2"]
+    assert results[0].name == "Camp 1"
+    assert results[0].site_names == {"64082": "001"}
+    assert results[0].availability.availability
+    assert results[1].error is not None
+    assert ("missing", start.replace(day=1)) not in session.months
+
+    with pytest.raises(LookupError):
+        session.campground("missing")
+
+
+def test_session_check_site_filter(session):
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    results = session.check(
+        ["1", "2"], start, site_filter=SiteFilter(equipment="trailer", min_length=28)
+    )
+
+    assert [r.campground_id for r in results] == ["1", "2"]
+    assert results[0].availability.availability == []
+    assert results[1].availability.ids == ["64082"]
+    # campground 1 has no site fitting the trailer, so no month was fetched
+    assert session.client.months == [("2", start.replace(day=1))]
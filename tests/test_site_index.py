@@ -0,0 +1,146 @@
+import datetime as dt
+import random
+
+from recreation.availability_list import CampgroundAvailabilityList
+from recreation.rgapi.camp import RGApiCampgroundAvailability, RGApiCampsite
+from recreation.site_index import CampsiteIndex, SiteFilter
+
+EQUIPMENT = ["Tent", "Trailer", "RV", "Pickup Camper"]
+TYPES = ["STANDARD NONELECTRIC", "RV NONELECTRIC", "TENT ONLY NONELECTRIC"]
+
+
+def campsite(rng: random.Random, campground_id: str, site_id: str) -> RGApiCampsite:
+    return RGApiCampsite(
+        campsite_id=site_id,
+        campsite_latitude=41.57,
+        campsite_longitude=-121.65,
+        campsite_name=site_id,
+        campsite_reserve_type="Site-Specific",
+        campsite_status="Open",
+        campsite_type=rng.choice(TYPES),
+        facility_id=campground_id,
+        loop="A",
+        parent_site_id=None,
+        is_accessible=rng.random() < 0.2,
+        is_deactivated=False,
+        permitted_equipment=[
+            {
+                "campsite_equipment_type_id": i,
+                "equipment_name": name,
+                "max_length": rng.choice([0, 20, 28, 35, 45]),
+                "is_deactivated": rng.random() < 0.1,
+            }
+            for i, name in enumerate(rng.sample(EQUIPMENT, rng.randrange(1, 4)))
+        ],
+        notices=[],
+        attributes=[
+            {
+                "attribute_id": 1,
+                "attribute_name": "Pets Allowed",
+                "attribute_value": rng.choice(["Yes", "No"]),
+                "attribute_code": "pets_allowed",
+            }
+        ],
+        site_details_map=(
+            {
+                "shade": {
+                    "attribute_id": 2,
+                    "attribute_name": "Shade",
+                    "attribute_value": rng.choice(["Full", "Partial", "None"]),
+                    "attribute_code": "shade",
+                }
+            }
+            if rng.random() < 0.5
+            else {}
+        ),
+        equipment_details_map={},
+    )
+
+
+def matches(site: RGApiCampsite, site_filter: SiteFilter) -> bool:
+    if site_filter.equipment is not None or site_filter.min_length is not None:
+        if not any(
+            not e.is_deactivated
+            and (
+                site_filter.equipment is None
+                or e.equipment_name.lower() == site_filter.equipment.lower()
+            )
+            and e.max_length >= (site_filter.min_length or 0)
+            for e in site.permitted_equipment
+        ):
+            return False
+    if site_filter.accessible is not None:
+        if site.is_accessible != site_filter.accessible:
+            return False
+    if site_filter.campsite_types:
+        if site.campsite_type.value not in site_filter.campsite_types:
+            return False
+    details = site.attributes + list(site.site_details.values())
+    for name, value in site_filter.attributes.items():
+        if not any(
+            d.attribute_name.lower() == name.lower()
+            and (not value or (d.attribute_value or "").lower() == value.lower())
+            for d in details
+        ):
+            return False
+    return True
+
+
+def test_site_ids_match_brute_force():
+    rng = random.Random(0)
+    campgrounds = {
+        str(camp): [campsite(rng, str(camp), str(site)) for site in range(60)]
+        for camp in range(5)
+    }
+    index = CampsiteIndex()
+    for camp_id, sites in campgrounds.items():
+        index.add_campground(camp_id, sites)
+
+    filters = [
+        SiteFilter(equipment="trailer", min_length=28),
+        SiteFilter(min_length=40),
+        SiteFilter(accessible=True),
+        SiteFilter(accessible=False, equipment="RV"),
+        SiteFilter(attributes={"pets allowed": "yes", "Shade": ""}),
+        SiteFilter(attributes={"Shade": "full"}, campsite_types=["RV NONELECTRIC"]),
+        SiteFilter(equipment="Boat"),
+    ]
+    for site_filter in filters:
+        for camp_id, sites in campgrounds.items():
+            expected = {s.id for s in sites if matches(s, site_filter)}
+            assert index.site_ids(site_filter, camp_id) == expected
+
+    # replacing a campground's sites drops the old postings
+    index.add_campground("0", campgrounds["0"][:1])
+    assert index.site_ids(SiteFilter(), "0") == {"0"}
+    index.remove_campground("0")
+    assert index.site_ids(SiteFilter(), "0") == set()
+
+
+def test_parse_attributes():
+    assert SiteFilter.parse_attributes(["Pets Allowed=Yes", "Shade"]) == {
+        "Pets Allowed": "Yes",
+        "Shade": "",
+    }
+
+
+def test_from_campground_site_ids():
+    month = dt.date(2022, 7, 1)
+    api_month = RGApiCampgroundAvailability(
+        campsites={
+            site_id: {
+                "availabilities": {f"{month.isoformat()}T00:00:00Z": "Available"},
+                "campsite_id": site_id,
+                "campsite_reserve_type": "Site-Specific",
+                "campsite_type": "STANDARD NONELECTRIC",
+                "loop": "A",
+                "max_num_people": 6,
+                "min_num_people": 1,
+                "site": site_id,
+                "type_of_use": "Overnight",
+            }
+            for site_id in ["1", "2", "3"]
+        }
+    )
+    avail = CampgroundAvailabilityList.from_campground([api_month], site_ids={"2"})
+    assert avail.ids == ["2"]
@@ -0,0 +1,97 @@
+import datetime as dt
+
+import pytest
+
+from recreation.availability_list import (
+    CampgroundAvailability,
+    CampgroundAvailabilityList,
+    PermitAvailability,
+    PermitAvailabilityList,
+)
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.snapshot import (
+    KIND_CAMPGROUND,
+    SnapshotError,
+    load_snapshot,
+    save_snapshot,
+)
+
+
+@pytest.fixture
+def campground_list() -> CampgroundAvailabilityList:
+    return CampgroundAvailabilityList(
+        [
+            CampgroundAvailability(
+                "64082",
+                dt.date(2022, 7, 1),
+                CampsiteAvailabilityStatus.available,
+                2,
+            ),
+            CampgroundAvailability(
+                "64082",
+                dt.date(2022, 7, 3),
+                CampsiteAvailabilityStatus.reserved,
+                1,
+            ),
+            CampgroundAvailability(
+                "64083",
+                dt.date(2022, 7, 1),
+                CampsiteAvailabilityStatus.not_available,
+                3,
+            ),
+        ]
+    )
+
+
+@pytest.fixture
+def permit_list() -> PermitAvailabilityList:
+    return PermitAvailabilityList(
+        [
+            PermitAvailability("290", dt.date(2022, 7, 1), 0, 14, True),
+            PermitAvailability("290", dt.date(2022, 7, 2), 1, 14, False),
+            PermitAvailability("291", dt.date(2022, 7, 1), 900000, 900000, False),
+        ]
+    )
+
+
+def test_campground_snapshot_roundtrip(tmp_path, campground_list):
+    path = tmp_path / "camp.snap"
+    campground_list.save(path, meta={"campground_id": "234436"})
+
+    loaded = CampgroundAvailabilityList.load(path)
+    assert loaded.availability == campground_list.availability
+    assert loaded.ids == campground_list.ids
+
+    with load_snapshot(path) as snapshot:
+        assert snapshot.kind == KIND_CAMPGROUND
+        assert len(snapshot) == 3
+        assert snapshot.meta == {"campground_id": "234436"}
+        assert list(snapshot.column("length")) == [2, 1, 3]
+
+
+def test_permit_snapshot_roundtrip(tmp_path, permit_list):
+    path = tmp_path / "permit.snap"
+    permit_list.save(path)
+
+    loaded = PermitAvailabilityList.load(path)
+    assert loaded.availability == permit_list.availability
+
+
+def test_snapshot_empty(tmp_path):
+    path = tmp_path / "empty.snap"
+    save_snapshot(path, PermitAvailabilityList([]))
+    assert PermitAvailabilityList.load(path).availability == []
+
+
+def test_snapshot_wrong_kind(tmp_path, permit_list):
+    path = tmp_path / "permit.snap"
+    permit_list.save(path)
+    with pytest.raises(ValueError):
+        CampgroundAvailabilityList.load(path)
+
+
+def test_snapshot_bad_file(tmp_path):
+    path = tmp_path / "bad.snap"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(SnapshotError):
+        load_snapshot(path)
@@ -0,0 +1,89 @@
+import datetime as dt
+import email.utils
+import time
+
+import pytest
+import responses
+from conftest import campground_month
+
+from recreation.sniper import (
+    CampgroundSniper,
+    ClockOffset,
+    measure_clock_offset,
+)
+
+
+class FakeResponse:
+    def __init__(self, server_time: float):
+        self.headers = {"Date": email.utils.formatdate(server_time, usegmt=True)}
+
+
+class FakeServer:
+    # server clock runs `offset` seconds ahead, each request takes `rtt`
+    def __init__(self, offset: float, rtt: float, start: float = 1_000_000.3):
+        self.offset = offset
+        self.rtt = rtt
+        self.now = start
+
+    def clock(self) -> float:
+        return self.now
+
+    def head(self, url, allow_redirects=False):
+        self.now += self.rtt / 2
+        response = FakeResponse(int(self.now + self.offset))
+        self.now += self.rtt / 2 + 0.137
+        return response
+
+
+def test_measure_clock_offset():
+    server = FakeServer(offset=2.6, rtt=0.05)
+    result = measure_clock_offset(server, "url", samples=16, clock=server.clock)
+    assert result.samples == 16
+    assert result.error < 0.5
+    assert result.offset == pytest.approx(2.6, abs=result.error)
+
+
+def test_fire_times():
+    release = dt.datetime(2023, 1, 15, 15, 0, tzinfo=dt.timezone.utc)
+    sniper = CampgroundSniper(
+        "234436", dt.date(2023, 7, 1), release, burst=3, spacing=0.1, lead=0.2
+    )
+    times = sniper.fire_times(offset=1.0)
+    base = release.timestamp() - 1.0
+    assert times == pytest.approx([base - 0.2, base - 0.1, base])
+
+
+@responses.activate
+def test_snipe_burst():
+    camp_id = "234436"
+    responses.add(
+        responses.HEAD,
+        f"https://www.recreation.gov/api/camps/campgrounds/{camp_id}",
+        status=200,
+    )
+    release = dt.datetime.now(dt.timezone.utc) + dt.timedelta(seconds=0.2)
+
+    def fetch(campground_id, month):
+        assert month == dt.date(2023, 7, 1)
+        if time.time() < release.timestamp():
+            return campground_month(month, "Not Available")
+        return campground_month(month)
+
+    sniper = CampgroundSniper(
+        camp_id,
+        dt.date(2023, 7, 15),
+        release,
+        burst=4,
+        spacing=0.1,
+        lead=0.15,
+        fetch=fetch,
+    )
+    result = sniper.run(ClockOffset(offset=0.0, error=0.0, samples=1))
+
+    assert [a.available for a in result.attempts] == [0, 0, 1, 1]
+    assert result.attempts[0].fired == pytest.approx(-0.15, abs=0.02)
+    detection = result.first_detection
+    assert detection is not None
+    assert detection.index == 2
+    assert 0 <= detection.received < 0.1
+    assert result.availability.ids == ["64082"]
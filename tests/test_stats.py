@@ -0,0 +1,81 @@
+import datetime as dt
+
+import pytest
+from conftest import runs
+
+from recreation.history import HistoryStore
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.stats import allocate_intervals, campground_stats, opening_rates
+
+AVAILABLE = CampsiteAvailabilityStatus.available
+RESERVED = CampsiteAvailabilityStatus.reserved
+
+
+def at(day: int, hour: int) -> dt.datetime:
+    return dt.datetime(2022, 6, day, hour, tzinfo=dt.timezone.utc)
+
+
+@pytest.fixture
+def store(tmp_path):
+    with HistoryStore(tmp_path / "history.sqlite") as store:
+        store.record("1", runs(("1", 1, RESERVED, 10)), polled_at=at(1, 0))
+        store.record(
+            "1",
+            runs(("1", 1, RESERVED, 3), ("1", 4, AVAILABLE, 2), ("1", 6, RESERVED, 5)),
+            polled_at=at(2, 7),
+        )
+        store.record("1", runs(("1", 1, RESERVED, 10)), polled_at=at(3, 9))
+        store.record(
+            "1",
+            runs(("1", 1, RESERVED, 4), ("1", 5, AVAILABLE, 1), ("1", 6, RESERVED, 5)),
+            polled_at=at(5, 0),
+        )
+        yield store
+
+
+def test_campground_stats(store):
+    stats = campground_stats(store, "1")
+    assert stats.polls == 4
+    assert stats.observed_days == 4
+
+    assert [(o.night.day, o.opened_at) for o in stats.openings] == [
+        (4, at(2, 7)),
+        (5, at(2, 7)),
+        (5, at(5, 0)),
+    ]
+    assert stats.openings_per_day == 0.75
+    assert stats.reserved_nights == 10
+    assert stats.reopened_nights == 2
+    assert stats.by_hour() == {7: 2, 0: 1}
+    pdt = dt.timezone(dt.timedelta(hours=-7))
+    assert stats.by_hour(pdt) == {0: 2, 17: 1}
+    assert stats.by_weekday() == {3: 2, 6: 1}
+    assert stats.by_weekday(pdt) == {3: 2, 5: 1}
+    assert stats.by_night()[dt.date(2022, 7, 5)] == 2
+    assert stats.openings[0].lead_days == 32
+
+
+def test_campground_stats_date_range(store):
+    stats = campground_stats(store, "1", start_date=dt.date(2022, 7, 5))
+    assert [o.night.day for o in stats.openings] == [5, 5]
+
+
+def test_campground_stats_unknown(store):
+    stats = campground_stats(store, "2")
+    assert stats.polls == 0
+    assert stats.openings == []
+
+
+def test_allocate_intervals(store):
+    rates = opening_rates([campground_stats(store, "1")])
+    assert rates == {("1", dt.date(2022, 7, 1)): 0.75}
+
+    intervals = allocate_intervals(
+        {"busy": 3.0, "quiet": 1.0, "dead": 0.0},
+        requests_per_hour=69,
+        min_interval=10,
+        max_interval=1200,
+    )
+    assert intervals["dead"] == 1200
+    assert intervals["busy"] == pytest.approx(3600 / 48)
+    assert intervals["quiet"] == pytest.approx(3600 / 18)
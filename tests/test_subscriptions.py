@@ -0,0 +1,86 @@
+import datetime as dt
+import random
+
+from conftest import runs
+
+from recreation.diff import opened_availability
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.subscriptions import Subscription, SubscriptionIndex
+from recreation.watch import WatchQuery
+
+AVAILABLE = CampsiteAvailabilityStatus.available
+RESERVED = CampsiteAvailabilityStatus.reserved
+
+
+def query(start: int, end: int, **kwargs) -> WatchQuery:
+    return WatchQuery(
+        campground_id=kwargs.pop("campground_id", "234436"),
+        start_date=dt.date(2022, 7, start),
+        end_date=dt.date(2022, 7, end),
+        **kwargs,
+    )
+
+
+def test_candidates_only_overlapping_buckets():
+    index = SubscriptionIndex()
+    index.add(Subscription("early", query(1, 5), tenant="a"))
+    index.add(Subscription("late", query(20, 28), tenant="b"))
+    index.add(Subscription("site", query(1, 28, site_ids=["2"]), tenant="a"))
+    index.add(Subscription("other", query(1, 28, campground_id="1"), tenant="c"))
+
+    changes = list(
+        opened_availability(
+            runs(("1", 1, RESERVED, 30)),
+            runs(
+                ("1", 1, RESERVED, 21), ("1", 22, AVAILABLE, 2), ("1", 24, RESERVED, 7)
+            ),
+        )
+    )
+    assert [s.subscription_id for s in index.candidates("234436", changes)] == ["late"]
+
+    index.remove("late")
+    assert index.candidates("234436", changes) == []
+    assert len(index) == 3
+
+
+def test_match_parity_with_full_evaluation():
+    rng = random.Random(0)
+    index = SubscriptionIndex()
+    for n in range(200):
+        start = rng.randrange(1, 25)
+        index.add(
+            Subscription(
+                str(n),
+                query(
+                    start,
+                    min(start + rng.randrange(0, 10), 31),
+                    length=rng.choice([None, 1, 2, 3]),
+                    site_ids=rng.choice([None, ["1"], ["2", "3"]]),
+                ),
+            )
+        )
+
+    def snapshot():
+        avails = []
+        for site_id in ["1", "2", "3"]:
+            for day in range(1, 32):
+                avails.append((site_id, day, rng.choice([AVAILABLE, RESERVED]), 1))
+        return runs(*avails)
+
+    for _ in range(10):
+        previous, current = snapshot(), snapshot()
+        changes = list(opened_availability(previous, current))
+
+        expected = []
+        for sub in index:
+            for avail in sub.query.apply(current).availability:
+                if any(
+                    c.id == avail.id
+                    and c.date < avail.end_date
+                    and avail.date < c.end_date
+                    for c in changes
+                ):
+                    expected.append((sub.subscription_id, avail))
+
+        matches = index.match("234436", current, changes)
+        assert [(s.subscription_id, a) for s, a in matches] == expected
@@ -0,0 +1,162 @@
+import datetime as dt
+import json
+
+import pytest
+import responses
+from conftest import campground_month, campground_month_data
+
+from recreation.availability_list import CampgroundAvailabilityList
+from recreation.rgapi.client import RecreationGovClient
+from recreation.server import SingleFlightCache
+from recreation.tracing import (
+    FileSpanExporter,
+    MemorySpanExporter,
+    StatusCode,
+    Tracer,
+    current_span,
+    set_tracer,
+    span,
+    traced_task,
+)
+from recreation.watch import CampgroundWatcher, WatchQuery
+
+
+@pytest.fixture
+def exporter():
+    exporter = MemorySpanExporter()
+    tracer = Tracer(exporter)
+    set_tracer(tracer)
+    yield exporter
+    set_tracer(None)
+    tracer.shutdown()
+
+
+class FakeClient:
+    def get_campground_availability(self, campground_id, month):
+        return campground_month(month)
+
+
+def test_disabled_tracing_is_a_no_op():
+    def task():
+        pass
+
+    assert span("a") is span("b")
+    assert not current_span().is_recording()
+    assert traced_task("task", task) is task
+
+
+def test_fetch_availability_trace(exporter):
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    end = start + dt.timedelta(days=40)
+    with span("query") as query:
+        CampgroundAvailabilityList.fetch_availability(
+            "234436", start, end, client=FakeClient()
+        )
+
+    # the trace is exported once its root ends, all of it together
+    spans = {s.span_id: s for s in exporter.spans}
+    assert {s.trace_id for s in spans.values()} == {query.trace_id}
+
+    (fetch,) = exporter.named("CampgroundAvailabilityList.fetch_availability")
+    assert fetch.parent_span_id == query.span_id
+    assert fetch.attributes["month_count"] == 2
+
+    months = exporter.named("fetch month")
+    assert sorted(m.attributes["month"] for m in months) == fetch.attributes["months"]
+    for month in months:
+        assert month.parent_span_id == fetch.span_id
+        assert month.attributes["executor.queue_wait_ms"] >= 0
+
+    # flattening and aggregation are stages under the fetch
+    stages = {s.name: s for s in spans.values() if s.parent_span_id == fetch.span_id}
+    assert {"flatten", "aggregate"} <= set(stages)
+
+
+@responses.activate
+def test_client_trace_records_retries(exporter, monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda seconds: None)
+    url = "https://www.recreation.gov/api/camps/availability/campground/234436/month"
+    month = dt.date(2022, 7, 1)
+    responses.add(responses.GET, url, status=500)
+    responses.add(responses.GET, url, json=campground_month_data(month), status=200)
+
+    client = RecreationGovClient(rate_limiter=None)
+    client.get_campground_availability("234436", month)
+
+    (call,) = exporter.named("RecreationGovClient.get_campground_availability")
+    assert call.parent_span_id is None
+    assert call.attributes["rgapi.campground_id"] == "234436"
+    assert call.attributes["rgapi.start_date"] == "2022-07-01"
+    assert call.attributes["http.status_code"] == 200
+    assert call.attributes["retries"] == 1
+    assert [e.name for e in call.events] == ["retry"]
+    assert len(exporter.named("http fetch")) == 2
+    assert len(exporter.named("validation")) == 1
+
+
+def test_watcher_poll_trace(exporter):
+    start = dt.date.today().replace(day=1) + dt.timedelta(days=40)
+    query = WatchQuery("234436", start, start + dt.timedelta(days=3))
+
+    def fetch(camp_id, start_date, end_date):
+        return CampgroundAvailabilityList.fetch_availability(
+            camp_id, start_date, end_date, client=FakeClient()
+        )
+
+    watcher = CampgroundWatcher(
+        [query], lambda event: None, fetch=fetch, sleep=lambda seconds: None
+    )
+    watcher.step()
+    watcher.step()
+
+    polls = exporter.named("CampgroundWatcher.poll")
+    assert len(polls) == 2
+    assert len({poll.trace_id for poll in polls}) == 2
+    assert polls[0].attributes["campground_id"] == "234436"
+    assert "opened" not in polls[0].attributes
+    assert polls[1].attributes["opened"] == 0
+    for fetch_span in exporter.named("CampgroundAvailabilityList.fetch_availability"):
+        assert fetch_span.parent_span_id in {poll.span_id for poll in polls}
+
+
+def test_cache_events_and_errors(exporter):
+    cache = SingleFlightCache()
+    with pytest.raises(KeyError):
+        with span("query"):
+            cache.get("month", 60, lambda: 1)
+            cache.get("month", 60, lambda: 1)
+            raise KeyError("boom")
+
+    (query,) = exporter.named("query")
+    assert [e.name for e in query.events] == ["cache miss", "cache hit", "exception"]
+    assert query.status == StatusCode.error
+
+
+def test_file_exporter_writes_otlp_json(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(FileSpanExporter(path))
+    set_tracer(tracer)
+    try:
+        for n in range(2):
+            with span("query", {"n": n, "months": ["2022-07-01"]}):
+                with span("child"):
+                    pass
+    finally:
+        set_tracer(None)
+        tracer.shutdown()
+
+    lines = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(lines) == 2
+    spans = lines[0]["resourceSpans"][0]["scopeSpans"][0]["spans"]
+    child, query = spans
+    assert child["parentSpanId"] == query["spanId"]
+    assert child["traceId"] == query["traceId"]
+    assert len(query["traceId"]) == 32 and len(query["spanId"]) == 16
+    assert query["attributes"] == [
+        {"key": "n", "value": {"intValue": "0"}},
+        {
+            "key": "months",
+            "value": {"arrayValue": {"values": [{"stringValue": "2022-07-01"}]}},
+        },
+    ]
+    assert int(query["endTimeUnixNano"]) >= int(query["startTimeUnixNano"])
@@ -0,0 +1,127 @@
+import datetime as dt
+
+import apiclient.exceptions
+import pytest
+from conftest import FakeClock, runs
+
+from recreation.rgapi.camp import CampsiteAvailabilityStatus
+from recreation.watch import CampgroundWatcher, WatchQuery
+
+AVAILABLE = CampsiteAvailabilityStatus.available
+RESERVED = CampsiteAvailabilityStatus.reserved
+
+
+@pytest.fixture
+def query() -> WatchQuery:
+    return WatchQuery(
+        campground_id="234436",
+        start_date=dt.date(2022, 7, 1),
+        end_date=dt.date(2022, 7, 10),
+        length=2,
+    )
+
+
+def make_watcher(query, responses, events, on_event=None, **kwargs):
+    clock = FakeClock()
+    results = iter(responses)
+
+    def fetch(camp_id, start_date, end_date):
+        result = next(results)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    watcher = CampgroundWatcher(
+        [query],
+        on_event or events.append,
+        fetch=fetch,
+        interval=60,
+        min_interval=10,
+        max_interval=600,
+        clock=clock,
+        sleep=clock.sleep,
+        **kwargs,
+    )
+    return watcher, clock
+
+
+def test_watch_reports_opened_matches(query):
+    events = []
+    watcher, _ = make_watcher(
+        query,
+        [
+            runs(("1", 1, RESERVED, 10), ("2", 1, RESERVED, 10)),
+            runs(("1", 1, RESERVED, 10), ("2", 1, RESERVED, 10)),
+            runs(
+                ("1", 1, RESERVED, 3),
+                ("1", 4, AVAILABLE, 3),
+                ("1", 7, RESERVED, 4),
+                ("2", 1, AVAILABLE, 1),
+                ("2", 2, RESERVED, 9),
+            ),
+        ],
+        events,
+    )
+    watcher.run(max_polls=3)
+
+    # site 2 opened for a single night, shorter than the query length
+    assert len(events) == 1
+    assert events[0].availability.id == "1"
+    assert events[0].availability.date == dt.date(2022, 7, 4)
+    assert events[0].query is query
+
+
+def test_watch_emit_initial(query):
+    events = []
+    watcher, _ = make_watcher(
+        query, [runs(("1", 1, AVAILABLE, 10))], events, emit_initial=True
+    )
+    watcher.run(max_polls=1)
+    assert len(events) == 1
+
+
+def test_watch_survives_failing_handler(query):
+    events = []
+
+    def on_event(event):
+        events.append(event)
+        if len(events) == 1:
+            raise apiclient.exceptions.ServerError("down", status_code=503)
+
+    watcher, _ = make_watcher(
+        query,
+        [
+            runs(("1", 1, AVAILABLE, 10), ("2", 1, AVAILABLE, 10)),
+            runs(("1", 1, AVAILABLE, 10), ("2", 1, AVAILABLE, 10)),
+        ],
+        events,
+        on_event=on_event,
+        emit_initial=True,
+    )
+    watcher.run(max_polls=2)
+
+    # the second site is still reported after the first handler call fails
+    assert [e.availability.id for e in events] == ["1", "2"]
+
+
+def test_watch_adapts_interval(query):
+    events = []
+    unchanged = runs(("1", 1, RESERVED, 10))
+    opened = runs(("1", 1, AVAILABLE, 10))
+    throttled = apiclient.exceptions.ClientError("slow down", status_code=429)
+    watcher, clock = make_watcher(
+        query, [unchanged, unchanged, opened, throttled], events
+    )
+    schedule = watcher.schedules[query.campground_id]
+
+    watcher.step()
+    assert schedule.interval == 60
+    watcher.step()
+    assert schedule.interval == 75
+    watcher.step()
+    assert schedule.interval == 37.5
+    assert schedule.changes == 1
+    watcher.step()
+    assert schedule.interval == 75
+    assert schedule.errors == 1
+    assert clock.now == 60 + 75 + 37.5